@@ -2,3 +2,9 @@ from .fields import *
 from .models import *
 from .enums import *
 from .pagination import PagedResult
+from .construct import *
+from .interning import *
+from .lazy import *
+from .records import *
+from .columns import *
+from .projection import *
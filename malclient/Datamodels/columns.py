@@ -0,0 +1,171 @@
+import datetime
+from enum import Enum
+from typing import Iterable, Optional, Callable
+
+__all__ = ['Columns', 'ColumnBuilder', 'to_columns', 'to_numpy',
+           'ANIME_COLUMNS', 'MANGA_COLUMNS', 'ANIME_LIST_COLUMNS', 'MANGA_LIST_COLUMNS', 'CATEGORICAL_COLUMNS']
+
+# Columns are attribute paths of entries, nested values are separated with dots, f.e. 'list_status.score'
+ANIME_COLUMNS = ('id', 'mean', 'rank', 'popularity', 'num_list_users', 'num_episodes', 'average_episode_duration',
+                 'start_date', 'nsfw', 'media_type', 'status')
+MANGA_COLUMNS = ('id', 'mean', 'rank', 'popularity', 'num_list_users', 'num_volumes', 'num_chapters',
+                 'start_date', 'nsfw', 'media_type', 'status')
+ANIME_LIST_COLUMNS = ANIME_COLUMNS + ('list_status.status', 'list_status.score', 'list_status.num_episodes_watched',
+                                      'list_status.updated_at')
+MANGA_LIST_COLUMNS = MANGA_COLUMNS + ('list_status.status', 'list_status.score', 'list_status.num_volumes_read',
+                                      'list_status.num_chapters_read', 'list_status.updated_at')
+# String columns (not backed by enums) which are encoded as integer codes by to_numpy
+CATEGORICAL_COLUMNS = ('list_status.status', 'my_list_status.status')
+
+
+class Columns(dict):
+    """
+    Mapping of column name to its values (lists, or numpy arrays when created by to_numpy)
+
+    :ivar categories: Values represented by codes of categorical columns, code is position in tuple, -1 marks missing value
+    """
+    def __init__(self, values: dict, categories: Optional[dict[str, tuple]] = None):
+        super().__init__(values)
+        self.categories: dict[str, tuple] = categories or {}
+
+    @property
+    def rows(self) -> int:
+        return len(next(iter(self.values()))) if self else 0
+
+    def decode(self, name: str) -> list:
+        """
+        Translates codes of categorical column back into values
+
+        :param str name: Name of categorical column
+        :returns: Values of column, None for missing ones
+        """
+        categories = self.categories[name]
+        return [categories[code] if code >= 0 else None for code in self[name]]
+
+
+class ColumnBuilder(object):
+    """
+    Collects values of columns from entries one by one, entries aren't stored so they may be discarded right after adding
+
+    :ivar columns: Names (attribute paths) of collected columns
+    """
+    def __init__(self, columns: Iterable[str]):
+        self.columns: tuple[str, ...] = tuple(columns)
+        self._getters = [_getter(column) for column in self.columns]
+        self._values: list[list] = [[] for _ in self.columns]
+
+    def add(self, entry):
+        for getter, values in zip(self._getters, self._values):
+            values.append(getter(entry))
+
+    def extend(self, entries: Iterable):
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def build(self, *, as_numpy: bool = False, categorical: Iterable[str] = CATEGORICAL_COLUMNS) -> Columns:
+        """
+        :param bool as_numpy: If set to True, columns are converted to numpy arrays (see to_numpy)
+        :param categorical: Names of string columns encoded as integer codes when converted to numpy arrays
+        """
+        columns = Columns(dict(zip(self.columns, self._values)))
+        return _to_arrays(columns, set(categorical)) if as_numpy else columns
+
+
+def to_columns(entries: Iterable, columns: Iterable[str]) -> Columns:
+    """
+    Collects values of columns from entries (models, lazy models or records)
+
+    :param entries: Iterable of entries, f.e. PagedResult
+    :param columns: Names of columns, nested values are accessed with dots, f.e. 'list_status.score'
+    :returns: Plain lists of values, None where value is missing
+    :rtype: Columns
+    """
+    return ColumnBuilder(columns).extend(entries).build()
+
+
+def to_numpy(entries: Iterable, columns: Iterable[str], *, categorical: Iterable[str] = CATEGORICAL_COLUMNS) -> Columns:
+    """
+    Collects values of columns from entries as typed numpy arrays, requires optional dependency numpy
+
+    * integers - int64, float64 with nan if some values are missing
+    * floats - float64 with nan for missing values
+    * dates and datetimes - datetime64[D] and datetime64[s] (UTC) with NaT for missing values
+    * enums and categorical columns - int16 codes, values of codes are stored in `Columns.categories`
+    * other values - object arrays
+
+    :param entries: Iterable of entries, f.e. PagedResult
+    :param columns: Names of columns, nested values are accessed with dots, f.e. 'list_status.score'
+    :param categorical: Names of string columns encoded as integer codes
+    :rtype: Columns
+    """
+    return ColumnBuilder(columns).extend(entries).build(as_numpy=True, categorical=categorical)
+
+
+def _getter(column: str) -> Callable:
+    names = column.split('.')
+    if len(names) == 1:
+        return lambda entry: getattr(entry, column, None)
+
+    def get(entry):
+        for name in names:
+            entry = getattr(entry, name, None)
+            if entry is None:
+                break
+        return entry
+    return get
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:  # numpy is optional, imported only when arrays are requested
+        raise ImportError("to_numpy requires numpy, install it with `pip install numpy`") from None
+    return numpy
+
+
+def _to_arrays(columns: Columns, categorical: set) -> Columns:
+    np = _numpy()
+    arrays = Columns({}, columns.categories)
+    for name, values in columns.items():
+        arrays[name], categories = _array(np, values, name in categorical)
+        if categories is not None:
+            arrays.categories[name] = categories
+    return arrays
+
+
+def _array(np, values: list, categorical: bool):
+    present = [value for value in values if value is not None]
+    missing = len(present) != len(values)
+    if not present:
+        return np.full(len(values), np.nan), None
+    sample = present[0]
+    if isinstance(sample, Enum):
+        categories = tuple(member.value for member in type(sample))
+        return _codes(np, values, {member: code for code, member in enumerate(type(sample))}), categories
+    if categorical and isinstance(sample, str):
+        categories = tuple(sorted(set(present)))
+        return _codes(np, values, {value: code for code, value in enumerate(categories)}), categories
+    if isinstance(sample, bool):
+        return np.array(values, dtype=object if missing else bool), None
+    if isinstance(sample, (int, float)):
+        if missing or any(type(value) is float for value in present):
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64), None
+        return np.array(values, dtype=np.int64), None
+    if isinstance(sample, datetime.datetime):
+        return np.array([_naive_utc(value) for value in values], dtype='datetime64[s]'), None
+    if isinstance(sample, datetime.date):
+        # partial dates (f.e. '2001-04') are kept as strings by models, numpy parses them as first day of period
+        return np.array(values, dtype='datetime64[D]'), None
+    return np.array(values, dtype=object), None
+
+
+def _codes(np, values: list, codes: dict):
+    # unknown values (f.e. enum members missing in this version) are treated as missing
+    return np.fromiter((codes.get(value, -1) for value in values), dtype=np.int16, count=len(values))
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
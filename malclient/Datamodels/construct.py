@@ -0,0 +1,200 @@
+import contextlib
+import contextvars
+import datetime
+from enum import Enum
+from typing import Union, Callable, Optional, get_origin, get_args
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+from .interning import intern_registry
+
+__all__ = ['trusted_construction', 'lazy_construction', 'construct_model', 'is_trusted', 'is_lazy']
+
+_trusted = contextvars.ContextVar('malclient_trusted_construction', default=False)
+_lazy = contextvars.ContextVar('malclient_lazy_construction', default=False)
+
+# Per model class: hook preparing raw data, defaults of all fields (in field order), names of fields
+# and converters of fields (None when value is stored as it is)
+_plans: dict[type, tuple[Optional[Callable], dict, frozenset, dict[str, Optional[Callable]]]] = {}
+
+
+@contextlib.contextmanager
+def trusted_construction(enabled: bool = True):
+    """
+    Within this context models are built from API responses without pydantic validation, only enums, dates
+    and nested models are converted, everything else (f.e. urls) is stored as returned by API
+
+    :param bool enabled: If set to False, validation is enforced within context
+    """
+    token = _trusted.set(enabled)
+    try:
+        yield
+    finally:
+        _trusted.reset(token)
+
+
+def is_trusted() -> bool:
+    """Checks if models are currently built without validation"""
+    return _trusted.get()
+
+
+@contextlib.contextmanager
+def lazy_construction(enabled: bool = True):
+    """
+    Within this context models built from API responses are lazy wrappers of raw data (see LazyModel),
+    nested models are created only when they are accessed
+
+    :param bool enabled: If set to False, regular models are built within context
+    """
+    token = _lazy.set(enabled)
+    try:
+        yield
+    finally:
+        _lazy.reset(token)
+
+
+def is_lazy() -> bool:
+    """Checks if models are currently built as lazy wrappers"""
+    return _lazy.get()
+
+
+def compiled_plan(model: type) -> tuple:
+    """
+    Returns cached construction plan of model: (prepare hook, defaults, field names, converters)
+    """
+    plan = _plans.get(model)
+    if plan is None:
+        plan = _plans[model] = _compile(model)
+    return plan
+
+
+def construct_model(model: type, data: dict):
+    """
+    Builds model instance without validation
+
+    :param model: Pydantic model class
+    :param dict data: Trusted response data
+    :returns: Instance of model
+    """
+    instance = model.__new__(model)
+    construct_into(instance, data)
+    return instance
+
+
+def construct_into(instance: BaseModel, data: dict):
+    """
+    Fills already created model instance with trusted data, used by MALBaseModel.__init__ in trusted mode
+    """
+    prepare, defaults, names, converters = compiled_plan(type(instance))
+    if prepare is not None:
+        data = prepare(data)
+    values = defaults.copy()
+    for name, value in data.items():
+        if name in converters:
+            converter = converters[name]
+            values[name] = value if converter is None or value is None else converter(value)
+    object.__setattr__(instance, '__dict__', values)
+    object.__setattr__(instance, '__fields_set__', names.intersection(data))
+    instance._init_private_attributes()
+
+
+def _compile(model: type) -> tuple:
+    defaults, converters = {}, {}
+    for name, field in model.__fields__.items():
+        converter = _converter(field.type_)
+        if converter is not None and field.shape == SHAPE_LIST:
+            converter = _list_of(_fallback(converter))
+        elif converter is not None and field.shape == SHAPE_SINGLETON:
+            converter = _fallback(converter)
+        else:
+            converter = None  # other containers aren't used by models, keep values untouched
+        defaults[name] = field.default
+        converters[name] = converter
+    return getattr(model, '_prepare', None), defaults, frozenset(defaults), converters
+
+
+def _list_of(converter: Callable) -> Callable:
+    def convert(values):
+        return [converter(value) for value in values] if type(values) is list else values
+    return convert
+
+
+def _parse_date(value):
+    return datetime.date.fromisoformat(value) if type(value) is str else value
+
+
+def _parse_datetime(value):
+    return datetime.datetime.fromisoformat(value) if type(value) is str else value
+
+
+def _parse_time(value):
+    return datetime.time.fromisoformat(value) if type(value) is str else value
+
+
+def _converter(annotation) -> Optional[Callable]:
+    """
+    Creates function converting raw value to annotated type, raises ValueError if value doesn't fit it
+    """
+    if get_origin(annotation) is Union:
+        return _union([member for member in get_args(annotation) if member is not type(None)])
+    if not isinstance(annotation, type):
+        return None
+    if issubclass(annotation, BaseModel):
+        def build(value):
+            return construct_model(annotation, value)
+
+        interned = getattr(annotation, '_interned', False)
+
+        def convert(value):
+            if type(value) is dict:
+                if interned:
+                    return intern_registry.intern(annotation, value, build, trusted=True)
+                return construct_model(annotation, value)
+            if isinstance(value, annotation):
+                return value
+            raise ValueError(f"{value!r} is not {annotation.__name__}")
+        return convert
+    if issubclass(annotation, Enum):
+        return annotation
+    if annotation is datetime.datetime:
+        return _parse_datetime
+    if annotation is datetime.date:
+        return _parse_date
+    if annotation is datetime.time:
+        return _parse_time
+    return None
+
+
+def _union(members: list) -> Optional[Callable]:
+    converters = [_converter(member) for member in members]
+    if len(members) == 1:
+        return converters[0]
+    models = [member for member in members if isinstance(member, type) and issubclass(member, BaseModel)]
+
+    def convert(value):
+        if type(value) is dict and models:
+            # same as validation, first model having all required fields wins
+            for model in models:
+                if all(name in value for name, field in model.__fields__.items() if field.required):
+                    return construct_model(model, value)
+            return construct_model(models[-1], value)
+        for converter in converters:
+            if converter is None:  # plain type like str, accepts value as it is
+                return value
+            try:
+                return converter(value)
+            except (ValueError, TypeError):
+                continue
+        return value
+    return convert
+
+
+def _fallback(converter: Callable) -> Callable:
+    # unknown enum members or partial dates (f.e. '2001-04') are kept as returned by API instead of failing
+    def convert(value):
+        try:
+            return converter(value)
+        except (ValueError, TypeError):
+            return value
+    return convert
@@ -1,50 +1,186 @@
-from types import MethodType, MethodWrapperType, BuiltinFunctionType
-from typing import Union
+import functools
+from typing import Optional
 
-__all__ = ['Fields', 'AuthorFields', 'ListStatusFields', 'UserFields', "CharacterFields", 'PersonFields']
+__all__ = ['Fields', 'AuthorFields', 'ListStatusFields', 'UserFields', "CharacterFields", 'PersonFields',
+           'parse_fields_payload', 'format_fields_payload', 'fields_cover', 'merge_fields']
+
+# FieldsTree is parsed form of fields payload, f.e. "id,my_list_status{tags}" -> {'id': None, 'my_list_status': {'tags': None}}
+# None means field requested with default subfields (or field without subfields)
+FieldsTree = dict[str, Optional[dict]]
+
+
+def parse_fields_payload(payload: str) -> FieldsTree:
+    """
+    Parses fields query string (as generated by FieldsBase.to_payload()) into nested dictionary
+
+    :param str payload: fields query string, f.e. "id,title,my_list_status{priority,tags}"
+    :returns: Nested dictionary, subfields of field are stored as its value, None if no subfields were specified
+    :rtype: dict
+    """
+    stack = [{}]
+    name = ''
+    for char in payload + ',':
+        if char == '{':
+            child = {}
+            stack[-1][name.strip()] = child
+            stack.append(child)
+            name = ''
+        elif char in ',}':
+            if name.strip():
+                stack[-1][name.strip()] = None
+            name = ''
+            if char == '}':
+                if len(stack) == 1:
+                    raise ValueError(f"Unbalanced braces in fields payload '{payload}'")
+                stack.pop()
+        else:
+            name += char
+    if len(stack) != 1:
+        raise ValueError(f"Unbalanced braces in fields payload '{payload}'")
+    return stack[0]
+
+
+def format_fields_payload(tree: FieldsTree) -> str:
+    """
+    Inverse of parse_fields_payload, generates fields query string from nested dictionary
+    """
+    return ','.join(name if sub is None else f"{name}{{{format_fields_payload(sub)}}}" for name, sub in tree.items())
+
+
+def fields_cover(have: FieldsTree, want: FieldsTree) -> bool:
+    """
+    Checks if response requested with `have` fields contains everything that would be returned for `want` fields
+    """
+    for name, sub in want.items():
+        if name not in have:
+            return False
+        if sub and (have[name] is None or not fields_cover(have[name], sub)):
+            return False
+    return True
+
+
+def merge_fields(first: FieldsTree, second: FieldsTree) -> FieldsTree:
+    """
+    Generates smallest fields tree covering both provided trees
+    """
+    merged = dict(first)
+    for name, sub in second.items():
+        if name not in merged or merged[name] is None:
+            merged[name] = sub
+        elif sub is not None:
+            merged[name] = merge_fields(merged[name], sub)
+    return merged
+
+
+def preset(method):
+    """
+    Turns classmethod generating fields into cached one, fields are immutable so single instance is shared by all callers
+    """
+    @functools.wraps(method)
+    def generate(cls):
+        fields = cls._presets.get(method.__name__)
+        if fields is None:
+            fields = cls._presets[method.__name__] = method(cls)
+        return fields
+    return classmethod(generate)
 
 
 class FieldsBase(object):
     """
     Base class for all Field classes
+
+    Fields are immutable: simple fields are stored as bitset and nested fields as tuple, so comparing and hashing them is cheap
+    and query string is generated only once, use `replace()` to get modified copy.
+    Subclasses declare their fields in `_declared` as (name, default) pairs for simple fields
+    and (name, name of fields class) pairs for nested ones, in order in which they appear in query string
     """
+    __slots__ = ('_mask', '_nested_values', '_hash', '_payload')
+    _declared: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._bits: dict[str, int] = {}
+        cls._nested: dict[str, tuple[int, str]] = {}
+        cls._default_mask: int = 0
+        cls._presets: dict[str, FieldsBase] = {}
+        for name, spec in cls._declared:
+            if isinstance(spec, str):
+                cls._nested[name] = (len(cls._nested), spec)
+                setattr(cls, name, property(lambda self, index=cls._nested[name][0]: self._nested_values[index]))
+            else:
+                bit = cls._bits[name] = 1 << len(cls._bits)
+                if spec:
+                    cls._default_mask |= bit
+                setattr(cls, name, property(lambda self, bit=bit: self._mask & bit != 0))
+
     def __init__(self, **kwargs):
-        pass
+        mask = self._default_mask
+        nested = [False] * len(self._nested)
+        for name, value in kwargs.items():
+            bit = self._bits.get(name)
+            if bit is not None:
+                mask = mask | bit if value else mask & ~bit
+            elif name in self._nested:
+                index, r_type = self._nested[name]
+                nested[index] = self._generate_subclass(globals()[r_type], value)
+            # unknown fields are ignored
+        object.__setattr__(self, '_mask', mask)
+        object.__setattr__(self, '_nested_values', tuple(nested))
+        object.__setattr__(self, '_hash', hash((type(self), mask, self._nested_values)))
+        object.__setattr__(self, '_payload', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable, use replace({name}=...) to get modified copy")
 
     def __eq__(self, other):
-        if type(self) != type(other):
-            return False
-        else:
-            for field in dir(self):
-                if type(self.__getattribute__(field)) not in (MethodType, MethodWrapperType, BuiltinFunctionType):
-                    if self.__getattribute__(field) != other.__getattribute__(field):
-                        return False
-                else:
-                    continue
-        return True
+        return type(self) is type(other) and self._mask == other._mask and self._nested_values == other._nested_values
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return _restore, (type(self), self.to_dict())
 
     def __repr__(self):
         """
         Returns string representation of dictionary containing all Fields
         """
-        return str(self.__dict__)
+        return str(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """
+        Returns values of all fields, True/False for simple ones and fields object (or False) for nested ones
+        """
+        return {name: getattr(self, name) for name, _ in self._declared}
+
+    def replace(self, **changes):
+        """
+        Generates copy of fields object with provided fields changed, f.e. `fields.replace(mean=True)`
+        """
+        return type(self)(**(self.to_dict() | changes))
 
     def to_payload(self):
         """
-        Generates query string for fields parameter
+        Generates query string for fields parameter, result is computed once per object
         """
+        if self._payload is None:
+            object.__setattr__(self, '_payload', self._generate_payload())
+        return self._payload
+
+    def _generate_payload(self) -> str:
         fields = []
-        for field, value in self.__dict__.items():
-            if isinstance(value, FieldsBase):
-                if value == value.empty():
+        for name, _ in self._declared:
+            if name in self._nested:
+                value = self._nested_values[self._nested[name][0]]
+                if value is False or value == value.empty():
                     continue
-                else:
-                    fields.append(field[1:] + '{' + str(",".join([key for key, state in value.__dict__.items() if state])) + '}')
-            elif value is True:
-                fields.append(field)
+                fields.append(name + '{' + ",".join(key for key, bit in value._bits.items() if value._mask & bit) + '}')
+            elif self._mask & self._bits[name]:
+                fields.append(name)
         return ','.join(fields)
 
-    def _generate_subclass(self, r_type, value):
+    @staticmethod
+    def _generate_subclass(r_type, value):
         return r_type(**value) if isinstance(value, dict) else value if isinstance(
             value, r_type) else False if value is not True else r_type()
 
@@ -55,14 +191,14 @@ class FieldsBase(object):
         """
         return cls(**{field: True for field in field_list})
 
-    @classmethod
+    @preset
     def all(cls):
         """
         Generates fields object containing all fields possible
         """
-        return cls.from_list(dir(cls()))
+        return cls.from_list([name for name, _ in cls._declared])
 
-    @classmethod
+    @preset
     def empty(cls):
         """
         Generates empty fields object
@@ -71,123 +207,79 @@ class FieldsBase(object):
         return cls()
 
 
+def _restore(cls, values: dict):
+    return cls(**values)
+
+
 class Fields(FieldsBase):
     """
     Object containing all fields possible for anime and manga
     num_favorites, opening_themes, ending_themes are not documented by MAL
     """
-    def __init__(self, **kwargs):
+    __slots__ = ()
+    _declared = (
         # general
-        self.id: bool = kwargs.get('id', True)
-        self.title: bool = kwargs.get('title', True)
-        self.main_picture: bool = kwargs.get('main_picture', True)
-        self.alternative_titles: bool = kwargs.get('alternative_titles', False)
-        self.start_date: bool = kwargs.get('start_date', False)
-        self.end_date: bool = kwargs.get('end_date', False)
-        self.synopsis: bool = kwargs.get('synopsis', False)
-        self.mean: bool = kwargs.get('mean', False)
-        self.rank: bool = kwargs.get('rank', False)
-        self.popularity: bool = kwargs.get('popularity', False)
-        self.num_list_users: bool = kwargs.get('num_list_users', False)
-        self.num_scoring_users: bool = kwargs.get('num_scoring_users', False)
-        self.updated_at: bool = kwargs.get('updated_at', False)
-        self.genres: bool = kwargs.get('genres', False)
-        # self.my_list_status: bool = kwargs.get('my_list_status', False)
-        self._my_list_status: ListStatusFields = self._generate_subclass(ListStatusFields, kwargs.get('my_list_status', False))
-        self.pictures: bool = kwargs.get('pictures', False)
-        self.background: bool = kwargs.get('background', False)
-        self._related_anime: bool = self._generate_subclass(Fields, kwargs.get('related_anime', False))
-        self._related_manga: bool = self._generate_subclass(Fields, kwargs.get('related_manga', False))
-        self._recommendations: bool = self._generate_subclass(Fields, kwargs.get('recommendations', False))
-        self.nsfw: bool = kwargs.get('nsfw', False)
-        self.created_at: bool = kwargs.get('created_at', False)
-        self.media_type: bool = kwargs.get('media_type', False)
-        self.status: bool = kwargs.get('status', False)
-        self.num_favorites: bool = kwargs.get('num_favorites', False)
+        ('id', True),
+        ('title', True),
+        ('main_picture', True),
+        ('alternative_titles', False),
+        ('start_date', False),
+        ('end_date', False),
+        ('synopsis', False),
+        ('mean', False),
+        ('rank', False),
+        ('popularity', False),
+        ('num_list_users', False),
+        ('num_scoring_users', False),
+        ('updated_at', False),
+        ('genres', False),
+        ('my_list_status', 'ListStatusFields'),
+        ('pictures', False),
+        ('background', False),
+        ('related_anime', 'Fields'),
+        ('related_manga', 'Fields'),
+        ('recommendations', 'Fields'),
+        ('nsfw', False),
+        ('created_at', False),
+        ('media_type', False),
+        ('status', False),
+        ('num_favorites', False),
 
         # anime related
-        self.num_episodes: bool = kwargs.get('num_episodes', False)
-        self.start_season: bool = kwargs.get('start_season', False)
-        self.broadcast: bool = kwargs.get('broadcast', False)
-        self.source: bool = kwargs.get('source', False)
-        self.average_episode_duration: bool = kwargs.get('average_episode_duration', False)
-        self.rating: bool = kwargs.get('rating', False)
-        self.studios: bool = kwargs.get('studios', False)
-        self.opening_themes: bool = kwargs.get('opening_themes', False)
-        self.ending_themes: bool = kwargs.get('ending_themes', False)
-        self.statistics: bool = kwargs.get('statistics', False)
-        self.videos: bool = kwargs.get('videos', False)
+        ('num_episodes', False),
+        ('start_season', False),
+        ('broadcast', False),
+        ('source', False),
+        ('average_episode_duration', False),
+        ('rating', False),
+        ('studios', False),
+        ('opening_themes', False),
+        ('ending_themes', False),
+        ('statistics', False),
+        ('videos', False),
 
         # manga related
-        self.num_volumes: bool = kwargs.get('num_volumes', False)
-        self.num_chapters: bool = kwargs.get('num_chapters', False)
-        self._authors: Union[AuthorFields, bool] = self._generate_subclass(AuthorFields, kwargs.get('authors', False))
-        self.serialization: bool = kwargs.get('serialization', False)
+        ('num_volumes', False),
+        ('num_chapters', False),
+        ('authors', 'AuthorFields'),
+        ('serialization', False),
 
         # endpoint specific
-        self._list_status: Union[ListStatusFields, bool] = self._generate_subclass(ListStatusFields, kwargs.get('list_status'))
-        # self._list_status: bool = kwargs.get('ranking', False)
-
-    @property
-    def authors(self):
-        return self._authors
-
-    @authors.setter
-    def authors(self, value):
-        self._authors = self._generate_subclass(AuthorFields, value)
-
-    @property
-    def list_status(self):
-        return self._list_status
-
-    @list_status.setter
-    def list_status(self, value):
-        self._list_status = self._generate_subclass(ListStatusFields, value)
-
-    @property
-    def related_anime(self):
-        return self._related_anime
+        ('list_status', 'ListStatusFields'),
+    )
 
-    @related_anime.setter
-    def related_anime(self, value):
-        self._related_anime = self._generate_subclass(Fields, value)
-
-    @property
-    def related_manga(self):
-        return self._related_manga
-
-    @related_manga.setter
-    def related_manga(self, value):
-        self._related_manga = self._generate_subclass(Fields, value)
-
-    @property
-    def recommendations(self):
-        return self._recommendations
-
-    @recommendations.setter
-    def recommendations(self, value):
-        self._recommendations = self._generate_subclass(Fields, value)
-
-    @property
-    def my_list_status(self):
-        return self._my_list_status
-
-    @my_list_status.setter
-    def my_list_status(self, value):
-        self._my_list_status: ListStatusFields = self._generate_subclass(ListStatusFields, value)
-
-    @classmethod
+    @preset
     def empty(cls):
         return cls(id=False, title=False, main_picture=False)
 
-    @classmethod
+    @preset
     def node(cls):
         """
         Generates Fields object containing only parameters taken by node
         """
         return cls().from_list(['id', 'title', 'main_picture'])
 
-    @classmethod
+    @preset
     def anime(cls):
         """
         Generates Fields object containing all parameters taken by anime
@@ -227,7 +319,7 @@ class Fields(FieldsBase):
                                 'ending_theme',
                                 'videos',])
 
-    @classmethod
+    @preset
     def manga(cls):
         """
         Generates Fields object containing all parameters taken by manga
@@ -270,11 +362,13 @@ class AuthorFields(FieldsBase):
     """
     Helper fields class containing info about manga author
     """
-    def __init__(self, **kwargs):
-        self.first_name: bool = kwargs.get('first_name', True)
-        self.last_name: bool = kwargs.get('last_name', True)
+    __slots__ = ()
+    _declared = (
+        ('first_name', True),
+        ('last_name', True),
+    )
 
-    @classmethod
+    @preset
     def empty(cls):
         return cls(first_name=False, last_name=False)
 
@@ -283,42 +377,53 @@ class ListStatusFields(FieldsBase):
     """
     Helper fields class containing precise data for my_list_status
     """
-    def __init__(self, **kwargs):
-        self.priority: bool = kwargs.get('priority', False)
-        self.tags: bool = kwargs.get('tags', False)
-        self.comments: bool = kwargs.get('comments', False)
+    __slots__ = ()
+    _declared = (
+        ('priority', False),
+        ('tags', False),
+        ('comments', False),
 
-        self.num_times_reread: bool = kwargs.get('num_times_reread', False)
-        self.reread_value: bool = kwargs.get('reread_value', False)
+        ('num_times_reread', False),
+        ('reread_value', False),
 
-        self.num_times_rewatched: bool = kwargs.get('num_times_rewatched', False)
-        self.rewatch_value: bool = kwargs.get('rewatch_value', False)
+        ('num_times_rewatched', False),
+        ('rewatch_value', False),
 
-        # DEPRECATED FIELDS - Always present in request
-        # self.score: bool = kwargs.get('score', True)
-        # self.status: bool = kwargs.get('status', True)
-        # self.updated_at: bool = kwargs.get('updated_at', True)
-        # self.start_date: bool = kwargs.get('start_date', False)
-        # self.finish_date: bool = kwargs.get('finish_date', False)
-        # self.is_rereading: bool = kwargs.get('is_rereading', False)
-        # self.num_chapters_read: bool = kwargs.get('num_chapters_read', False)
-        # self.num_volumes_read: bool = kwargs.get('num_volumes_read', False)
-        # self.num_episodes_watched: bool = kwargs.get('num_episodes_watched', False)
-        # self.is_rewatching: bool = kwargs.get('is_rewatching', False)
+        # always present in response, requesting it makes list_status part of payload even if no other field is set
+        ('updated_at', False),
 
-    @classmethod
+        # DEPRECATED FIELDS - Always present in request
+        # ('score', True),
+        # ('status', True),
+        # ('start_date', False),
+        # ('finish_date', False),
+        # ('is_rereading', False),
+        # ('num_chapters_read', False),
+        # ('num_volumes_read', False),
+        # ('num_episodes_watched', False),
+        # ('is_rewatching', False),
+    )
+
+    @preset
     def empty(cls):
         return cls(score=False, status=False, updated_at=False)
 
+    @preset
+    def all(cls):
+        """
+        All optional fields of list status, updated_at is returned anyway
+        """
+        return cls.from_list([name for name, _ in cls._declared if name != 'updated_at'])
 
-    @classmethod
+
+    @preset
     def manga_full(cls):
         """
         All fields for manga list status
         """
         return cls.from_list(['priority', 'tags', 'comments', 'num_times_reread', 'reread_value'])
 
-    @classmethod
+    @preset
     def anime_full(cls):
         """
         All fields for anime list status
@@ -327,19 +432,21 @@ class ListStatusFields(FieldsBase):
 
 
 class UserFields(FieldsBase):
-    def __init__(self, **kwargs):
-        self.id: bool = kwargs.get("id", True)
-        self.name: bool = kwargs.get("name", True)
-        self.picture: bool = kwargs.get("picture", True)
-        self.gender: bool = kwargs.get("gender", True)
-        self.birthday: bool = kwargs.get("birthday", False)
-        self.location: bool = kwargs.get("location", True)
-        self.joined_at: bool = kwargs.get("joined_at", True)
-        self.anime_statistics: bool = kwargs.get("anime_statistics", True)
-        self.time_zone: bool = kwargs.get("time_zone", False)
-        self.is_supporter: bool = kwargs.get("is_supporter", False)
-
-    @classmethod
+    __slots__ = ()
+    _declared = (
+        ("id", True),
+        ("name", True),
+        ("picture", True),
+        ("gender", True),
+        ("birthday", False),
+        ("location", True),
+        ("joined_at", True),
+        ("anime_statistics", True),
+        ("time_zone", False),
+        ("is_supporter", False),
+    )
+
+    @preset
     def basic(cls):
         return cls(id=True,
                    name=True,
@@ -348,37 +455,33 @@ class UserFields(FieldsBase):
 
 
 class CharacterFields(FieldsBase):
-    def __init__(self, **kwargs):
-        self.id: bool = kwargs.get("id", True)
-        self.role: bool = kwargs.get("role", True)
-        self.first_name: bool = kwargs.get("first_name", False)
-        self.last_name: bool = kwargs.get("last_name", False)
-        self.alternative_name: bool = kwargs.get("alternative_name", False)
-        self.main_picture: bool = kwargs.get("main_picture", False)
-        self.biography: bool = kwargs.get("biography", False)
-        self.pictures: bool = kwargs.get("pictures", False)
-        self._animeography: Fields = self._generate_subclass(Fields, kwargs.get("animeography", False))
-        self.num_favorites: bool = kwargs.get("num_favorites", False)
-
-    @property
-    def animeography(self) -> Fields:
-        return self._animeography
-
-    @animeography.setter
-    def animeography(self, value: Fields):
-        self._animeography: Fields = self._generate_subclass(Fields, value)
+    __slots__ = ()
+    _declared = (
+        ("id", True),
+        ("role", True),
+        ("first_name", False),
+        ("last_name", False),
+        ("alternative_name", False),
+        ("main_picture", False),
+        ("biography", False),
+        ("pictures", False),
+        ("animeography", 'Fields'),
+        ("num_favorites", False),
+    )
 
 
 class PersonFields(FieldsBase):
-    def __init__(self, **kwargs):
-        self.id: bool = kwargs.get("id", True)
-        self.first_name: bool = kwargs.get("first_name", True)
-        self.last_name: bool = kwargs.get("last_name", True)
-        self.alternative_names: bool = kwargs.get("alternative_names", False)
-        self.num_favorites: bool = kwargs.get("num_favorites", False)
-        self.main_picture: bool = kwargs.get("main_picture", False)
-        self.birthday: bool = kwargs.get("birthday", False)
-        self.more: bool = kwargs.get("more", False)
+    __slots__ = ()
+    _declared = (
+        ("id", True),
+        ("first_name", True),
+        ("last_name", True),
+        ("alternative_names", False),
+        ("num_favorites", False),
+        ("main_picture", False),
+        ("birthday", False),
+        ("more", False),
+    )
 
 # Deprecated - This serves no purpose, you can't specify fields for this parameter
 # class AnimeStatisticsFields(FieldsBase):
@@ -0,0 +1,114 @@
+import threading
+import weakref
+from typing import Callable, NamedTuple, Optional
+
+__all__ = ['InternRegistry', 'InternStats', 'intern_registry', 'interning_stats']
+
+
+class InternStats(NamedTuple):
+    """
+    Deduplication statistics of single model class
+
+    :ivar hits: Number of nested objects served with already existing instance
+    :ivar misses: Number of nested objects for which new instance was built
+    :ivar live: Number of distinct instances currently held by models
+    """
+    hits: int
+    misses: int
+    live: int
+
+    @property
+    def ratio(self) -> float:
+        """Share of nested objects which were deduplicated"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class InternRegistry(object):
+    """
+    Registry of shared instances of small immutable models (genres, studios, assets, magazines, authors),
+    when models are built from responses identical nested objects resolve to the same instance
+
+    Instances are held weakly, so they are dropped together with last model referencing them.
+    Validated and trusted instances are kept separately, so trusted (unvalidated) instance never leaks into validated model.
+
+    :ivar enabled: If set to False, every nested object is built separately
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled: bool = enabled
+        self._instances: dict[tuple, weakref.WeakValueDictionary] = {}
+        self._hits: dict[type, int] = {}
+        self._misses: dict[type, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, model: type, data: dict, build: Callable[[dict], object], *, trusted: bool = False):
+        """
+        Returns shared instance of model equal to data, builds it if it doesn't exist yet
+
+        :param model: Interned model class
+        :param dict data: Raw response data of nested object
+        :param build: Function building model instance from data
+        :param bool trusted: If data is converted without validation
+        """
+        key = _key(data)
+        if key is None or not self.enabled:
+            return build(data)
+        with self._lock:
+            instances = self._instances.get((model, trusted))
+            if instances is None:
+                instances = self._instances[(model, trusted)] = weakref.WeakValueDictionary()
+            instance = instances.get(key)
+            if instance is not None:
+                self._hits[model] = self._hits.get(model, 0) + 1
+                return instance
+        # built outside of lock, nested objects (f.e. author of manga) are interned by build itself
+        instance = build(data)
+        with self._lock:
+            # other thread may have built the same object meanwhile, first stored instance wins and this one counts as hit
+            stored = instances.setdefault(key, instance)
+            counter = self._misses if stored is instance else self._hits
+            counter[model] = counter.get(model, 0) + 1
+        return stored
+
+    def stats(self) -> dict[str, InternStats]:
+        """
+        :returns: Statistics of every interned model class by its name
+        :rtype: dict[str, InternStats]
+        """
+        live = {}
+        with self._lock:
+            for (model, _), instances in self._instances.items():
+                live[model] = live.get(model, 0) + len(instances)
+            return {model.__name__: InternStats(self._hits.get(model, 0), self._misses.get(model, 0), live.get(model, 0))
+                    for model in set(self._hits) | set(self._misses)}
+
+    def clear(self):
+        """Drops all shared instances and statistics, models built earlier keep their nested objects"""
+        with self._lock:
+            self._instances.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+
+def _key(data: dict) -> Optional[tuple]:
+    # nested objects are flat or contain another nested object (f.e. author), anything else isn't interned
+    items = []
+    for name, value in data.items():
+        if type(value) is dict:
+            value = _key(value)
+            if value is None:
+                return None
+        elif type(value) not in (int, str, float, bool) and value is not None:
+            return None
+        items.append((name, value))
+    return tuple(items)
+
+
+intern_registry = InternRegistry()
+
+
+def interning_stats() -> dict[str, InternStats]:
+    """
+    Deduplication statistics of nested objects built so far, f.e. {'Genre': InternStats(hits=9800, misses=200, live=200)}
+    """
+    return intern_registry.stats()
@@ -0,0 +1,136 @@
+from types import FunctionType, MethodType
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .construct import compiled_plan, trusted_construction, lazy_construction
+
+__all__ = ['LazyModel', 'lazy_model']
+
+_lazy_classes: dict[type, type] = {}
+
+
+class LazyModel(object):
+    """
+    Lightweight wrapper of raw response data exposing the same attributes as wrapped model,
+    values are converted (and nested models built without validation) only when attribute is accessed for the first time
+
+    Use `materialize()` to get regular model instance
+    """
+    __slots__ = ('_data', '_values')
+    _model: type = None
+
+    def __init__(self, **data):
+        self._data = data
+        self._values = None
+
+    @classmethod
+    def wrap(cls, data: dict):
+        """
+        Wraps raw data without copying it
+
+        :param dict data: Flattened response data of single entry
+        """
+        instance = object.__new__(cls)
+        instance._data = data
+        instance._values = None
+        return instance
+
+    def __getattr__(self, name):
+        # only called for names which aren't slots or class attributes, so for fields of model and its methods
+        _, defaults, _, converters = compiled_plan(self._model)
+        if name in converters:
+            values = self._values
+            if values is not None and name in values:
+                return values[name]
+            value = self._data.get(name, defaults[name])
+            converter = converters[name]
+            if converter is not None and value is not None:
+                value = converter(value)
+                if values is None:
+                    self._values = values = {}
+                values[name] = value
+            return value
+        method = _own_attribute(self._model, name)
+        if isinstance(method, FunctionType):
+            return MethodType(method, self)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        if name in LazyModel.__slots__:
+            return object.__setattr__(self, name, value)
+        if name not in self._model.__fields__:
+            raise AttributeError(f"'{type(self).__name__}' object has no field '{name}'")
+        if self._values is None:
+            self._values = {}
+        self._values[name] = value
+
+    @property
+    def __fields__(self) -> dict:
+        return self._model.__fields__
+
+    @property
+    def __fields_set__(self) -> set:
+        return compiled_plan(self._model)[2].intersection(self._data).union(self._values or ())
+
+    def materialize(self, *, validate: bool = False):
+        """
+        Builds regular model from wrapped data
+
+        :param bool validate: If set to True, data is validated by pydantic
+        :returns: Instance of wrapped model
+        """
+        with lazy_construction(False), trusted_construction(not validate):
+            model = self._model(**self._data)
+        for name, value in (self._values or {}).items():
+            object.__setattr__(model, name, value)
+        return model
+
+    def copy(self, *, update: Optional[dict] = None):
+        """
+        Same as copy() of wrapped model, copy shares wrapped data and `update` values are set on it without validation
+        """
+        instance = type(self).wrap(self._data)
+        if self._values or update:
+            instance._values = dict(self._values or ()) | dict(update or ())
+        return instance
+
+    def dict(self, **kwargs) -> dict:
+        """Same as dict() of wrapped model"""
+        return self.materialize().dict(**kwargs)
+
+    def __eq__(self, other):
+        method = _own_attribute(self._model, '__eq__')
+        return method(self, other) if method is not None else NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        method = _own_attribute(self._model, '__str__')
+        return method(self) if method is not None else repr(self)
+
+    def __repr__(self):
+        method = _own_attribute(self._model, '__repr__')
+        return method(self) if method is not None else f"{type(self).__name__}({self._data!r})"
+
+
+def _own_attribute(model: type, name: str):
+    # attributes defined by models of this package, pydantic internals don't work with wrapped data
+    for klass in model.__mro__:
+        if klass is BaseModel:
+            return None
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+    return None
+
+
+def lazy_model(model: type) -> type:
+    """
+    Returns (cached) LazyModel subclass wrapping provided model
+
+    :param model: Model class, f.e. AnimeObject
+    """
+    lazy_class = _lazy_classes.get(model)
+    if lazy_class is None:
+        lazy_class = _lazy_classes[model] = type(f'Lazy{model.__name__}', (LazyModel,), {'__slots__': (), '_model': model})
+    return lazy_class
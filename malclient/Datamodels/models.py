@@ -7,24 +7,60 @@ from pydantic import BaseModel, HttpUrl
 from .enums import *
 from .pagination import PagedResult
 from .fields import Fields
+from .construct import is_trusted, is_lazy, construct_into
+from .lazy import lazy_model
+from .interning import intern_registry
 from ..exceptions import NotFound
 
 __all__ = ['Asset', 'Node', 'AnimeSeason', 'Genre', 'Studio', 'Broadcast', 'Statistics', 'Relation', 'Recommendation',
            'MyMangaListStatus', 'MyAnimeListStatus', 'AnimeObject', 'MangaObject', 'UserAnimeStatistics', "User",
            'ForumTopicDetail', 'ForumTopic', 'ForumCategory', 'ForumAuthor', 'ForumPoll', 'ForumPollOption',
-           'ForumPost', 'ForumBoard', 'ForumSubboard', 'Character', 'Person']
+           'ForumPost', 'ForumBoard', 'ForumSubboard', 'Character', 'Person', 'LazyAnimeObject', 'LazyMangaObject']
 
 
 class MALBaseModel(BaseModel):
     """
-    Helper model class used to generate all models used by this API
+    Helper model class used to generate all models used by this API,
+    inside `trusted_construction` context models are built without validation
+    and inside `lazy_construction` context lazy wrappers of raw data are returned instead
     """
 
     class Config:
         arbitrary_types_allowed = True
 
+    def __new__(cls, *args, **data):
+        if data and is_lazy():
+            return lazy_model(cls).wrap(data)
+        return super().__new__(cls)
 
-class Asset(MALBaseModel):
+    def __init__(__pydantic_self__, **data):
+        if is_trusted():
+            construct_into(__pydantic_self__, data)
+        else:
+            super().__init__(**data)
+
+
+class InternedModel(MALBaseModel):
+    """
+    Helper model class of small objects repeated across many entries (genres, studios, ...),
+    when they are nested in other models identical objects are shared instances (see InternRegistry),
+    so they are immutable
+    """
+    __slots__ = ('__weakref__',)
+    _interned = True
+
+    class Config:
+        allow_mutation = False
+        copy_on_model_validation = 'none'
+
+    @classmethod
+    def validate(cls, value):
+        if type(value) is dict:
+            return intern_registry.intern(cls, value, lambda data: cls(**data))
+        return super().validate(value)
+
+
+class Asset(InternedModel):
     """
 
     Asset object, commonly representing an image with two resolutions
@@ -51,7 +87,7 @@ class Node(MALBaseModel):
         return self.title
 
     def __eq__(self, other):
-        return id == other.id
+        return self.id == other.id
 
 
 class AnimeSeason(MALBaseModel):
@@ -70,7 +106,7 @@ class AnimeSeason(MALBaseModel):
         return self.year == other.year and self.season == other.season
 
 
-class Genre(BaseModel):
+class Genre(InternedModel):
     """
 
     Anime or Manga Genre
@@ -83,10 +119,10 @@ class Genre(BaseModel):
         return self.name
 
     def __eq__(self, other):
-        return id == other.id
+        return self.id == other.id
 
 
-class Studio(MALBaseModel):
+class Studio(InternedModel):
     """
 
     Representation of anime studio
@@ -125,9 +161,14 @@ class Statistics(MALBaseModel):
     plan_to_watch: int
 
     def __init__(self, **data):
+        super().__init__(**self._prepare(data))
+
+    @classmethod
+    def _prepare(cls, data: dict) -> dict:
+        # API nests counters under status key
         if 'status' in data.keys():
             data = data['status'] | {'num_list_users': data['num_list_users']}
-        super().__init__(**data)
+        return data
 
 
 class Relation(MALBaseModel):
@@ -205,7 +246,7 @@ class Video(MALBaseModel):
     thumbnail: HttpUrl
 
 
-class Magazine(MALBaseModel):
+class Magazine(InternedModel):
     id: int
     name: str
 
@@ -221,8 +262,14 @@ class PersonBase(MALBaseModel):
     last_name: str
 
 
-class MangaAuthor(MALBaseModel):
-    node: PersonBase
+class AuthorNode(InternedModel, PersonBase):
+    """
+    Author of manga as nested in MangaAuthor, unlike Person it is shared between entries and immutable
+    """
+
+
+class MangaAuthor(InternedModel):
+    node: AuthorNode
     role: str
 
 
@@ -398,12 +445,10 @@ class ForumTopicDetail(PagedResult):
         :returns: New Forum Topic Detail object containing next page of posts
         :rtype: FormTopicDetail
         """
-        try:
-            assert self._data['next'] is not None
-            result = client._api_handler.call(uri=self._data['next'].replace(client._base_url, ''))
-        except AssertionError:
+        if self._data['next'] is None:
             raise NotFound("There is no next page for this query")
-        return ForumTopicDetail(paging_data=result['paging'], **result['data'])
+        return client._call(uri=self._data['next'].replace(client._base_url, ''),
+                            build=lambda result: ForumTopicDetail(paging_data=result['paging'], **result['data']))
 
     def fetch_previous_page(self, client):
         """
@@ -413,12 +458,10 @@ class ForumTopicDetail(PagedResult):
         :returns: New Forum Topic Detail object containing next page of posts
         :rtype: FormTopicDetail
         """
-        try:
-            assert self._data['previous'] is not None
-            result = client._api_handler.call(uri=self._data['previous'].replace(client._base_url, ''))
-        except AssertionError:
-            raise NotFound("There is no next page for this query")
-        return ForumTopicDetail(paging_data=result['paging'], **result['data'])
+        if self._data['previous'] is None:
+            raise NotFound("There is no previous page for this query")
+        return client._call(uri=self._data['previous'].replace(client._base_url, ''),
+                            build=lambda result: ForumTopicDetail(paging_data=result['paging'], **result['data']))
 
     def __repr__(self):
         return self.title + ", " + repr(self.posts) + ", " + repr(self.polls)
@@ -508,4 +551,8 @@ class Person(PersonBase):
     num_favorites: Optional[int]
     main_picture: Optional[Asset]
     birthday: Optional[datetime.date]
-    more: Optional[str]
\ No newline at end of file
+    more: Optional[str]
+
+
+LazyAnimeObject = lazy_model(AnimeObject)
+LazyMangaObject = lazy_model(MangaObject)
@@ -1,5 +1,13 @@
+import asyncio
+import queue
+import re
+import threading
+from typing import Iterator, AsyncIterator, Optional, Iterable
+
 from malclient import exceptions
 
+_END = object()
+
 
 class PagedResult(list):
     """
@@ -9,23 +17,239 @@ class PagedResult(list):
     """
     def __init__(self, seq, page_link: dict):
         self._payload = page_link
-        self._base_class = type(seq[0])
+        self._base_class = type(seq[0]) if seq else None
         self._next = page_link.get("next", None)
         self._previous = page_link.get("previous", None)
         super().__init__(seq)
 
+    @property
+    def has_next_page(self) -> bool:
+        return self._next is not None
+
+    @property
+    def has_previous_page(self) -> bool:
+        return self._previous is not None
+
     def fetch_next_page(self, client):
-        try:
-            assert self._next is not None
-            result = client._api_handler.call(uri=self._next.replace(client._base_url, ''))
-        except AssertionError:
+        if self._next is None:
             raise exceptions.NotFound("There is no next page for this query")
-        return PagedResult([self._base_class(**temp_object) for temp_object in result["data"]], result["paging"])
+        return client._call(uri=self._next.replace(client._base_url, ''), build=self._build_page)
 
     def fetch_previous_page(self, client):
-        try:
-            assert self._previous is not None
-            result = client._api_handler.call(uri=self._previous.replace(client._base_url, ''))
-        except AssertionError:
+        if self._previous is None:
             raise exceptions.NotFound("There is no previous page for this query")
-        return PagedResult([self._base_class(**temp_object) for temp_object in result["data"]], result["paging"])
+        return client._call(uri=self._previous.replace(client._base_url, ''), build=self._build_page)
+
+    def _build_page(self, result):
+        from .records import from_entry
+        page = PagedResult([from_entry(self._base_class, temp_object) for temp_object in result["data"]], result["paging"])
+        page._base_class = self._base_class
+        return page
+
+    def iter_all(self, client, *, max_items: Optional[int] = None, prefetch: int = 1) -> Iterator:
+        """
+        Lazily iterates over entries of this and all following pages, next pages are fetched in background thread
+        while entries of current one are processed, only fetched pages are held in memory
+
+        :param Client client: Client with which next pages will be fetched
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead, 0 fetches next page only after current one is exhausted
+        :returns: Iterator over entries
+        :rtype: Iterator
+        """
+        pages = self._iter_pages(client, max_items, prefetch)
+        count = 0
+        try:
+            for page in pages:
+                for entry in page:
+                    if max_items is not None and count >= max_items:
+                        return
+                    count += 1
+                    yield entry
+        finally:
+            pages.close()
+
+    async def aiter_all(self, client, *, max_items: Optional[int] = None, prefetch: int = 1) -> AsyncIterator:
+        """
+        Asyncio counterpart of iter_all, next pages are fetched by background task, to be used with AsyncClient
+        """
+        pages = self._aiter_pages(client, max_items, prefetch)
+        count = 0
+        try:
+            async for page in pages:
+                for entry in page:
+                    if max_items is not None and count >= max_items:
+                        return
+                    count += 1
+                    yield entry
+        finally:
+            await pages.aclose()
+
+    def _wants_next(self, fetched: int, max_items: Optional[int]) -> bool:
+        return self._next is not None and (max_items is None or fetched < max_items)
+
+    def _iter_pages(self, client, max_items: Optional[int], prefetch: int):
+        page, fetched = self, len(self)
+        if prefetch <= 0:
+            yield self
+            while page._wants_next(fetched, max_items):
+                page = page.fetch_next_page(client)
+                fetched += len(page)
+                yield page
+            return
+
+        buffer, stopped = queue.Queue(maxsize=prefetch), threading.Event()
+
+        def put(item):
+            # waits for free slot in buffer, unless consumer already stopped iterating
+            while not stopped.is_set():
+                try:
+                    return buffer.put(item, timeout=0.1)
+                except queue.Full:
+                    pass
+
+        def produce(page, fetched):
+            try:
+                while page._wants_next(fetched, max_items) and not stopped.is_set():
+                    page = page.fetch_next_page(client)
+                    fetched += len(page)
+                    put(page)
+            except Exception as e:
+                put(e)
+            put(_END)
+
+        # prefetch starts right away, so next page is fetched while entries of first one are processed
+        threading.Thread(target=produce, args=(page, fetched), daemon=True).start()
+        try:
+            yield self
+            while (item := buffer.get()) is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+
+    async def _aiter_pages(self, client, max_items: Optional[int], prefetch: int):
+        page, fetched = self, len(self)
+        if prefetch <= 0:
+            yield self
+            while page._wants_next(fetched, max_items):
+                page = await page.fetch_next_page(client)
+                fetched += len(page)
+                yield page
+            return
+
+        buffer = asyncio.Queue(maxsize=prefetch)
+
+        async def produce(page, fetched):
+            try:
+                while page._wants_next(fetched, max_items):
+                    page = await page.fetch_next_page(client)
+                    fetched += len(page)
+                    await buffer.put(page)
+            except Exception as e:
+                await buffer.put(e)
+            await buffer.put(_END)
+
+        producer = asyncio.ensure_future(produce(page, fetched))
+        try:
+            yield self
+            while (item := await buffer.get()) is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    def populate_all(self, client, *, fields=None, concurrency: int = 8, media: str = None):
+        """
+        Replaces every entry with fully populated object, entries are fetched concurrently instead of calling
+        `populate` one by one; ids which are already cached are served from cache of client without sending requests
+
+        :param Client client: Client with which entries will be fetched
+        :param Fields fields: [Optional] Fields fetched for every entry, full details by default
+        :param int concurrency: Maximum number of requests in flight
+        :param str media: [Optional] Either 'anime' or 'manga', inferred from entries or paging links if omitted
+        :returns: New PagedResult with entries in the same order and the same paging links,
+            entries that couldn't be fetched (f.e. removed from MAL) are left unchanged
+        :rtype: PagedResult
+        """
+        media = media or self._media()
+        if media == 'anime':
+            function = client.get_anime_details if fields is None else lambda entry_id: client.get_anime_fields(entry_id, fields)
+        elif media == 'manga':
+            function = client.get_manga_details if fields is None else lambda entry_id: client.get_manga_fields(entry_id, fields)
+        else:
+            raise ValueError("media has to be either 'anime' or 'manga'")
+        ids = list(dict.fromkeys(entry.id for entry in self))
+        return client._fetch_many(function, ids, concurrency=concurrency, build=lambda results: self._populated(dict(zip(ids, results))))
+
+    def to_columns(self, columns: Optional[Iterable[str]] = None):
+        """
+        Collects values of entries as columns, f.e. {'id': [1, 5], 'mean': [8.7, 8.2]}
+
+        :param columns: [Optional] Names of columns, nested values are accessed with dots, f.e. 'list_status.score',
+            ANIME_COLUMNS/MANGA_COLUMNS (with list status columns for user lists) are used if omitted
+        :rtype: Columns
+        """
+        from .columns import to_columns
+        return to_columns(self, columns or self._default_columns())
+
+    def to_numpy(self, columns: Optional[Iterable[str]] = None, **kwargs):
+        """
+        Same as to_columns, but values are converted to typed numpy arrays (see malclient.to_numpy),
+        requires optional dependency numpy
+
+        :param columns: [Optional] Names of columns, see to_columns
+        :param kwargs: Any other parameters accepted by malclient.to_numpy
+        :rtype: Columns
+        """
+        from .columns import to_numpy
+        return to_numpy(self, columns or self._default_columns(), **kwargs)
+
+    def _default_columns(self) -> tuple:
+        from .columns import ANIME_COLUMNS, MANGA_COLUMNS, ANIME_LIST_COLUMNS, MANGA_LIST_COLUMNS
+        try:
+            media = self._media()
+        except ValueError:
+            return ('id',)
+        listing = bool(self) and getattr(self[0], 'list_status', None) is not None
+        if media == 'anime':
+            return ANIME_LIST_COLUMNS if listing else ANIME_COLUMNS
+        return MANGA_LIST_COLUMNS if listing else MANGA_COLUMNS
+
+    def _media(self):
+        from .models import AnimeObject, MangaObject
+        base_class = getattr(self._base_class, '_model', None) or self._base_class  # lazy wrappers
+        if base_class is not None and issubclass(base_class, AnimeObject):
+            return 'anime'
+        if base_class is not None and issubclass(base_class, MangaObject):
+            return 'manga'
+        # plain nodes don't know their type, but paging links point to endpoint they were fetched from
+        match = re.search(r'/v2/(?:users/[^/]+/)?(anime|manga)', self._next or self._previous or '')
+        if match is None:
+            raise ValueError("Can't infer media type of entries, pass media='anime' or media='manga'")
+        return match.group(1)
+
+    def _populated(self, populated: dict):
+        entries = []
+        for entry in self:
+            details = populated.get(entry.id)
+            if details is None:
+                entries.append(entry)
+                continue
+            # keep fields coming from listing endpoint (f.e. ranking, list_status) which details endpoint doesn't return
+            extra = {name: value for name, value in _listing_fields(entry).items()
+                     if name in details.__fields__ and getattr(details, name) is None}
+            entries.append(details.copy(update=extra) if extra else details)
+        return PagedResult(entries, self._payload)
+
+
+def _listing_fields(entry) -> dict:
+    """
+    Fields set on entry of page, nested records (f.e. list_status of AnimeRecord) are converted to models
+    """
+    if isinstance(entry, tuple) and hasattr(entry, '_fields'):  # records don't track set fields, missing ones are None
+        return {name: value.to_model() if hasattr(value, 'to_model') else value
+                for name, value in zip(entry._fields, entry) if value is not None}
+    return {name: getattr(entry, name) for name in getattr(entry, '__fields_set__', ())}
@@ -0,0 +1,46 @@
+import threading
+
+from pydantic import create_model
+
+from .fields import FieldsBase, parse_fields_payload
+from .models import MALBaseModel
+
+__all__ = ['project_model']
+
+_projections: dict[tuple[type, FieldsBase], type] = {}
+_lock = threading.Lock()
+
+
+def project_model(model: type, fields: FieldsBase) -> type:
+    """
+    Returns (cached) narrow model containing only fields requested by fields object (and id),
+    with the same types as in full model, other keys of response are skipped without any conversion
+
+    Projected models are regular models of this package, so they can be built in trusted and lazy mode as well,
+    nested fields (f.e. my_list_status) keep types of full model
+
+    :param model: Full model class, f.e. AnimeObject
+    :param FieldsBase fields: Fields requested from API
+    :returns: Model class, f.e. `project_model(AnimeObject, Fields.from_list(['id', 'mean']))(**data).mean`
+    """
+    key = (model, fields)
+    projected = _projections.get(key)
+    if projected is None:
+        with _lock:
+            projected = _projections.get(key)
+            if projected is None:
+                projected = _projections[key] = _create(model, fields)
+    return projected
+
+
+def _create(model: type, fields: FieldsBase) -> type:
+    names = ['id', *parse_fields_payload(fields.to_payload())]
+    definitions = {}
+    for name in dict.fromkeys(names):
+        field = model.__fields__.get(name)
+        if field is None:  # f.e. fields which aren't described by model
+            continue
+        definitions[name] = (field.annotation, ... if field.required else field.default)
+    projected = create_model(f'Projected{model.__name__}', __base__=MALBaseModel, __module__=model.__module__, **definitions)
+    projected.__doc__ = f"{model.__name__} projected to fields: {', '.join(definitions)}"
+    return projected
@@ -0,0 +1,257 @@
+import datetime
+import sys
+from typing import NamedTuple, Optional, Union
+
+from .construct import _fallback, _parse_date, _parse_datetime
+from .enums import AnimeType, AnimeStatus, MangaType, MangaStatus, Nsfw
+from .models import Asset, Node, RankingObject, MyAnimeListStatus, MyMangaListStatus, AnimeObject, MangaObject
+
+__all__ = ['AssetRecord', 'NodeRecord', 'RankingRecord', 'AnimeListStatusRecord', 'MangaListStatusRecord',
+           'AnimeRecord', 'MangaRecord']
+
+
+# Records are immutable named tuples (no per-instance __dict__), built straight from response data without validation.
+# Categorical values are stored as shared enum members (or interned strings) and dates are parsed as in models,
+# everything else is stored as returned by API.
+
+def _from_data(cls, data: dict):
+    """
+    Builds record from flattened response data, keys which aren't fields of record are skipped
+
+    :param dict data: Flattened response data of single entry
+    """
+    nested, converters = cls._nested, cls._converters
+    values = []
+    for name in cls._fields:
+        value = data.get(name)
+        if value is not None:
+            if name in nested:
+                value = nested[name].from_data(value) if type(value) is dict else nested[name].from_model(value)
+            elif name in converters:
+                value = converters[name](value)
+        values.append(value)
+    return cls._make(values)
+
+
+def _from_model(cls, model):
+    """
+    Builds record from pydantic model (or already built record)
+
+    :param model: Instance of corresponding model
+    """
+    if isinstance(model, cls):
+        return model
+    return cls.from_data({name: getattr(model, name, None) for name in cls._fields})
+
+
+def _to_model(self):
+    """
+    Converts record into corresponding pydantic model
+
+    :returns: Validated model instance
+    """
+    values = {}
+    for name, value in zip(self._fields, self):
+        if value is not None:
+            values[name] = value.to_model() if hasattr(value, 'to_model') else value
+    return self._model(**values)
+
+
+def from_entry(cls: type, data: dict):
+    """
+    Builds single entry of page, records are built from data directly, models are initialised with it
+
+    :param cls: Record or model class
+    :param dict data: Flattened response data of single entry
+    """
+    from_data = getattr(cls, 'from_data', None)
+    return from_data(data) if from_data is not None else cls(**data)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _categorical(enum):
+    # unknown members are kept as (interned) strings
+    def convert(value):
+        try:
+            return enum(value)
+        except ValueError:
+            return _intern(value)
+    return convert
+
+
+def _tuple(value):
+    return tuple(value) if type(value) is list else value
+
+
+_date = _fallback(_parse_date)
+_datetime = _fallback(_parse_datetime)
+
+
+class AssetRecord(NamedTuple):
+    medium: str
+    large: Optional[str] = None
+
+    _model = Asset
+    _nested = {}
+    _converters = {}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+    def __str__(self):
+        return self.medium
+
+
+class RankingRecord(NamedTuple):
+    rank: int
+    previous_rank: Optional[int] = None
+
+    _model = RankingObject
+    _nested = {}
+    _converters = {}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+
+class NodeRecord(NamedTuple):
+    """
+    Compact counterpart of Node
+    """
+    id: int
+    title: str
+    main_picture: Optional[AssetRecord] = None
+
+    _model = Node
+    _nested = {'main_picture': AssetRecord}
+    _converters = {}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+    def __str__(self):
+        return self.title
+
+
+class AnimeListStatusRecord(NamedTuple):
+    """
+    Compact counterpart of MyAnimeListStatus
+    """
+    status: Optional[str] = None
+    score: Optional[int] = None
+    num_episodes_watched: Optional[int] = None
+    is_rewatching: Optional[bool] = None
+    updated_at: Union[datetime.datetime, str, None] = None
+    start_date: Union[datetime.date, str, None] = None
+    finish_date: Union[datetime.date, str, None] = None
+    priority: Optional[int] = None
+    num_times_rewatched: Optional[int] = None
+    rewatch_value: Optional[int] = None
+    tags: Optional[tuple] = None
+    comments: Optional[str] = None
+
+    _model = MyAnimeListStatus
+    _nested = {}
+    _converters = {'status': _intern, 'updated_at': _datetime, 'start_date': _date, 'finish_date': _date, 'tags': _tuple}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+
+class MangaListStatusRecord(NamedTuple):
+    """
+    Compact counterpart of MyMangaListStatus
+    """
+    status: Optional[str] = None
+    score: Optional[int] = None
+    num_volumes_read: Optional[int] = None
+    num_chapters_read: Optional[int] = None
+    is_rereading: Optional[bool] = None
+    updated_at: Union[datetime.datetime, str, None] = None
+    start_date: Union[datetime.date, str, None] = None
+    finish_date: Union[datetime.date, str, None] = None
+    priority: Optional[int] = None
+    num_times_reread: Optional[int] = None
+    reread_value: Optional[int] = None
+    tags: Optional[tuple] = None
+    comments: Optional[str] = None
+
+    _model = MyMangaListStatus
+    _nested = {}
+    _converters = {'status': _intern, 'updated_at': _datetime, 'start_date': _date, 'finish_date': _date, 'tags': _tuple}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+
+class AnimeRecord(NamedTuple):
+    """
+    Compact counterpart of AnimeObject holding fields commonly used in lists and rankings,
+    other fields of response are skipped
+    """
+    id: int
+    title: str
+    main_picture: Optional[AssetRecord] = None
+    start_date: Union[datetime.date, str, None] = None
+    mean: Optional[float] = None
+    rank: Optional[int] = None
+    popularity: Optional[int] = None
+    num_list_users: Optional[int] = None
+    nsfw: Union[Nsfw, str, None] = None
+    media_type: Union[AnimeType, str, None] = None
+    status: Union[AnimeStatus, str, None] = None
+    num_episodes: Optional[int] = None
+    average_episode_duration: Optional[int] = None
+    my_list_status: Optional[AnimeListStatusRecord] = None
+    list_status: Optional[AnimeListStatusRecord] = None
+    ranking: Optional[RankingRecord] = None
+
+    _model = AnimeObject
+    _nested = {'main_picture': AssetRecord, 'my_list_status': AnimeListStatusRecord,
+               'list_status': AnimeListStatusRecord, 'ranking': RankingRecord}
+    _converters = {'start_date': _date, 'nsfw': _categorical(Nsfw), 'media_type': _categorical(AnimeType),
+                   'status': _categorical(AnimeStatus)}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+    def __str__(self):
+        return self.title
+
+
+class MangaRecord(NamedTuple):
+    """
+    Compact counterpart of MangaObject holding fields commonly used in lists and rankings,
+    other fields of response are skipped
+    """
+    id: int
+    title: str
+    main_picture: Optional[AssetRecord] = None
+    start_date: Union[datetime.date, str, None] = None
+    mean: Optional[float] = None
+    rank: Optional[int] = None
+    popularity: Optional[int] = None
+    num_list_users: Optional[int] = None
+    nsfw: Union[Nsfw, str, None] = None
+    media_type: Union[MangaType, str, None] = None
+    status: Union[MangaStatus, str, None] = None
+    num_volumes: Optional[int] = None
+    num_chapters: Optional[int] = None
+    my_list_status: Optional[MangaListStatusRecord] = None
+    list_status: Optional[MangaListStatusRecord] = None
+    ranking: Optional[RankingRecord] = None
+
+    _model = MangaObject
+    _nested = {'main_picture': AssetRecord, 'my_list_status': MangaListStatusRecord,
+               'list_status': MangaListStatusRecord, 'ranking': RankingRecord}
+    _converters = {'start_date': _date, 'nsfw': _categorical(Nsfw), 'media_type': _categorical(MangaType),
+                   'status': _categorical(MangaStatus)}
+    from_data = classmethod(_from_data)
+    from_model = classmethod(_from_model)
+    to_model = _to_model
+
+    def __str__(self):
+        return self.title
@@ -1,3 +1,11 @@
 from .client import *
 from .Datamodels import *
 from .exceptions import *
+from .rate_limit import *
+from .cache import *
+from .batch import *
+from .sync import *
+from .mirror import *
+from .write_behind import *
+from .auth import *
+from .pool import *
@@ -1,8 +1,10 @@
 from __future__ import annotations
-from typing import Optional, Literal, Union
+from typing import Optional, Literal, Union, Iterable, Iterator
 
-from .Datamodels import Fields, AnimeObject, Node, Season, PagedResult, AnimeRankingType, SeasonalAnimeSorting, Character, CharacterFields
-from .exceptions import MainAuthRequiredError
+from .Datamodels import Fields, AnimeObject, Node, AnimeRecord, NodeRecord, Season, PagedResult, AnimeRankingType, SeasonalAnimeSorting, Character, CharacterFields, project_model
+from .exceptions import MainAuthRequiredError, NotFound, Forbidden
+from .Datamodels.records import from_entry
+from .batch import BatchResult, offset_windows, stitch_pages
 
 __all__ = ["Anime"]
 
@@ -11,38 +13,58 @@ class Anime:
     def __init__(self):
         return
 
-    def get_anime_details(self, anime_id: int) -> AnimeObject:
+    def get_anime_details(self, anime_id: int, *, validate: Optional[bool] = None) -> AnimeObject:
         """
 
         Get full info about anime with provided id
 
         :param int anime_id: id on https://myanimelist.net
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :returns: AnimeObject for requested id
         :rtype: AnimeObject
         """
         uri = f'anime/{str(anime_id)}'
         params = {'fields': Fields.anime().to_payload()}
-        data = self._api_handler.call(uri, params=params)
-        return AnimeObject(**data)
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: AnimeObject(**data))
 
-    def get_anime_fields(self, anime_id: int, fields: Fields) -> AnimeObject:
+    def get_anime_fields(self, anime_id: int, fields: Fields, *, validate: Optional[bool] = None, project: bool = False) -> AnimeObject:
         """
 
         Get specific fields from MAL anime entry with provided id
 
         :param int anime_id: id on https://myanimelist.net
         :param Fields fields: Fields returned alongside results
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool project: If set to True, narrow model containing only requested fields is returned (see project_model),
+            model class is generated once per fields combination
 
         :returns: AnimeObject for requested id
         :rtype: AnimeObject
         """
         uri = f'anime/{anime_id}'
         params = {'fields': fields.to_payload()}
-        data = self._api_handler.call(uri, params=params)
-        return AnimeObject(**data)
+        r_class = project_model(AnimeObject, fields) if project else AnimeObject
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: r_class(**data))
 
-    def search_anime(self, keyword: str, *, limit: int = 20, nsfw: Optional[bool] = None, fields: Fields = Fields.node()) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+    def get_anime_details_many(self, anime_ids: Iterable[int], *, fields: Optional[Fields] = None, concurrency: int = 8,
+                               as_completed: bool = False, ignore_errors: tuple = (NotFound, Forbidden)) -> BatchResult[AnimeObject]:
+        """
+        Get info about multiple anime, requests are executed concurrently since API has no batch endpoint
+
+        :param Iterable[int] anime_ids: ids on https://myanimelist.net
+        :param Fields fields: [Optional] Fields returned alongside results, full anime fields by default
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :param bool as_completed: If set to True, iterator of (anime_id, result) pairs is returned in order of completion
+        :param tuple ignore_errors: Exception types collected per id (available in `errors` of result) instead of aborting whole batch
+
+        :returns: AnimeObjects in order of anime_ids, None for entries that failed
+        :rtype: BatchResult[AnimeObject]
+        """
+        function = self.get_anime_details if fields is None else lambda anime_id: self.get_anime_fields(anime_id, fields)
+        return self._fetch_many(function, anime_ids, concurrency=concurrency, ignore_errors=ignore_errors, as_completed=as_completed)
+
+    def search_anime(self, keyword: str, *, limit: int = 20, nsfw: Optional[bool] = None, fields: Fields = Fields.node(), validate: Optional[bool] = None, records: bool = False) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
         """
         Lookup anime with keyword phrase on https://myanimelist.net
 
@@ -50,6 +72,8 @@ class Anime:
         :param Fields fields: Fields returned alongside results
         :param int limit: number of queries returned
         :param bool nsfw: boolean enabling/disabling nsfw filter
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool records: If set to True, entries are returned as compact immutable records (NodeRecord or AnimeRecord) instead of models
 
         :returns: list of lookup results with pagination support
         :rtype: PagedResult
@@ -63,11 +87,28 @@ class Anime:
             'fields': fields.to_payload(),
             'nsfw': nsfw
         }
-        temp = self._api_handler.call(uri=uri, params=params)
-        r_class = Node if fields == Fields.node() else AnimeObject
-        return PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging'])
+        if records:
+            r_class = NodeRecord if fields == Fields.node() else AnimeRecord
+        else:
+            r_class = Node if fields == Fields.node() else AnimeObject
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([from_entry(r_class, anime) for anime in temp["data"]], temp['paging']))
+
+    def iter_search_anime(self, keyword: str, *, max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Iterator[Union[Node, AnimeObject]]:
+        """
+        Iterates over all search results, following pages are fetched as iteration goes
 
-    def get_anime_ranking(self, *, ranking_type: Union[AnimeRankingType, str] = AnimeRankingType.ALL, fields: Fields = Fields.node(), limit: int = 50, offset: int = 0) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+        :param str keyword: string to look by
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by search_anime, `limit` sets page size
+        :returns: Lazy iterator over entries (async iterator for AsyncClient)
+        :rtype: Iterator[AnimeObject]
+        """
+        kwargs.setdefault('limit', 100)
+        return self._iterate(lambda: self.search_anime(keyword, **kwargs), max_items=max_items, prefetch=prefetch)
+
+    def get_anime_ranking(self, *, ranking_type: Union[AnimeRankingType, str] = AnimeRankingType.ALL, fields: Fields = Fields.node(), limit: int = 50, offset: int = 0, validate: Optional[bool] = None, records: bool = False) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
         """
         Gets list of anime from MyAnimeList rankings
 
@@ -75,6 +116,8 @@ class Anime:
         :param Fields fields: Fields returned alongside results
         :param int limit: [Optional] Number of ranking entries to fetch, 50 by default
         :param int offset: [Optional] Position from which ranking fetch will start
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool records: If set to True, entries are returned as compact immutable records (NodeRecord or AnimeRecord) instead of models
 
         :return: List of entries fetched from MyAnimeList with paging support
         :rtype: PagedResult
@@ -91,13 +134,47 @@ class Anime:
             "limit": limit,
             'offset': offset,
         }
-        temp = self._api_handler.call(uri=uri, params=params)
-        r_class = Node if fields == Fields.node() else AnimeObject
-        return PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging'])
+        if records:
+            r_class = NodeRecord if fields == Fields.node() else AnimeRecord
+        else:
+            r_class = Node if fields == Fields.node() else AnimeObject
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([from_entry(r_class, anime) for anime in temp["data"]], temp['paging']))
+
+    def iter_anime_ranking(self, *, max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Iterator[Union[Node, AnimeObject]]:
+        """
+        Iterates over whole ranking, following pages are fetched as iteration goes
+
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_anime_ranking, `limit` sets page size
+        :returns: Lazy iterator over entries (async iterator for AsyncClient)
+        :rtype: Iterator[AnimeObject]
+        """
+        kwargs.setdefault('limit', 500)
+        return self._iterate(lambda: self.get_anime_ranking(**kwargs), max_items=max_items, prefetch=prefetch)
+
+    def crawl_anime_ranking(self, total: int, *, ranking_type: Union[AnimeRankingType, str] = AnimeRankingType.ALL, fields: Fields = Fields.node(),
+                            page_size: int = 500, concurrency: int = 4) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+        """
+        Fetches first `total` entries of ranking, instead of following paging links one by one
+        all pages are requested concurrently with precomputed offsets
+
+        :param int total: Number of ranking entries to fetch
+        :param AnimeRankingType ranking_type: [Optional] Name of ranking from which you want list to be fetched, default to Top Anime
+        :param Fields fields: Fields returned alongside results
+        :param int page_size: Number of entries fetched by single request, 500 (maximum allowed by API) by default
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :returns: Entries in listing order, without duplicates if listing changed during crawl (see CrawlResult.shifted)
+        :rtype: CrawlResult
+        """
+        windows = offset_windows(total, page_size)
+        return self._fetch_many(lambda window: self.get_anime_ranking(ranking_type=ranking_type, fields=fields, offset=window[0], limit=window[1]),
+                                windows, concurrency=concurrency, ignore_errors=(NotFound,), build=lambda pages: stitch_pages(pages, windows))
 
     SeasonT = Union[Season, Literal['winter', 'spring', 'summer', 'autumn']]
 
-    def get_seasonal_anime(self, season: SeasonT, year: int, *, sort: Union[SeasonalAnimeSorting, str] = SeasonalAnimeSorting.SCORE, fields: Fields = Fields.anime(), limit: int = 50, offset: int = 0, nsfw: bool = None) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+    def get_seasonal_anime(self, season: SeasonT, year: int, *, sort: Union[SeasonalAnimeSorting, str] = SeasonalAnimeSorting.SCORE, fields: Fields = Fields.anime(), limit: int = 50, offset: int = 0, nsfw: bool = None, validate: Optional[bool] = None) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
         """
         Gets list of anime from specified season
 
@@ -108,6 +185,7 @@ class Anime:
         :param int limit: Number of series to fetch, 50 by default
         :param int offset: Position from which search results will be presented
         :param bool nsfw: If set to True results with nsfw grade 'gray' and 'black' will also be fetched, if omitted it will be inherited from Client class
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :return: List of entries fetched from MyAnimeList with paging support
         :rtype: PagedResult
@@ -133,11 +211,46 @@ class Anime:
             'offset': offset,
             "nsfw": nsfw if nsfw is not None else self.nsfw
         }
-        temp = self._api_handler.call(uri=uri, params=params)
         r_class = Node if fields == Fields.node() else AnimeObject
-        return PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging'])
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging']))
 
-    def get_suggested_anime(self, *, fields: Fields = Fields.node(), limit: int = 20, offset: int = 0, nsfw: bool = None) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+    def iter_seasonal_anime(self, season: SeasonT, year: int, *, max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Iterator[Union[Node, AnimeObject]]:
+        """
+        Iterates over all anime from specified season, following pages are fetched as iteration goes
+
+        :param SeasonT season: Season of year to fetch
+        :param int year: Year to fetch
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_seasonal_anime, `limit` sets page size
+        :returns: Lazy iterator over entries (async iterator for AsyncClient)
+        :rtype: Iterator[AnimeObject]
+        """
+        kwargs.setdefault('limit', 500)
+        return self._iterate(lambda: self.get_seasonal_anime(season, year, **kwargs), max_items=max_items, prefetch=prefetch)
+
+    def crawl_seasonal_anime(self, season: SeasonT, year: int, total: int, *, sort: Union[SeasonalAnimeSorting, str] = SeasonalAnimeSorting.SCORE,
+                             fields: Fields = Fields.anime(), nsfw: bool = None, page_size: int = 500, concurrency: int = 4) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
+        """
+        Fetches first `total` anime from specified season, all pages are requested concurrently with precomputed offsets
+
+        :param SeasonT season: Season of year to fetch
+        :param int year: Year to fetch
+        :param int total: Number of entries to fetch
+        :param SeasonalAnimeSorting sort: Sorting method for query, default to Score
+        :param Fields fields: Fields returned alongside results
+        :param bool nsfw: If set to True results with nsfw grade 'gray' and 'black' will also be fetched, if omitted it will be inherited from Client class
+        :param int page_size: Number of entries fetched by single request, 500 (maximum allowed by API) by default
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :returns: Entries in listing order, without duplicates if listing changed during crawl (see CrawlResult.shifted)
+        :rtype: CrawlResult
+        """
+        windows = offset_windows(total, page_size)
+        return self._fetch_many(lambda window: self.get_seasonal_anime(season, year, sort=sort, fields=fields, nsfw=nsfw, offset=window[0], limit=window[1]),
+                                windows, concurrency=concurrency, ignore_errors=(NotFound,), build=lambda pages: stitch_pages(pages, windows))
+
+    def get_suggested_anime(self, *, fields: Fields = Fields.node(), limit: int = 20, offset: int = 0, nsfw: bool = None, validate: Optional[bool] = None) -> Union[PagedResult[Node], PagedResult[AnimeObject]]:
         """
         Gets list of suggested anime suggested for user
 
@@ -145,6 +258,7 @@ class Anime:
         :param int limit: number of queries returned
         :param int offset: Position from which search results will be presented
         :param bool nsfw: If set to True results with nsfw grade 'gray' and 'black' will also be fetched, if omitted it will be inherited from Client class
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :return: List of entries fetched from MyAnimeList with paging support
         :rtype: PagedResult[None]
@@ -157,11 +271,11 @@ class Anime:
                   "fields": fields.to_payload(),
                   "nsfw": nsfw if nsfw is not None else self.nsfw}
 
-        temp = self._api_handler.call(uri=uri, params=params)
         r_class = Node if fields == Fields.node() else AnimeObject
-        return PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging'])
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([r_class(**anime) for anime in temp["data"]], temp['paging']))
 
-    def get_anime_characters(self, anime_id: int, *, fields: CharacterFields = CharacterFields.all(), limit: int = 500, offset: int = 0) -> PagedResult[Character]:
+    def get_anime_characters(self, anime_id: int, *, fields: CharacterFields = CharacterFields.all(), limit: int = 500, offset: int = 0, validate: Optional[bool] = None) -> PagedResult[Character]:
         """
         Gets list of characters from specified anime
 
@@ -169,6 +283,7 @@ class Anime:
         :param Fields fields: Fields returned alongside results
         :param int limit: number of queries returned
         :param int offset: Position from which search results will be presented
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :return: List of entries fetched from MyAnimeList with paging support
         :rtype: PagedResult[Character]
@@ -178,15 +293,16 @@ class Anime:
                   "offset": offset,
                   "fields": fields.to_payload()}
 
-        temp = self._api_handler.call(uri=uri, params=params)
-        return PagedResult([Character(**character) for character in temp["data"]], temp['paging'])
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([Character(**character) for character in temp["data"]], temp['paging']))
 
-    def get_character_details(self, character_id: int, *, fields: CharacterFields = CharacterFields.all()) -> Character:
+    def get_character_details(self, character_id: int, *, fields: CharacterFields = CharacterFields.all(), validate: Optional[bool] = None) -> Character:
         """
         Gets details of specified character
 
         :param int character_id: Id of character to fetch
         :param Fields fields: Fields returned alongside results
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :return: List of entries fetched from MyAnimeList with paging support
         :rtype: PagedResult[Character]
@@ -194,4 +310,21 @@ class Anime:
         uri = f'characters/{character_id}'
         params = {"fields": fields.to_payload()}
 
-        return Character(**self._api_handler.call(uri=uri, params=params))
\ No newline at end of file
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: Character(**data))
+
+    def get_character_details_many(self, character_ids: Iterable[int], *, fields: CharacterFields = CharacterFields.all(), concurrency: int = 8,
+                                   as_completed: bool = False, ignore_errors: tuple = (NotFound, Forbidden)) -> BatchResult[Character]:
+        """
+        Gets details of multiple characters concurrently
+
+        :param Iterable[int] character_ids: Ids of characters to fetch
+        :param Fields fields: Fields returned alongside results
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :param bool as_completed: If set to True, iterator of (character_id, result) pairs is returned in order of completion
+        :param tuple ignore_errors: Exception types collected per id (available in `errors` of result) instead of aborting whole batch
+
+        :return: Characters in order of character_ids, None for entries that failed
+        :rtype: BatchResult[Character]
+        """
+        return self._fetch_many(lambda character_id: self.get_character_details(character_id, fields=fields), character_ids,
+                                concurrency=concurrency, ignore_errors=ignore_errors, as_completed=as_completed)
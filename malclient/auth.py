@@ -0,0 +1,48 @@
+import time
+from typing import NamedTuple, Optional
+
+__all__ = ['TokenSet']
+
+
+class TokenSet(NamedTuple):
+    """
+    Pair of OAuth2 tokens with time of expiry of access token
+
+    :ivar str access_token: Bearer token sent with requests
+    :ivar str refresh_token: Token used to obtain new pair
+    :ivar float expires_at: Unix time when access token expires, None if unknown
+    """
+    access_token: str
+    refresh_token: Optional[str] = None
+    expires_at: Optional[float] = None
+
+    @classmethod
+    def from_response(cls, response: dict, *, now: Optional[float] = None) -> 'TokenSet':
+        """
+        Creates token set from response of token endpoint (f.e. `fetch_token_schema_2`), `expires_in` is turned into `expires_at`
+        """
+        expires_in = response.get('expires_in')
+        expires_at = (time.time() if now is None else now) + float(expires_in) if expires_in is not None else None
+        return cls(response['access_token'], response.get('refresh_token'), expires_at)
+
+    @classmethod
+    def create(cls, access_token: str, refresh_token: Optional[str] = None, expires_in: Optional[float] = None) -> 'TokenSet':
+        """
+        Creates token set expiring `expires_in` seconds from now
+        """
+        return cls(access_token, refresh_token, time.time() + expires_in if expires_in is not None else None)
+
+    def expires_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Number of seconds until access token expires (negative if it already expired), None if unknown"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - (time.time() if now is None else now)
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        remaining = self.expires_in(now)
+        return remaining is not None and remaining <= 0
+
+    def refresh_due(self, margin: float, now: Optional[float] = None) -> bool:
+        """Checks if access token expires within `margin` seconds"""
+        remaining = self.expires_in(now)
+        return remaining is not None and remaining <= margin
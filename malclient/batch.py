@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Any, Iterator, AsyncIterator, Hashable
+
+from .exceptions import NotFound, Forbidden
+from .Datamodels import PagedResult
+
+__all__ = ['BatchResult', 'CrawlResult', 'fetch_many', 'iter_fetch_many', 'async_fetch_many', 'async_iter_fetch_many',
+           'offset_windows', 'stitch_pages']
+
+DEFAULT_IGNORED_ERRORS = (NotFound, Forbidden)
+
+
+class BatchResult(list):
+    """
+
+    List of results of batch request in input order, entries which failed with collected error are None
+
+    :ivar dict errors: Errors collected for failed entries, keyed by id
+    """
+    def __init__(self, seq, errors: dict):
+        super().__init__(seq)
+        self.errors = errors
+
+    @property
+    def failed(self) -> list:
+        """
+        Ids of entries which failed
+        """
+        return list(self.errors)
+
+
+class CrawlResult(PagedResult):
+    """
+
+    PagedResult stitched from pages of parallel crawl, reports whether listing changed while it was crawled
+
+    :ivar int duplicates: Number of dropped entries which shifted between windows and were fetched twice
+    :ivar int missing: Estimated number of entries which shifted between windows and weren't fetched at all
+    """
+    def __init__(self, seq, page_link: dict, *, duplicates: int = 0, missing: int = 0):
+        super().__init__(seq, page_link)
+        self.duplicates = duplicates
+        self.missing = missing
+
+    @property
+    def shifted(self) -> bool:
+        """
+        True if listing changed during crawl, entries may then be missing and crawl should be repeated
+        """
+        return bool(self.duplicates or self.missing)
+
+
+def fetch_many(function: Callable[[Hashable], Any], keys: Iterable[Hashable], *, concurrency: int = 8,
+               ignore_errors: tuple = DEFAULT_IGNORED_ERRORS) -> BatchResult:
+    """
+    Calls function for every key using pool of threads
+
+    :param function: Function fetching single entry
+    :param keys: Ids of entries to fetch
+    :param int concurrency: Maximum number of requests in flight
+    :param tuple ignore_errors: Exception types collected instead of aborting whole batch
+    :returns: Results in input order
+    :rtype: BatchResult
+    """
+    keys = list(keys)
+    results, errors = [None] * len(keys), {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(function, key): index for index, key in enumerate(keys)}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except ignore_errors as e:
+                    errors[keys[index]] = e
+        except BaseException:
+            # any other error aborts the batch, requests which haven't started yet are dropped
+            for future in futures:
+                future.cancel()
+            raise
+    return BatchResult(results, errors)
+
+
+def iter_fetch_many(function: Callable[[Hashable], Any], keys: Iterable[Hashable], *, concurrency: int = 8,
+                    ignore_errors: tuple = DEFAULT_IGNORED_ERRORS) -> Iterator[tuple]:
+    """
+    Same as fetch_many, but yields pairs of key and result (or collected error) as soon as they are completed
+    """
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(function, key): key for key in keys}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except ignore_errors as e:
+                    yield futures[future], e
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+async def _limited(semaphore: asyncio.Semaphore, function, key):
+    async with semaphore:
+        return await function(key)
+
+
+async def async_fetch_many(function: Callable[[Hashable], Any], keys: Iterable[Hashable], *, concurrency: int = 8,
+                           ignore_errors: tuple = DEFAULT_IGNORED_ERRORS) -> BatchResult:
+    """
+    Asyncio counterpart of fetch_many, function has to return awaitable
+    """
+    keys = list(keys)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    errors = {}
+
+    async def fetch(key):
+        try:
+            return await _limited(semaphore, function, key)
+        except ignore_errors as e:
+            errors[key] = e
+            return None
+
+    tasks = [asyncio.ensure_future(fetch(key)) for key in keys]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return BatchResult(results, errors)
+
+
+async def async_iter_fetch_many(function: Callable[[Hashable], Any], keys: Iterable[Hashable], *, concurrency: int = 8,
+                                ignore_errors: tuple = DEFAULT_IGNORED_ERRORS) -> AsyncIterator[tuple]:
+    """
+    Asyncio counterpart of iter_fetch_many
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(key):
+        try:
+            return key, await _limited(semaphore, function, key)
+        except ignore_errors as e:
+            return key, e
+
+    tasks = [asyncio.ensure_future(fetch(key)) for key in keys]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def offset_windows(total: int, page_size: int) -> list[tuple[int, int]]:
+    """
+    Splits first `total` positions of listing into (offset, limit) windows fetched by parallel crawls
+
+    :param int total: Number of entries to fetch
+    :param int page_size: Maximum number of entries in single request
+    :rtype: list[tuple[int, int]]
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be greater than 0")
+    return [(offset, min(page_size, total - offset)) for offset in range(0, max(0, total), page_size)]
+
+
+def stitch_pages(pages: list, windows: list[tuple[int, int]]) -> CrawlResult:
+    """
+    Joins pages fetched for consecutive offset windows into single CrawlResult, if listing changed
+    while windows were fetched entries shift between pages, so duplicates are dropped and counted together with missing entries
+
+    :param list pages: Pages in order of windows, None for windows past the end of listing
+    :param windows: (offset, limit) windows used to fetch pages
+    :returns: Entries of all pages in order, paging links lead outside of crawled range
+    :rtype: CrawlResult
+    """
+    last = max((index for index, page in enumerate(pages) if page), default=-1)
+    entries, seen, duplicates, missing = [], set(), 0, 0
+    for index, (page, (_, limit)) in enumerate(zip(pages, windows)):
+        # only the last page may be shorter (end of listing), shorter or absent page before it (or last page
+        # which still links to next one) means that some entries moved between windows and weren't fetched at all
+        if index < last or (index == last and page.has_next_page):
+            missing += limit - len(page or ())
+        for entry in page or ():
+            if entry.id in seen:
+                duplicates += 1
+                continue
+            seen.add(entry.id)
+            entries.append(entry)
+    if duplicates or missing:
+        logging.warning(f"Listing changed during crawl: dropped {duplicates} duplicated entries, "
+                        f"{missing} entries are missing")
+    paging = {}
+    if last >= 0:
+        first = next(page for page in pages if page)
+        paging = {'previous': first._previous, 'next': pages[last]._next}
+    return CrawlResult(entries, {key: value for key, value in paging.items() if value is not None},
+                       duplicates=duplicates, missing=missing)
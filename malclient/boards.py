@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional, Iterator
 
 from .Datamodels import ForumCategory, ForumTopicDetail, ForumTopic
 from .Datamodels import PagedResult
@@ -17,8 +17,7 @@ class Boards:
         :rtype: list[ForumCategory]
         """
         uri = 'forum/boards'
-        return [ForumCategory(**data) for data in self._api_handler.call(uri)['categories']]
-        # return self._api_handler.call(uri)
+        return self._call(uri=uri, build=lambda temp: [ForumCategory(**data) for data in temp['categories']])
 
     def get_forum_topic_detail(self, topic_id: int, *, limit: int = 100, offset: int = 0):
         """
@@ -33,8 +32,8 @@ class Boards:
         uri = f'forum/topic/{topic_id}'
         params = {'limit': limit,
                   'offstet': offset}
-        temp = self._api_handler.call(uri, params=params)
-        return ForumTopicDetail(paging_data=temp['paging'], **temp["data"])
+        return self._call(uri=uri, params=params,
+                          build=lambda temp: ForumTopicDetail(paging_data=temp['paging'], **temp["data"]))
 
     def get_forum_topics(self, *,
                          board_id: int = None,
@@ -72,5 +71,17 @@ class Boards:
                   'q': query,
                   'topic_user_name': topic_user_name,
                   'user_name': user_name}
-        temp = self._api_handler.call(uri, params=params)
-        return PagedResult([ForumTopic(**topic) for topic in temp['data']], temp['paging'])
\ No newline at end of file
+        return self._call(uri=uri, params=params,
+                          build=lambda temp: PagedResult([ForumTopic(**topic) for topic in temp['data']], temp['paging']))
+
+    def iter_forum_topics(self, *, max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Iterator[ForumTopic]:
+        """
+        Iterates over all forum topics matching provided parameters, following pages are fetched as iteration goes
+
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_forum_topics, `limit` sets page size
+        :returns: Lazy iterator over entries (async iterator for AsyncClient)
+        :rtype: Iterator[ForumTopic]
+        """
+        return self._iterate(lambda: self.get_forum_topics(**kwargs), max_items=max_items, prefetch=prefetch)
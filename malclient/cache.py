@@ -0,0 +1,381 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, NamedTuple, Iterable
+from urllib.parse import urlencode
+
+from .Datamodels.fields import FieldsTree
+from .sqlite_connections import ThreadLocalConnections
+
+__all__ = ['CacheEntry', 'CacheStats', 'CachePolicy', 'CacheBackend', 'MemoryCache', 'SQLiteCache', 'make_cache_key',
+           'project_response']
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+class CacheEntry(NamedTuple):
+    """
+    Single cached response
+
+    :ivar bytes body: Raw response body (JSON)
+    :ivar str tag: Endpoint path response was fetched from, used for invalidation
+    :ivar float created_at: Unix timestamp of response
+    :ivar float expires_at: Unix timestamp after which entry is stale
+    :ivar str fields: Fields payload response was requested with, set only for endpoints served by projection
+    """
+    body: bytes
+    tag: str
+    created_at: float
+    expires_at: float
+    fields: Optional[str] = None
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+def _normalize(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def make_cache_key(uri: str, params: Optional[dict], identity: str = '', *, ignore: Iterable[str] = ()) -> str:
+    """
+    Generates cache key from endpoint path, query parameters (sorted, with empty ones dropped) and auth identity
+
+    :param str uri: Endpoint path relative to base url
+    :param dict params: Query parameters
+    :param str identity: Identifier of credentials, responses may differ between users (f.e. my_list_status)
+    :param Iterable[str] ignore: Names of query parameters left out of key
+    """
+    query = urlencode(sorted((key, _normalize(value)) for key, value in (params or {}).items()
+                             if value is not None and key not in ignore))
+    return f"{identity}|{uri}?{query}"
+
+
+# MAL returns those fields for every entry, even if they were not requested
+ALWAYS_PRESENT_FIELDS = frozenset(('id', 'title', 'main_picture'))
+
+
+def _drop_fields(value, have: FieldsTree, want: FieldsTree):
+    if isinstance(value, list):
+        return [_drop_fields(item, have, want) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 'node' in value and isinstance(value['node'], dict):
+        # nested entries (f.e. related_anime, authors) keep requested fields inside node object
+        return value | {'node': _drop_fields(value['node'], have, want)}
+    projected = {}
+    for name, item in value.items():
+        if name in have and name not in want and name not in ALWAYS_PRESENT_FIELDS:
+            continue
+        if have.get(name):
+            item = _drop_fields(item, have[name], want.get(name) or {})
+        projected[name] = item
+    return projected
+
+
+def project_response(body, have: FieldsTree, want: FieldsTree):
+    """
+    Projects raw JSON response requested with `have` fields into response that would be returned for `want` fields,
+    `have` has to cover `want` (see fields_cover)
+
+    :param body: Decoded raw JSON response
+    :param dict have: Parsed fields payload response was requested with
+    :param dict want: Parsed fields payload of projected response
+    """
+    return _drop_fields(body, have, want)
+
+
+def identity_from_headers(headers: dict) -> str:
+    """Short, non-reversible identifier of credentials used in headers"""
+    credential = headers.get('Authorization') or headers.get('X-MAL-CLIENT-ID') or ''
+    return hashlib.sha1(credential.encode()).hexdigest()[:16]
+
+
+class CachePolicy(object):
+    """
+    Decides which endpoints are cached and for how long, first matching rule wins
+
+    :ivar list[tuple[str, float]] rules: Pairs of regular expression matched against endpoint path and TTL in seconds, TTL 0 disables caching
+    :ivar float default_ttl: TTL of endpoints not matching any rule
+    """
+    DEFAULT_RULES = [
+        (r'^(anime|manga)/\d+/my_list_status$', 0),
+        (r'^(anime|manga)/\d+$', DAY),
+        (r'^(characters|people)/\d+$', DAY),
+        (r'^anime/\d+/characters$', DAY),
+        (r'^(anime|manga)/ranking$', 10 * MINUTE),
+        (r'^anime/season/\d+/\w+$', HOUR),
+        (r'^(anime|manga)$', HOUR),
+        (r'^forum/boards$', DAY),
+        (r'^forum/', 5 * MINUTE),
+    ]
+    # writes to my_list_status change my_list_status field of entry details
+    INVALIDATION_RULES = [
+        (r'^(anime|manga)/(\d+)/my_list_status$', r'\1/\2'),
+    ]
+    # single entry endpoints are cached once per entry, requests for subset of cached fields are served by projection
+    PROJECTION_RULES = [
+        r'^(anime|manga|characters|people)/\d+$',
+    ]
+
+    def __init__(self, rules: Iterable[tuple[str, float]] = None, default_ttl: float = 0, *, projection: bool = True):
+        self.rules = [(re.compile(pattern), ttl) for pattern, ttl in (self.DEFAULT_RULES if rules is None else rules)]
+        self.invalidation_rules = [(re.compile(pattern), repl) for pattern, repl in self.INVALIDATION_RULES]
+        self.projection_rules = [re.compile(pattern) for pattern in self.PROJECTION_RULES] if projection else []
+        self.default_ttl = default_ttl
+
+    def ttl(self, uri: str) -> float:
+        """
+        :param str uri: Endpoint path without query string
+        :returns: Number of seconds response of endpoint may be cached for
+        """
+        for pattern, ttl in self.rules:
+            if pattern.search(uri):
+                return ttl
+        return self.default_ttl
+
+    def projectable(self, uri: str) -> bool:
+        """
+        :param str uri: Endpoint path without query string
+        :returns: True if requests with different fields share single cache entry
+        """
+        return any(pattern.search(uri) for pattern in self.projection_rules)
+
+    def invalidated_by(self, uri: str) -> list[str]:
+        """
+        :param str uri: Endpoint path of write request
+        :returns: List of cache tags (endpoint paths) made stale by write request
+        """
+        return [pattern.sub(repl, uri) for pattern, repl in self.invalidation_rules if pattern.search(uri)]
+
+
+class CacheBackend(ABC):
+    """
+    Interface of response cache used by APICaller
+    """
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns entry stored under key, None if it's missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry):
+        """Stores entry under key"""
+
+    @abstractmethod
+    def invalidate(self, tag: str):
+        """Removes all entries fetched from endpoint path `tag`"""
+
+    @abstractmethod
+    def clear(self):
+        """Removes all entries"""
+
+    @property
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Hit, miss and size statistics of cache"""
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe in-memory LRU cache with TTL
+
+    :ivar int max_entries: Maximum number of stored responses
+    :ivar int max_bytes: Maximum total size of stored response bodies
+    """
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expired:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._tags.setdefault(entry.tag, set()).add(key)
+            self._size += len(entry.body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, tag: str):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._size)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+        keys = self._tags[entry.tag]
+        keys.discard(key)
+        if not keys:
+            del self._tags[entry.tag]
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Persistent cache storing raw responses in SQLite database (WAL mode), file may be shared by multiple
+    threads and processes, so workers don't lose cache on restart and don't warm it up separately
+
+    :ivar str path: Path to database file
+    :ivar int max_bytes: Maximum total size of stored response bodies, least recently used entries are evicted during compaction
+    :ivar float compact_interval: Minimal number of seconds between automatic compactions run after writes
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            tag TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            fields TEXT
+        );
+        CREATE INDEX IF NOT EXISTS responses_tag ON responses (tag);
+        CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+        CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+    """
+
+    def __init__(self, path: str = "malclient_cache.sqlite", *, max_bytes: int = 512 * 1024 * 1024,
+                 compact_interval: float = 5 * MINUTE, timeout: float = 30.0):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        self._connections = ThreadLocalConnections(self.path, timeout=timeout)
+        self._last_compaction = time.monotonic()
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+        connection = self._connection()
+        connection.executescript(self._SCHEMA)
+        if 'fields' not in [column[1] for column in connection.execute("PRAGMA table_info(responses)")]:
+            connection.execute("ALTER TABLE responses ADD COLUMN fields TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _count(self, attribute: str, value: int = 1):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + value)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        connection = self._connection()
+        row = connection.execute("SELECT body, tag, created_at, expires_at, fields FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or row[3] <= now:
+            self._count('_misses')
+            return None
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count('_hits')
+        return CacheEntry(bytes(row[0]), row[1], row[2], row[3], row[4])
+
+    def set(self, key: str, entry: CacheEntry):
+        if len(entry.body) > self.max_bytes:
+            return
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, tag, body, size, created_at, expires_at, accessed_at, fields) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, entry.tag, entry.body, len(entry.body), entry.created_at, entry.expires_at, time.time(), entry.fields))
+        if time.monotonic() - self._last_compaction >= self.compact_interval:
+            self.compact()
+
+    def invalidate(self, tag: str):
+        self._connection().execute("DELETE FROM responses WHERE tag = ?", (tag,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM responses")
+
+    def compact(self, vacuum: bool = False) -> int:
+        """
+        Removes expired entries, then evicts least recently used ones until cache fits into max_bytes
+
+        :param bool vacuum: If set to True, database file is also shrunk (it locks database for a while)
+        :returns: Number of removed entries
+        :rtype: int
+        """
+        self._last_compaction = time.monotonic()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((key,))
+                    total -= size
+                connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._count('_evictions', len(evicted))
+        if vacuum:
+            connection.execute("VACUUM")
+        return removed + len(evicted)
+
+    def close(self):
+        """Closes database connection opened by current thread"""
+        self._connections.close()
+
+    @property
+    def stats(self) -> CacheStats:
+        entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, entries, size)
+
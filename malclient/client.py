@@ -1,20 +1,32 @@
 import re
 import secrets
 import os
+import asyncio
 import datetime
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Optional, Callable
 import platform
+from abc import ABC, abstractmethod
 
-from .request_handler import APICaller
+import requests
+
+from .request_handler import APICaller, AsyncAPICaller, create_session
+from .rate_limit import RateLimiter
+from .cache import CacheBackend, CachePolicy, identity_from_headers
+from .batch import fetch_many, iter_fetch_many, async_fetch_many, async_iter_fetch_many, DEFAULT_IGNORED_ERRORS
 from .anime import Anime
 from .my_list import MyList
 from .manga import Manga
 from .industry import Industry
-from .exceptions import AuthorizationError
+from .exceptions import AuthorizationError, Unauthorized
+from .auth import TokenSet
+from .Datamodels import trusted_construction, lazy_construction, ColumnBuilder
 from .boards import Boards
+from .write_behind import AsyncWriteBehindQueue
 
-__all__ = ['Client', 'setup_logging', 'generate_authorization_url', 'fetch_token_schema_2']
+__all__ = ['BaseClient', 'AsyncBaseClient', 'Client', 'AsyncClient', 'setup_logging', 'generate_authorization_url', 'fetch_token_schema_2', 'create_session']
 
 
 def generate_authorization_url(client_id: str, *,
@@ -34,14 +46,17 @@ def fetch_token_schema_2(client_id: str,
                         client_secret: str,
                         code_verifier: str,
                         code: str,
-                        redirect_uri : Optional[str] = None) -> dict[str, str]:
+                        redirect_uri : Optional[str] = None,
+                        session: Optional[requests.Session] = None) -> dict[str, str]:
     """
 
     Helper function to generate access token **do not use this to refresh token**
-    Function follows MAL auth schema 2
+    Function follows MAL auth schema 2, response contains `expires_in` which can be passed to Client
+    (or converted with `TokenSet.from_response`) so token is refreshed before it expires
 
     :ivar str client_id: your client id (available on myanimelist developer page)
     :ivar str client_secret: your client secret (available on myanimelist developer page)
+    :ivar requests.Session session: [Optional] pooled session used for request, new one is created if omitted
     :return: Freshly generated Access Token for your client
     :rtype: dict[str, str]
     """
@@ -49,7 +64,7 @@ def fetch_token_schema_2(client_id: str,
     base_url = "https://myanimelist.net/v1/"
     uri = "oauth2/token"
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    api_handler = APICaller(base_url=base_url, headers=headers)
+    api_handler = APICaller(base_url=base_url, headers=headers, session=session)
     data = {
         "client_id": client_id,
         "client_secret": client_secret,
@@ -79,7 +94,155 @@ def setup_logging(*, format: str = None, filename: str = None, log_level: loggin
     logging.basicConfig(filename=filename, level=log_level, format=format)
 
 
-class Client(Anime, Manga, MyList, Boards, Industry):
+class BaseClient(Anime, Manga, MyList, Boards, Industry, ABC):
+    """
+    Endpoint methods shared by Client and ClientPool, base holds no credentials nor connections,
+    subclasses decide how requests are sent (see `_call`)
+
+    :ivar nsfw: If set to True, nsfw entries are returned by default
+    :ivar validate: If set to False, models are built from responses without pydantic validation
+    :ivar lazy: If set to True, endpoints return lazy wrappers of raw data
+    """
+    def __init__(self, *, nsfw: bool = False, validate: bool = True, lazy: bool = False):
+        self.nsfw = nsfw
+        self.validate = validate
+        self.lazy = lazy
+        self.authorized = False
+        self._version = "v2"
+        self._base_url = f"https://api.myanimelist.net/{self._version}/"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @abstractmethod
+    def close(self):
+        """
+        Closes pooled connections held by client
+        """
+
+    @abstractmethod
+    def _call(self, uri: str, *, build=None, validate: Optional[bool] = None, **kwargs):
+        """
+        Sends request and converts parsed response with build callable,
+        all endpoint methods go through this method so subclasses can change how requests are executed
+
+        :param str uri: Endpoint path relative to base url
+        :param build: [Optional] Callable converting parsed response into returned object
+        :param bool validate: [Optional] Overrides client validation mode for this call
+        """
+
+    def _build(self, build, data, validate: Optional[bool] = None):
+        with trusted_construction(not (self.validate if validate is None else validate)):
+            if not self.lazy:
+                return build(data)
+            with lazy_construction():
+                return build(data)
+
+    def _fetch_many(self, function, keys, *, concurrency: int = 8, ignore_errors: tuple = DEFAULT_IGNORED_ERRORS,
+                    as_completed: bool = False, build=None):
+        """
+        Calls single-entry endpoint method for every key with bounded concurrency, used by all `*_many` methods
+
+        :param function: Endpoint method called with single key
+        :param keys: Ids of entries to fetch
+        :param int concurrency: Maximum number of requests in flight
+        :param tuple ignore_errors: Exception types collected per id instead of aborting whole batch
+        :param bool as_completed: If set to True, iterator of (id, result) pairs is returned in order of completion
+        :param build: [Optional] Callable converting BatchResult into returned object, ignored if as_completed is set
+        """
+        if as_completed:
+            return iter_fetch_many(function, keys, concurrency=concurrency, ignore_errors=ignore_errors)
+        results = fetch_many(function, keys, concurrency=concurrency, ignore_errors=ignore_errors)
+        return results if build is None else build(results)
+
+    def _iterate(self, first_page, *, max_items: Optional[int] = None, prefetch: int = 1):
+        """
+        Lazily iterates over entries of all pages of listing endpoint, used by all `iter_*` methods
+
+        :param first_page: Callable without arguments fetching first page
+        :param int max_items: [Optional] Maximum number of entries to yield
+        :param int prefetch: Number of pages fetched ahead in background
+        """
+        page = first_page()
+        if page is not None:
+            yield from page.iter_all(self, max_items=max_items, prefetch=prefetch)
+
+    def _collect_columns(self, entries, columns, *, as_numpy: bool = False):
+        """
+        Collects columns from entries of `_iterate`, entries are discarded as soon as their values are read
+
+        :param entries: Iterator returned by `_iterate`
+        :param columns: Names of collected columns
+        :param bool as_numpy: If set to True, columns are converted to numpy arrays
+        """
+        return ColumnBuilder(columns).extend(entries).build(as_numpy=as_numpy)
+
+    def _run_sync(self, first_page, sync):
+        """
+        Fetches pages of list for synchronisation until ListSync doesn't need more, used by `sync_user_*_list` methods
+
+        :param first_page: Callable without arguments fetching first page
+        :param ListSync sync: State of synchronisation
+        """
+        page = first_page()
+        while sync.consume(page):
+            page = page.fetch_next_page(self)
+        return sync.commit()
+
+
+class AsyncBaseClient(BaseClient):
+    """
+    BaseClient whose endpoint methods return awaitables, shared by AsyncClient and AsyncClientPool
+    """
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _fetch_many(self, function, keys, *, concurrency: int = 8, ignore_errors: tuple = DEFAULT_IGNORED_ERRORS,
+                    as_completed: bool = False, build=None):
+        # returns coroutine, or async iterator if as_completed is set
+        if as_completed:
+            return async_iter_fetch_many(function, keys, concurrency=concurrency, ignore_errors=ignore_errors)
+        return self._gather_many(function, keys, concurrency=concurrency, ignore_errors=ignore_errors, build=build)
+
+    async def _iterate(self, first_page, *, max_items: Optional[int] = None, prefetch: int = 1):
+        page = await first_page()
+        if page is not None:
+            async for entry in page.aiter_all(self, max_items=max_items, prefetch=prefetch):
+                yield entry
+
+    async def _collect_columns(self, entries, columns, *, as_numpy: bool = False):
+        builder = ColumnBuilder(columns)
+        async for entry in entries:
+            builder.add(entry)
+        return builder.build(as_numpy=as_numpy)
+
+    async def _run_sync(self, first_page, sync):
+        page = await first_page()
+        while sync.consume(page):
+            page = await page.fetch_next_page(self)
+        return sync.commit()
+
+    def write_behind(self, **options) -> AsyncWriteBehindQueue:
+        """
+        Same as Client.write_behind, has to be called inside running event loop
+
+        :rtype: AsyncWriteBehindQueue
+        """
+        return AsyncWriteBehindQueue(self, **options)
+
+    @staticmethod
+    async def _gather_many(function, keys, *, build=None, **options):
+        results = await async_fetch_many(function, keys, **options)
+        return results if build is None else build(results)
+
+
+class Client(BaseClient):
     """
 
     Base class for interacting with MyAnimeList REST API
@@ -87,20 +250,99 @@ class Client(Anime, Manga, MyList, Boards, Industry):
     :ivar client_id: string containing client_id obtained from [client configuration on MAL](https://myanimelist.net/apiconfig)
     :ivar access_token: string containing access token obtained through OAuth2
     :ivar refresh_token: string containing refresh token obtained through OAuth2
+    :ivar client_secret: [Optional] client secret, required to refresh token of clients registered with secret
+    :ivar expires_in: [Optional] number of seconds after which access token expires (`expires_in` of token response),
+        if client_id and refresh_token are set, token is refreshed in background `token_refresh_margin` seconds before expiry
+        and once (shared by all threads) when request fails with 401, failed request is then sent again
+    :ivar on_token_refresh: [Optional] callback receiving TokenSet after every refresh, f.e. to persist new token pair
+    :ivar token_refresh_margin: Number of seconds before expiry when token is refreshed in background
+    :ivar session: [Optional] pooled requests session shared by all calls, created from pool parameters if omitted
+    :ivar pool_connections: Number of per-host connection pools kept by created session
+    :ivar pool_maxsize: Maximum number of keep-alive connections per host
+    :ivar pool_block: Wait for free connection instead of opening extra one when pool is exhausted
+    :ivar keep_alive: If set to False, connections are closed after every request
+    :ivar rate_limiter: [Optional] RateLimiter throttling and retrying requests, may be shared between multiple clients
+    :ivar cache: [Optional] Response cache (f.e. MemoryCache), disabled by default
+    :ivar cache_policy: [Optional] CachePolicy deciding TTL of each endpoint, default policy is used if omitted
+    :ivar cache_identity: [Optional] Identifier of user (f.e. user name) separating cached responses of different users,
+        derived from credentials client was created with if omitted, refreshed tokens keep identity of client
+    :ivar coalesce_requests: If set to True, identical GET requests sent concurrently from multiple threads share single HTTP request
+    :ivar validate: If set to False, models are built from responses without pydantic validation (much faster,
+        only enums, dates and nested models are converted), may be overridden per call with `validate` parameter
+    :ivar lazy: If set to True, endpoints return lazy wrappers of raw data (f.e. LazyAnimeObject) which build nested models
+        only when they are accessed, single calls can be made lazy with `lazy_construction()` context manager
     """
-    def __init__(self, *, client_id: str = None, access_token: str = None, refresh_token: str = None, nsfw: bool = False):
-        self.nsfw = nsfw
-        self._base_url = "https://api.myanimelist.net/"
-        self._version = "v2"
-        self._base_url = self._base_url + f'{self._version}/'
+    def __init__(self, *, client_id: str = None, access_token: str = None, refresh_token: str = None, nsfw: bool = False,
+                 client_secret: str = None,
+                 expires_in: float = None,
+                 on_token_refresh: Callable[[TokenSet], None] = None,
+                 token_refresh_margin: float = 300.0,
+                 session: requests.Session = None,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 rate_limiter: RateLimiter = None,
+                 cache: CacheBackend = None,
+                 cache_policy: CachePolicy = None,
+                 cache_identity: str = None,
+                 coalesce_requests: bool = True,
+                 validate: bool = True,
+                 lazy: bool = False):
+        super().__init__(nsfw=nsfw, validate=validate, lazy=lazy)
         self._bearer_token = access_token
         self._client_id = client_id
         self.refresh_token = refresh_token
-        self.authorized = False
+        self._client_secret = client_secret
+        self._tokens = TokenSet.create(access_token, refresh_token, expires_in) if access_token is not None else None
+        self.on_token_refresh = on_token_refresh
+        self.token_refresh_margin = token_refresh_margin
+        self._token_lock = threading.Lock()
+        self._token_handler = None
+        self._refreshing = False
+        self._refresh_retry_at = 0.0
         self._api_handler = None
         self.headers = {}
+        self.rate_limiter = rate_limiter
+        self._handler_options = {'cache': cache, 'cache_policy': cache_policy, 'coalesce_requests': coalesce_requests}
+        self._cache_identity = cache_identity
+        self._session = session if session is not None else self._create_session(pool_connections=pool_connections,
+                                                                                  pool_maxsize=pool_maxsize,
+                                                                                  pool_block=pool_block,
+                                                                                  keep_alive=keep_alive)
         self._connect_to_api()
 
+    def close(self):
+        """
+        Closes pooled connections held by client
+        """
+        self._api_handler.close()
+
+    @property
+    def cache(self) -> Optional[CacheBackend]:
+        """
+        Response cache used by client, None if caching is disabled
+        """
+        return self._api_handler.cache
+
+    def _create_session(self, **pool_options):
+        return create_session(**pool_options)
+
+    def _create_api_handler(self, base_url: str, headers: dict, **options):
+        return APICaller(base_url=base_url, headers=headers, session=self._session, **options)
+
+    def _call(self, uri: str, *, build=None, validate: Optional[bool] = None, **kwargs):
+        token = self._check_token()
+        try:
+            data = self._api_handler.call(uri=uri, **kwargs)
+        except Unauthorized:
+            if token is None:
+                raise
+            # token expired (or was revoked) earlier than expected, first failed caller refreshes it, others reuse new one
+            self._refresh_tokens(token)
+            data = self._api_handler.call(uri=uri, **kwargs)
+        return data if build is None else self._build(build, data, validate)
+
     @classmethod
     def generate_new_token(cls, client_id: str, client_secret: str, *, code_verifier: str = None, redirect_uri: Optional[str] = None):
         auth_url, code_verifier = generate_authorization_url(client_id, code_verifier=code_verifier, redirect_uri=redirect_uri)
@@ -115,7 +357,8 @@ class Client(Anime, Manga, MyList, Boards, Industry):
         code = re.search(r"(?<=code=)(\w+)", code_url).group()
 
         data = fetch_token_schema_2(client_id, client_secret, code_verifier, code, redirect_uri)
-        return cls(access_token=data['access_token'], refresh_token=data['refresh_token'])
+        return cls(client_id=client_id, client_secret=client_secret, access_token=data['access_token'],
+                   refresh_token=data['refresh_token'], expires_in=data.get('expires_in'))
 
     def _connect_to_api(self):
         self.headers = {
@@ -123,58 +366,258 @@ class Client(Anime, Manga, MyList, Boards, Industry):
         }
         if self._bearer_token is not None:
             self.headers['Authorization'] = f'Bearer {self._bearer_token}'
-            self._api_handler = APICaller(base_url=self._base_url,
-                                          headers=self.headers)
             self.authorized = True
         elif self._client_id is not None:
             self.headers['X-MAL-CLIENT-ID'] = self._client_id
         else:
             raise AuthorizationError()
 
-        self._api_handler = APICaller(base_url=self._base_url,
-                                      headers=self.headers)
+        if self._api_handler is None:
+            # identity is resolved once, so responses cached before token refresh are still served after it
+            identity = self._cache_identity if self._cache_identity is not None else identity_from_headers(self.headers)
+            self._api_handler = self._create_api_handler(self._base_url, self.headers, rate_limiter=self.rate_limiter,
+                                                         identity=identity, **self._handler_options)
+        else:
+            self._api_handler.update_headers(self.headers)
+
+    @property
+    def tokens(self) -> Optional[TokenSet]:
+        """
+        Current token pair with time of expiry, None if client uses only client id
+        """
+        return self._tokens
+
+    @property
+    def _can_refresh(self) -> bool:
+        return self._tokens is not None and self._client_id is not None and self.refresh_token is not None
+
+    def _background_refresh_due(self, tokens: TokenSet) -> bool:
+        return not self._refreshing and tokens.refresh_due(self.token_refresh_margin) and time.monotonic() >= self._refresh_retry_at
+
+    def _check_token(self) -> Optional[str]:
+        """
+        Refreshes token which already expired, starts background refresh of token which is about to expire
+
+        :returns: Access token used by request, None if token can't be refreshed
+        """
+        if not self._can_refresh:
+            return None
+        tokens = self._tokens
+        if tokens.expired():
+            return self._refresh_tokens(tokens.access_token).access_token
+        if self._background_refresh_due(tokens):
+            # requests keep using current token, which is still valid, until new one is applied
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, args=(tokens.access_token,),
+                             name='malclient-token-refresh', daemon=True).start()
+        return tokens.access_token
+
+    def _refresh_tokens(self, failed_token: Optional[str]) -> TokenSet:
+        """
+        Refreshes token under lock, if other caller already replaced failed token it's not refreshed again
+
+        :param str failed_token: Access token which is being replaced, None forces refresh
+        """
+        with self._token_lock:
+            if failed_token is not None and self._tokens.access_token != failed_token:
+                return self._tokens
+            api_handler, uri, data = self._token_refresh_request(self._client_id, self._client_secret, self.refresh_token)
+            return self._apply_refreshed_token(api_handler.call(uri=uri, method="post", data=data))
+
+    def _refresh_in_background(self, token: str):
+        try:
+            self._refresh_tokens(token)
+        except Exception as e:
+            # token is still valid, refresh is retried by one of next requests
+            self._refresh_retry_at = time.monotonic() + 30.0
+            logging.warning(f"Background token refresh failed: {e!r}")
+        finally:
+            self._refreshing = False
 
     def refresh_bearer_token(self,
-                             client_id: str,
-                             client_secret: str,
-                             refresh_token: str,
-                             print_response: bool = True) -> None:
+                             client_id: str = None,
+                             client_secret: str = None,
+                             refresh_token: str = None,
+                             print_response: bool = False) -> TokenSet:
         """
 
-        Function to automatically refresh your clients bearer token (as for now there is no such thing as lifetime token)
+        Refreshes bearer token of client, it's done automatically if client was created with client_id and refresh_token,
+        omitted credentials are taken from client and passed ones are kept for following refreshes
 
         :param str client_id: Your client id number
         :param str client_secret: Your client secret
         :param str refresh_token: Your refresh token
-        :param bool print_response: Should the response json be printed or not
+        :param bool print_response: Deprecated, response containing tokens is no longer printed
+        :returns: New token pair
+        :rtype: TokenSet
         """
-        base_url = "https://myanimelist.net/v1/"
-        uri = "oauth2/token"
-        headers = {
-            'Authorization': f'Bearer {self._bearer_token}',
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Authorization': 'basic {}'
-        }
-        api_handler = APICaller(base_url=base_url, headers=headers)
+        self._store_credentials(client_id, client_secret, refresh_token)
+        return self._refresh_tokens(None)
+
+    def _store_credentials(self, client_id: Optional[str], client_secret: Optional[str], refresh_token: Optional[str]):
+        if client_id is not None:
+            self._client_id = client_id
+        if client_secret is not None:
+            self._client_secret = client_secret
+        if refresh_token is not None:
+            self.refresh_token = refresh_token
+
+    def _token_refresh_request(self, client_id: str, client_secret: Optional[str], refresh_token: str):
+        if self._token_handler is None:
+            self._token_handler = self._create_api_handler("https://myanimelist.net/v1/",
+                                                           {'Content-Type': 'application/x-www-form-urlencoded'})
         data = {
             "grant_type": "refresh_token",
             "refresh_token": refresh_token,
             "client_id": client_id,
             "client_secret": client_secret
         }
+        return self._token_handler, "oauth2/token", data
 
-        # print response json of authentication, reinstantiate caller method.
-        response = api_handler.call(uri=uri, method="post", data=data)
-        if print_response:
-            print("Refreshing token with client id and secret:")
-            print(response)
-        self._bearer_token = response["access_token"]
-        self.refresh_token = response["refresh_token"]
-        self.headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Authorization': f'Bearer {response["access_token"]}',
-            'X-MAL-Client-ID': '{}'
-        }
-        self._api_handler = APICaller(base_url=self._base_url,
-                                      headers=self.headers)
-        return
+    def _apply_refreshed_token(self, response: dict) -> TokenSet:
+        # swap headers of caller keeping its pooled connections, requests in flight finish with previous token
+        tokens = TokenSet.from_response(response)
+        if tokens.refresh_token is None:
+            tokens = tokens._replace(refresh_token=self.refresh_token)
+        self._tokens = tokens
+        self._bearer_token = tokens.access_token
+        self.refresh_token = tokens.refresh_token
+        self._connect_to_api()
+        remaining = tokens.expires_in()
+        logging.info("Bearer token refreshed" + (f", it expires in {remaining:.0f}s" if remaining is not None else ""))
+        if self.on_token_refresh is not None:
+            try:
+                self.on_token_refresh(tokens)
+            except Exception:
+                logging.exception("Callback persisting refreshed token failed")
+        return tokens
+
+
+class AsyncClient(AsyncBaseClient, Client):
+    """
+
+    Asyncio counterpart of Client, every endpoint method returns awaitable resolving to the same models as in Client.
+    Requests are sent through single aiohttp connection pool, so many of them may run concurrently on one event loop.
+    Requires optional dependency aiohttp.
+
+    :ivar client_id: string containing client_id obtained from [client configuration on MAL](https://myanimelist.net/apiconfig)
+    :ivar access_token: string containing access token obtained through OAuth2
+    :ivar refresh_token: string containing refresh token obtained through OAuth2
+    :ivar client_secret: [Optional] client secret, required to refresh token of clients registered with secret
+    :ivar expires_in: [Optional] number of seconds after which access token expires, see Client
+    :ivar on_token_refresh: [Optional] callback receiving TokenSet after every refresh, f.e. to persist new token pair
+    :ivar token_refresh_margin: Number of seconds before expiry when token is refreshed in background
+    :ivar session: [Optional] aiohttp.ClientSession shared by all calls, created inside running event loop if omitted
+    :ivar limit: Maximum number of simultaneously open connections
+    :ivar limit_per_host: Maximum number of simultaneously open connections to single host, 0 means no limit
+    :ivar keep_alive: If set to False, connections are closed after every request
+    :ivar rate_limiter: [Optional] RateLimiter throttling and retrying requests, may be shared between multiple clients
+    :ivar cache: [Optional] Response cache (f.e. MemoryCache), disabled by default
+    :ivar cache_policy: [Optional] CachePolicy deciding TTL of each endpoint, default policy is used if omitted
+    :ivar cache_identity: [Optional] Identifier of user (f.e. user name) separating cached responses of different users,
+        derived from credentials client was created with if omitted, refreshed tokens keep identity of client
+    :ivar coalesce_requests: If set to True, identical GET requests awaited concurrently share single HTTP request
+    :ivar validate: If set to False, models are built from responses without pydantic validation
+    :ivar lazy: If set to True, endpoints return lazy wrappers of raw data which build nested models on access
+    """
+    def __init__(self, *, client_id: str = None, access_token: str = None, refresh_token: str = None, nsfw: bool = False,
+                 client_secret: str = None,
+                 expires_in: float = None,
+                 on_token_refresh: Callable[[TokenSet], None] = None,
+                 token_refresh_margin: float = 300.0,
+                 session=None,
+                 limit: int = 100,
+                 limit_per_host: int = 0,
+                 keep_alive: bool = True,
+                 rate_limiter: RateLimiter = None,
+                 cache: CacheBackend = None,
+                 cache_policy: CachePolicy = None,
+                 cache_identity: str = None,
+                 coalesce_requests: bool = True,
+                 validate: bool = True,
+                 lazy: bool = False):
+        self._connector_options = {'limit': limit, 'limit_per_host': limit_per_host, 'keep_alive': keep_alive}
+        super().__init__(client_id=client_id, access_token=access_token, refresh_token=refresh_token, nsfw=nsfw,
+                         client_secret=client_secret, expires_in=expires_in, on_token_refresh=on_token_refresh,
+                         token_refresh_margin=token_refresh_margin, session=session, rate_limiter=rate_limiter, cache=cache, cache_policy=cache_policy,
+                         cache_identity=cache_identity,
+                         coalesce_requests=coalesce_requests, validate=validate, lazy=lazy)
+        # asyncio.Lock is created inside running event loop, see _refresh_tokens
+        self._token_lock = None
+        self._token_tasks = set()
+
+    async def close(self):
+        """
+        Closes pooled connections held by client
+        """
+        await self._api_handler.close()
+
+    def _create_session(self, **pool_options):
+        # aiohttp session has to be bound to running event loop, so it is created by AsyncAPICaller on first request
+        return None
+
+    def _create_api_handler(self, base_url: str, headers: dict, **options):
+        # secondary callers (f.e. token refresh) reuse connection pool of the main one
+        session = self._api_handler.session if self._api_handler is not None else self._session
+        return AsyncAPICaller(base_url=base_url, headers=headers, session=session, **options, **self._connector_options)
+
+    async def _call(self, uri: str, *, build=None, validate: Optional[bool] = None, **kwargs):
+        token = await self._check_token()
+        try:
+            data = await self._api_handler.call(uri=uri, **kwargs)
+        except Unauthorized:
+            if token is None:
+                raise
+            await self._refresh_tokens(token)
+            data = await self._api_handler.call(uri=uri, **kwargs)
+        return data if build is None else self._build(build, data, validate)
+
+    async def _check_token(self) -> Optional[str]:
+        if not self._can_refresh:
+            return None
+        tokens = self._tokens
+        if tokens.expired():
+            return (await self._refresh_tokens(tokens.access_token)).access_token
+        if self._background_refresh_due(tokens):
+            self._refreshing = True
+            task = asyncio.get_running_loop().create_task(self._refresh_in_background(tokens.access_token))
+            self._token_tasks.add(task)
+            task.add_done_callback(self._token_tasks.discard)
+        return tokens.access_token
+
+    async def _refresh_tokens(self, failed_token: Optional[str]) -> TokenSet:
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if failed_token is not None and self._tokens.access_token != failed_token:
+                return self._tokens
+            api_handler, uri, data = self._token_refresh_request(self._client_id, self._client_secret, self.refresh_token)
+            return self._apply_refreshed_token(await api_handler.call(uri=uri, method="post", data=data))
+
+    async def _refresh_in_background(self, token: str):
+        try:
+            await self._refresh_tokens(token)
+        except Exception as e:
+            self._refresh_retry_at = time.monotonic() + 30.0
+            logging.warning(f"Background token refresh failed: {e!r}")
+        finally:
+            self._refreshing = False
+
+    async def refresh_bearer_token(self,
+                                   client_id: str = None,
+                                   client_secret: str = None,
+                                   refresh_token: str = None,
+                                   print_response: bool = False) -> TokenSet:
+        """
+
+        Same as Client.refresh_bearer_token
+
+        :param str client_id: Your client id number
+        :param str client_secret: Your client secret
+        :param str refresh_token: Your refresh token
+        :param bool print_response: Deprecated, response containing tokens is no longer printed
+        :returns: New token pair
+        :rtype: TokenSet
+        """
+        self._store_credentials(client_id, client_secret, refresh_token)
+        return await self._refresh_tokens(None)
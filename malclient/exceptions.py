@@ -1,6 +1,7 @@
-import json
 from typing import Optional
 
+from . import json_backend
+
 
 class APIException(Exception):
     """Base exception for API"""
@@ -16,6 +17,17 @@ class APIException(Exception):
         return f"{self.status_code} - {self.message}"
 
 
+def _error_message(response, message: Optional[str] = None) -> Optional[str]:
+    # helper exceptions are also raised by wrapper itself (f.e. for missing page), then plain message is passed,
+    # APICaller passes message it already decoded so response body isn't decoded again
+    if message is not None or isinstance(response, str):
+        return message or response
+    try:
+        return json_backend.loads(response.content).get('message', None)
+    except (ValueError, AttributeError):
+        return None
+
+
 class AuthorizationError(Exception):
     """
     Base for all exceptions raised because of auth problems
@@ -37,23 +49,29 @@ class MainAuthRequiredError(AuthorizationError):
 # Those are helper classes to simplify catching exceptions
 class BadRequest(APIException):
     """HTTP 400 Bad Request exception"""
-    def __init__(self, response):
-        super().__init__("400 Bad Request", json.loads(response.text).get('message', None), response)
+    def __init__(self, response, message: Optional[str] = None):
+        super().__init__("400 Bad Request", _error_message(response, message), response)
 
 
 class Unauthorized(APIException):
     """HTTP 401 Unauthorized exception"""
-    def __init__(self, response):
-        super().__init__("401 Unauthorized", json.loads(response.text).get('message', None), response)
+    def __init__(self, response, message: Optional[str] = None):
+        super().__init__("401 Unauthorized", _error_message(response, message), response)
 
 
 class Forbidden(APIException):
     """HTTP 403 Forbidden exception"""
-    def __init__(self, response):
-        super().__init__("403 Forbidden", json.loads(response.text).get('message', None), response)
+    def __init__(self, response, message: Optional[str] = None):
+        super().__init__("403 Forbidden", _error_message(response, message), response)
 
 
 class NotFound(APIException):
     """HTTP 404 Not Found exception"""
-    def __init__(self, response):
-        super().__init__("404 Not Found", json.loads(response.text).get('message', None), response)
+    def __init__(self, response, message: Optional[str] = None):
+        super().__init__("404 Not Found", _error_message(response, message), response)
+
+
+class TooManyRequests(APIException):
+    """HTTP 429 Too Many Requests exception, raised when request was still throttled after all retries"""
+    def __init__(self, response, message: Optional[str] = None):
+        super().__init__("429 Too Many Requests", _error_message(response, message), response)
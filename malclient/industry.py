@@ -1,8 +1,9 @@
 from __future__ import annotations
-from typing import Optional, Literal, Union
+from typing import Optional, Literal, Union, Iterable
 
 from .Datamodels import Fields, Person, PersonFields
-from .exceptions import MainAuthRequiredError
+from .exceptions import MainAuthRequiredError, NotFound, Forbidden
+from .batch import BatchResult
 
 __all__ = ["Industry"]
 
@@ -11,17 +12,34 @@ class Industry:
     def __init__(self):
         return
 
-    def get_person_details(self, person_id, *, fields: PersonFields = PersonFields()):
+    def get_person_details(self, person_id, *, fields: PersonFields = PersonFields(), validate: Optional[bool] = None):
         """
         Get full info about person with provided id
 
         :param int person_id: id on https://myanimelist.net
         :param Fields fields: Fields returned alongside results
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :returns: PersonObject for requested id
         :rtype: PersonObject
         """
         uri = f'people/{str(person_id)}'
         params = {'fields': fields.to_payload()}
-        data = self._api_handler.call(uri, params=params)
-        return Person(**data)
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: Person(**data))
+
+    def get_person_details_many(self, person_ids: Iterable[int], *, fields: PersonFields = PersonFields(), concurrency: int = 8,
+                                as_completed: bool = False, ignore_errors: tuple = (NotFound, Forbidden)) -> BatchResult[Person]:
+        """
+        Get info about multiple people concurrently
+
+        :param Iterable[int] person_ids: ids on https://myanimelist.net
+        :param Fields fields: Fields returned alongside results
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :param bool as_completed: If set to True, iterator of (person_id, result) pairs is returned in order of completion
+        :param tuple ignore_errors: Exception types collected per id (available in `errors` of result) instead of aborting whole batch
+
+        :returns: Persons in order of person_ids, None for entries that failed
+        :rtype: BatchResult[Person]
+        """
+        return self._fetch_many(lambda person_id: self.get_person_details(person_id, fields=fields), person_ids,
+                                concurrency=concurrency, ignore_errors=ignore_errors, as_completed=as_completed)
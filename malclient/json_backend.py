@@ -0,0 +1,64 @@
+import json
+from typing import Callable, Union
+
+__all__ = ['loads', 'dumps', 'backend', 'use_backend', 'BACKENDS']
+
+# Preferred order of decoders, first installed one is used, stdlib is always available
+BACKENDS = ('orjson', 'ujson', 'json')
+
+backend: str = 'json'
+_loads: Callable[[Union[bytes, str]], object] = json.loads
+_dumps: Callable[[object], str] = json.dumps
+
+
+def _load(name: str):
+    if name == 'orjson':
+        import orjson
+        return orjson.loads, lambda obj: orjson.dumps(obj).decode()
+    if name == 'ujson':
+        import ujson
+        return ujson.loads, lambda obj: ujson.dumps(obj, ensure_ascii=False)
+    if name == 'json':
+        return json.loads, json.dumps
+    raise ValueError(f"Unknown json backend '{name}', available: {', '.join(BACKENDS)}")
+
+
+def use_backend(name: str = None) -> str:
+    """
+    Selects library used to decode and encode json, called on import with first installed one of BACKENDS
+
+    :param str name: [Optional] One of BACKENDS, if omitted first installed one is used
+    :returns: Name of selected backend
+    :rtype: str
+    :raises ImportError: If requested library is not installed
+    """
+    global backend, _loads, _dumps
+    for candidate in (name,) if name else BACKENDS:
+        try:
+            _loads, _dumps = _load(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+        backend = candidate
+        break
+    return backend
+
+
+def loads(data: Union[bytes, str]):
+    """
+    Decodes json document, bytes are decoded directly without creating intermediate str
+
+    :param data: Raw response body
+    """
+    return _loads(data)
+
+
+def dumps(obj) -> str:
+    """
+    Encodes object as json document
+    """
+    return _dumps(obj)
+
+
+use_backend()
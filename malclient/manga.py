@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Union
+from typing import Union, Optional, Iterable
 
-from .Datamodels import MangaObject, Node, Fields, PagedResult, MangaRankingType
+from .Datamodels import MangaObject, Node, Fields, PagedResult, MangaRankingType, project_model
+from .exceptions import NotFound, Forbidden
+from .batch import BatchResult, offset_windows, stitch_pages
 
 __all__ = ["Manga"]
 
@@ -11,7 +13,7 @@ class Manga:
     def __init__(self):
         return
 
-    def search_manga(self, keyword: str, fields: Fields = Fields.node(), limit: int = 20, offset: int = 0, nsfw: bool = None) -> list[Node]:
+    def search_manga(self, keyword: str, fields: Fields = Fields.node(), limit: int = 20, offset: int = 0, nsfw: bool = None, *, validate: Optional[bool] = None) -> list[Node]:
         """
         Lookup manga with keyword phrase on https://myanimelist.net
 
@@ -20,6 +22,7 @@ class Manga:
         :param int limit: number of queries returned
         :param int offset: Position from which search results will be presented
         :param nsfw: boolean enabling/disabling nsfw filter
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :returns: list of queries matching search keyword
         :rtype: PagedResult
@@ -34,41 +37,61 @@ class Manga:
             "fields": fields.to_payload(),
             'nsfw': nsfw
         }
-        temp = self._api_handler.call(uri, params=params)
         r_class = Node if fields == Fields.node() else MangaObject
-        return PagedResult([r_class(**manga) for manga in temp["data"]], temp['paging'])
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([r_class(**manga) for manga in temp["data"]], temp['paging']))
 
-    def get_manga_details(self, manga_id: int):
+    def get_manga_details(self, manga_id: int, *, validate: Optional[bool] = None):
         """
         Get full info about manga with provided id
 
         :param int manga_id: id on https://myanimelist.net
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :returns: MangaObject for requested id
         :rtype: MangaObject
         """
         uri = f'manga/{manga_id}'
         params = {"fields": Fields.manga().to_payload()}
-        data = self._api_handler.call(uri, params=params)
-        return MangaObject(**data)
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: MangaObject(**data))
 
-    def get_manga_fields(self, manga_id: int, fields: Fields) -> MangaObject:
+    def get_manga_fields(self, manga_id: int, fields: Fields, *, validate: Optional[bool] = None, project: bool = False) -> MangaObject:
         """
 
         Get specific fields from MAL manga entry with provided id
 
         :param int manga_id: id on https://myanimelist.net
         :param Fields fields: Fields that will be returned with manga object
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool project: If set to True, narrow model containing only requested fields is returned (see project_model),
+            model class is generated once per fields combination
 
         :returns: MangaObject for requested id
         :rtype: MangaObject
         """
-        uri = f'anime/{manga_id}'
+        uri = f'manga/{manga_id}'
         params = {'fields': fields.to_payload()}
-        data = self._api_handler.call(uri, params=params)
-        return MangaObject(**data)
+        r_class = project_model(MangaObject, fields) if project else MangaObject
+        return self._call(uri=uri, params=params, validate=validate, build=lambda data: r_class(**data))
+
+    def get_manga_details_many(self, manga_ids: Iterable[int], *, fields: Optional[Fields] = None, concurrency: int = 8,
+                               as_completed: bool = False, ignore_errors: tuple = (NotFound, Forbidden)) -> BatchResult[MangaObject]:
+        """
+        Get info about multiple manga, requests are executed concurrently since API has no batch endpoint
+
+        :param Iterable[int] manga_ids: ids on https://myanimelist.net
+        :param Fields fields: [Optional] Fields returned alongside results, full manga fields by default
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :param bool as_completed: If set to True, iterator of (manga_id, result) pairs is returned in order of completion
+        :param tuple ignore_errors: Exception types collected per id (available in `errors` of result) instead of aborting whole batch
+
+        :returns: MangaObjects in order of manga_ids, None for entries that failed
+        :rtype: BatchResult[MangaObject]
+        """
+        function = self.get_manga_details if fields is None else lambda manga_id: self.get_manga_fields(manga_id, fields)
+        return self._fetch_many(function, manga_ids, concurrency=concurrency, ignore_errors=ignore_errors, as_completed=as_completed)
 
-    def get_manga_ranking(self, ranking_type: Union[str, MangaRankingType] = MangaRankingType.MANGA, fields: Fields = Fields.manga(), limit: int = 20, offset: int = 0) -> Union[PagedResult[Node], PagedResult[MangaObject]]:
+    def get_manga_ranking(self, ranking_type: Union[str, MangaRankingType] = MangaRankingType.MANGA, fields: Fields = Fields.manga(), limit: int = 20, offset: int = 0, *, validate: Optional[bool] = None) -> Union[PagedResult[Node], PagedResult[MangaObject]]:
         """
 
         Get current manga ranking from MAL
@@ -77,6 +100,7 @@ class Manga:
         :param Fields fields: Fields that will be returned additionally with manga data
         :param int limit: number of queries returned
         :param int offset: Position from which search results will be presented
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
 
         :returns: List of queries with pagination support
         :rtype: PagedResult
@@ -95,6 +119,24 @@ class Manga:
             "fields": fields.to_payload(),
             'offset': offset,
         }
-        temp = self._api_handler.call(uri, params=params)
         r_class = Node if fields == Fields.node() else MangaObject
-        return PagedResult([r_class(**manga) for manga in temp["data"]], temp['paging'])
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([r_class(**manga) for manga in temp["data"]], temp['paging']))
+
+    def crawl_manga_ranking(self, total: int, *, ranking_type: Union[str, MangaRankingType] = MangaRankingType.MANGA, fields: Fields = Fields.manga(),
+                            page_size: int = 500, concurrency: int = 4) -> Union[PagedResult[Node], PagedResult[MangaObject]]:
+        """
+        Fetches first `total` entries of manga ranking, instead of following paging links one by one
+        all pages are requested concurrently with precomputed offsets
+
+        :param int total: Number of ranking entries to fetch
+        :param MangaRankingType ranking_type: type of manga ranking that will be fetched from API
+        :param Fields fields: Fields that will be returned additionally with manga data
+        :param int page_size: Number of entries fetched by single request, 500 (maximum allowed by API) by default
+        :param int concurrency: Maximum number of requests in flight, all of them still go through client rate limiter
+        :returns: Entries in listing order, without duplicates if listing changed during crawl (see CrawlResult.shifted)
+        :rtype: CrawlResult
+        """
+        windows = offset_windows(total, page_size)
+        return self._fetch_many(lambda window: self.get_manga_ranking(ranking_type=ranking_type, fields=fields, offset=window[0], limit=window[1]),
+                                windows, concurrency=concurrency, ignore_errors=(NotFound,), build=lambda pages: stitch_pages(pages, windows))
@@ -0,0 +1,392 @@
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import time
+from enum import Enum
+from typing import Iterable, Optional
+
+from pydantic.json import pydantic_encoder
+
+from . import json_backend
+from .Datamodels import AnimeObject, MangaObject, Character, Person, MyAnimeListStatus, MyMangaListStatus, trusted_construction
+from .sqlite_connections import ThreadLocalConnections
+from .sync import ListStore
+
+__all__ = ['SQLiteMirror']
+
+_MODELS = {'anime': AnimeObject, 'manga': MangaObject}
+_STATUS_MODELS = {'anime': MyAnimeListStatus, 'manga': MyMangaListStatus}
+# normalized columns of entries table, full entry is kept as JSON in data column
+_ENTRY_COLUMNS = ('title', 'mean', 'rank', 'popularity', 'num_list_users', 'media_type', 'status', 'nsfw', 'start_date', 'updated_at')
+_ORDER_COLUMNS = frozenset(('id', 'title', 'mean', 'rank', 'popularity', 'num_list_users', 'start_date', 'updated_at'))
+# fields describing entry in context of single listing, they aren't part of entry itself
+_LISTING_FIELDS = {'list_status', 'ranking'}
+
+
+class SQLiteMirror(ListStore):
+    """
+    Local mirror of MAL data in SQLite database (WAL mode), models are stored in normalized, indexed tables
+    (entries, genres, studios, relations, recommendations, characters, people and list status per user)
+    together with JSON of whole model, so queries return the same model classes as API without validation
+
+    Entries stored repeatedly are merged, so entry fetched with narrow fields (f.e. from user list) doesn't
+    erase fields stored from details endpoint. Mirror is also ListStore, so it can be target of `sync_user_anime_list`
+
+    :ivar str path: Path to database file
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            media TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            title TEXT,
+            mean REAL,
+            rank INTEGER,
+            popularity INTEGER,
+            num_list_users INTEGER,
+            media_type TEXT,
+            status TEXT,
+            nsfw TEXT,
+            start_date TEXT,
+            updated_at TEXT,
+            data TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            PRIMARY KEY (media, id)
+        );
+        CREATE INDEX IF NOT EXISTS entries_rank ON entries (media, rank);
+        CREATE INDEX IF NOT EXISTS entries_popularity ON entries (media, popularity);
+        CREATE TABLE IF NOT EXISTS genres (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entry_genres (
+            media TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            genre_id INTEGER NOT NULL,
+            PRIMARY KEY (media, entry_id, genre_id)
+        );
+        CREATE INDEX IF NOT EXISTS entry_genres_genre ON entry_genres (genre_id, media);
+        CREATE TABLE IF NOT EXISTS studios (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS anime_studios (
+            anime_id INTEGER NOT NULL,
+            studio_id INTEGER NOT NULL,
+            PRIMARY KEY (anime_id, studio_id)
+        );
+        CREATE INDEX IF NOT EXISTS anime_studios_studio ON anime_studios (studio_id);
+        CREATE TABLE IF NOT EXISTS relations (
+            media TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            related_media TEXT NOT NULL,
+            related_id INTEGER NOT NULL,
+            relation_type TEXT NOT NULL,
+            PRIMARY KEY (media, entry_id, related_media, related_id)
+        );
+        CREATE INDEX IF NOT EXISTS relations_related ON relations (related_media, related_id);
+        CREATE TABLE IF NOT EXISTS recommendations (
+            media TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            recommended_id INTEGER NOT NULL,
+            num_recommendations INTEGER NOT NULL,
+            PRIMARY KEY (media, entry_id, recommended_id)
+        );
+        CREATE TABLE IF NOT EXISTS characters (
+            id INTEGER PRIMARY KEY,
+            first_name TEXT,
+            last_name TEXT,
+            num_favorites INTEGER,
+            data TEXT NOT NULL,
+            stored_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS people (
+            id INTEGER PRIMARY KEY,
+            first_name TEXT,
+            last_name TEXT,
+            num_favorites INTEGER,
+            data TEXT NOT NULL,
+            stored_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS list_status (
+            username TEXT NOT NULL,
+            media TEXT NOT NULL,
+            entry_id INTEGER NOT NULL,
+            status TEXT,
+            score INTEGER,
+            updated_at TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (username, media, entry_id)
+        );
+        CREATE INDEX IF NOT EXISTS list_status_status ON list_status (username, media, status);
+        CREATE TABLE IF NOT EXISTS list_watermarks (
+            username TEXT NOT NULL,
+            media TEXT NOT NULL,
+            watermark TEXT,
+            PRIMARY KEY (username, media)
+        );
+    """
+
+    def __init__(self, path: str = "malclient_mirror.sqlite", *, timeout: float = 30.0):
+        self.path = os.fspath(path)
+        self._connections = ThreadLocalConnections(self.path, timeout=timeout)
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        """Closes database connection opened by current thread"""
+        self._connections.close()
+
+    # writing
+
+    def upsert_anime(self, entries: Iterable) -> int:
+        """
+        Stores anime (f.e. PagedResult of AnimeObject, records or lazy models), fields missing in new entry are kept from stored one
+
+        :returns: Number of stored entries
+        :rtype: int
+        """
+        with self._transaction() as connection:
+            return sum(1 for entry in entries if self._upsert_entry(connection, 'anime', entry) is not None)
+
+    def upsert_manga(self, entries: Iterable) -> int:
+        """
+        Same as upsert_anime for manga
+        """
+        with self._transaction() as connection:
+            return sum(1 for entry in entries if self._upsert_entry(connection, 'manga', entry) is not None)
+
+    def upsert_characters(self, characters: Iterable[Character]) -> int:
+        """
+        Stores characters, fields missing in new object are kept from stored one
+        """
+        with self._transaction() as connection:
+            return sum(1 for character in characters if self._upsert_person(connection, 'characters', character) is not None)
+
+    def upsert_people(self, people: Iterable[Person]) -> int:
+        """
+        Stores people, fields missing in new object are kept from stored one
+        """
+        with self._transaction() as connection:
+            return sum(1 for person in people if self._upsert_person(connection, 'people', person) is not None)
+
+    def _upsert_entry(self, connection: sqlite3.Connection, media: str, entry):
+        model = _model(entry)
+        data = _merged(connection, "SELECT data FROM entries WHERE media = ? AND id = ?", (media, model.id),
+                       model.dict(exclude_none=True, exclude=_LISTING_FIELDS))
+        connection.execute(
+            f"INSERT OR REPLACE INTO entries (media, id, {', '.join(_ENTRY_COLUMNS)}, data, stored_at) "
+            f"VALUES (?, ?, {', '.join('?' * len(_ENTRY_COLUMNS))}, ?, ?)",
+            (media, model.id, *(_column(data.get(name)) for name in _ENTRY_COLUMNS), _dumps(data), time.time()))
+        # narrow models (f.e. Node pages, records or projections) don't have all of these fields
+        genres, studios = getattr(model, 'genres', None), getattr(model, 'studios', None)
+        recommendations = getattr(model, 'recommendations', None)
+        if genres is not None:
+            connection.execute("DELETE FROM entry_genres WHERE media = ? AND entry_id = ?", (media, model.id))
+            connection.executemany("INSERT OR REPLACE INTO genres (id, name) VALUES (?, ?)", [(genre.id, genre.name) for genre in genres])
+            connection.executemany("INSERT OR IGNORE INTO entry_genres (media, entry_id, genre_id) VALUES (?, ?, ?)",
+                                   [(media, model.id, genre.id) for genre in genres])
+        if media == 'anime' and studios is not None:
+            connection.execute("DELETE FROM anime_studios WHERE anime_id = ?", (model.id,))
+            connection.executemany("INSERT OR REPLACE INTO studios (id, name) VALUES (?, ?)", [(studio.id, studio.name) for studio in studios])
+            connection.executemany("INSERT OR IGNORE INTO anime_studios (anime_id, studio_id) VALUES (?, ?)",
+                                   [(model.id, studio.id) for studio in studios])
+        for related_media, relations in (('anime', getattr(model, 'related_anime', None)), ('manga', getattr(model, 'related_manga', None))):
+            if relations is not None:
+                connection.execute("DELETE FROM relations WHERE media = ? AND entry_id = ? AND related_media = ?", (media, model.id, related_media))
+                connection.executemany(
+                    "INSERT OR REPLACE INTO relations (media, entry_id, related_media, related_id, relation_type) VALUES (?, ?, ?, ?, ?)",
+                    [(media, model.id, related_media, relation.node.id, relation.relation_type) for relation in relations])
+        if recommendations is not None:
+            connection.execute("DELETE FROM recommendations WHERE media = ? AND entry_id = ?", (media, model.id))
+            connection.executemany(
+                "INSERT OR REPLACE INTO recommendations (media, entry_id, recommended_id, num_recommendations) VALUES (?, ?, ?, ?)",
+                [(media, model.id, recommendation.node.id, recommendation.num_recommendations) for recommendation in recommendations])
+        return model
+
+    def _upsert_person(self, connection: sqlite3.Connection, table: str, person):
+        data = _merged(connection, f"SELECT data FROM {table} WHERE id = ?", (person.id,), person.dict(exclude_none=True))
+        connection.execute(f"INSERT OR REPLACE INTO {table} (id, first_name, last_name, num_favorites, data, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                           (person.id, data.get('first_name'), data.get('last_name'), data.get('num_favorites'), _dumps(data), time.time()))
+        return person
+
+    # reading
+
+    def get_anime(self, anime_id: int) -> Optional[AnimeObject]:
+        """
+        :returns: Stored anime, None if it isn't mirrored
+        :rtype: AnimeObject
+        """
+        return self._get('anime', anime_id)
+
+    def get_manga(self, manga_id: int) -> Optional[MangaObject]:
+        """
+        :returns: Stored manga, None if it isn't mirrored
+        :rtype: MangaObject
+        """
+        return self._get('manga', manga_id)
+
+    def get_character(self, character_id: int) -> Optional[Character]:
+        row = self._connection().execute("SELECT data FROM characters WHERE id = ?", (character_id,)).fetchone()
+        return _build(Character, json_backend.loads(row[0])) if row else None
+
+    def get_person(self, person_id: int) -> Optional[Person]:
+        row = self._connection().execute("SELECT data FROM people WHERE id = ?", (person_id,)).fetchone()
+        return _build(Person, json_backend.loads(row[0])) if row else None
+
+    def _get(self, media: str, entry_id: int):
+        row = self._connection().execute("SELECT data FROM entries WHERE media = ? AND id = ?", (media, entry_id)).fetchone()
+        return _build(_MODELS[media], json_backend.loads(row[0])) if row else None
+
+    def query(self, media: str = 'anime', *, genre: Optional[int] = None, studio: Optional[int] = None,
+              media_type: Optional[str] = None, status: Optional[str] = None,
+              order_by: str = 'rank', descending: bool = False, limit: Optional[int] = None) -> list:
+        """
+        Finds stored entries matching all provided filters
+
+        :param str media: Either 'anime' or 'manga'
+        :param int genre: [Optional] Id of genre
+        :param int studio: [Optional] Id of studio, anime only
+        :param media_type: [Optional] Media type, f.e. AnimeType.TV or 'tv'
+        :param status: [Optional] Airing/publishing status, f.e. AnimeStatus.AIRING
+        :param str order_by: Column by which entries are sorted, one of id, title, mean, rank, popularity, num_list_users, start_date, updated_at
+        :param bool descending: If set to True, entries are sorted in descending order
+        :param int limit: [Optional] Maximum number of returned entries
+        :returns: List of AnimeObject or MangaObject, entries without value of sorting column are last
+        """
+        if order_by not in _ORDER_COLUMNS:
+            raise ValueError(f"Can't order by '{order_by}', available: {', '.join(sorted(_ORDER_COLUMNS))}")
+        conditions, params = ["entries.media = ?"], [media]
+        if genre is not None:
+            conditions.append("EXISTS (SELECT 1 FROM entry_genres WHERE media = entries.media AND entry_id = entries.id AND genre_id = ?)")
+            params.append(genre)
+        if studio is not None:
+            conditions.append("EXISTS (SELECT 1 FROM anime_studios WHERE anime_id = entries.id AND studio_id = ?)")
+            params.append(studio)
+        for column, value in (('media_type', media_type), ('status', status)):
+            if value is not None:
+                conditions.append(f"entries.{column} = ?")
+                params.append(_column(value))
+        sql = (f"SELECT data FROM entries WHERE {' AND '.join(conditions)} "
+               f"ORDER BY {order_by} IS NULL, {order_by} {'DESC' if descending else 'ASC'}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        model = _MODELS[media]
+        return [_build(model, json_backend.loads(row[0])) for row in self._connection().execute(sql, params)]
+
+    def related(self, media: str, entry_id: int) -> list[tuple[str, object]]:
+        """
+        :returns: Pairs of relation type and related entry (only entries which are mirrored), f.e. [('sequel', AnimeObject)]
+        """
+        rows = self._connection().execute(
+            "SELECT relations.relation_type, entries.media, entries.data FROM relations JOIN entries "
+            "ON entries.media = relations.related_media AND entries.id = relations.related_id "
+            "WHERE relations.media = ? AND relations.entry_id = ?", (media, entry_id))
+        return [(relation_type, _build(_MODELS[related_media], json_backend.loads(data))) for relation_type, related_media, data in rows]
+
+    def recommendations(self, media: str, entry_id: int) -> list[tuple[int, object]]:
+        """
+        :returns: Pairs of number of recommendations and recommended entry (only entries which are mirrored), most recommended first
+        """
+        rows = self._connection().execute(
+            "SELECT recommendations.num_recommendations, entries.data FROM recommendations JOIN entries "
+            "ON entries.media = recommendations.media AND entries.id = recommendations.recommended_id "
+            "WHERE recommendations.media = ? AND recommendations.entry_id = ? ORDER BY recommendations.num_recommendations DESC",
+            (media, entry_id))
+        return [(count, _build(_MODELS[media], json_backend.loads(data))) for count, data in rows]
+
+    def get_list_status(self, username: str, media: str, entry_id: int):
+        """
+        :returns: Stored list status of entry on list of user, None if entry isn't on list
+        :rtype: MyAnimeListStatus or MyMangaListStatus
+        """
+        row = self._connection().execute("SELECT data FROM list_status WHERE username = ? AND media = ? AND entry_id = ?",
+                                         (username, media, entry_id)).fetchone()
+        return _build(_STATUS_MODELS[media], json_backend.loads(row[0])) if row else None
+
+    # ListStore
+
+    def watermark(self, username: str, media: str) -> Optional[datetime.datetime]:
+        row = self._connection().execute("SELECT watermark FROM list_watermarks WHERE username = ? AND media = ?", (username, media)).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def set_watermark(self, username: str, media: str, watermark: Optional[datetime.datetime]):
+        self._connection().execute("INSERT OR REPLACE INTO list_watermarks (username, media, watermark) VALUES (?, ?, ?)",
+                                   (username, media, watermark.isoformat() if watermark else None))
+
+    def upsert(self, username: str, media: str, entries: list):
+        with self._transaction() as connection:
+            self._upsert_list(connection, username, media, entries)
+
+    def replace(self, username: str, media: str, entries: list):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM list_status WHERE username = ? AND media = ?", (username, media))
+            self._upsert_list(connection, username, media, entries)
+
+    def _upsert_list(self, connection: sqlite3.Connection, username: str, media: str, entries: list):
+        for entry in entries:
+            model = self._upsert_entry(connection, media, entry)
+            list_status = getattr(model, 'list_status', None)
+            if list_status is None:
+                continue
+            status = list_status.dict(exclude_none=True)
+            connection.execute(
+                "INSERT OR REPLACE INTO list_status (username, media, entry_id, status, score, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, media, model.id, status.get('status'), status.get('score'), _column(status.get('updated_at')), _dumps(status)))
+
+    def entries(self, username: str, media: str) -> list:
+        """
+        :returns: Entries on list of user with list_status set, most recently updated first
+        """
+        rows = self._connection().execute(
+            "SELECT entries.data, list_status.data FROM list_status JOIN entries "
+            "ON entries.media = list_status.media AND entries.id = list_status.entry_id "
+            "WHERE list_status.username = ? AND list_status.media = ? ORDER BY list_status.updated_at DESC", (username, media))
+        model = _MODELS[media]
+        return [_build(model, json_backend.loads(data) | {'list_status': json_backend.loads(status)}) for data, status in rows]
+
+
+def _model(entry):
+    if hasattr(entry, 'to_model'):  # records
+        return entry.to_model()
+    if hasattr(entry, 'materialize'):  # lazy models
+        return entry.materialize()
+    return entry
+
+
+def _build(model: type, data: dict):
+    # stored data was already validated when it was fetched
+    with trusted_construction():
+        return model(**data)
+
+
+def _merged(connection: sqlite3.Connection, sql: str, params: tuple, data: dict) -> dict:
+    row = connection.execute(sql, params).fetchone()
+    return json_backend.loads(row[0]) | data if row else data
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, default=pydantic_encoder, separators=(',', ':'))
+
+
+def _column(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
@@ -1,8 +1,12 @@
 import datetime
-from typing import Union, Literal, Optional
+from typing import Union, Literal, Optional, Iterator, Iterable
 
-from .Datamodels import MyAnimeListSorting, MyMangaListSorting, MyAnimeListStatus, MyMangaListStatus, Fields, UserFields, User, MangaObject, AnimeObject, PagedResult, ListStatusFields
+from .Datamodels import MyAnimeListSorting, MyMangaListSorting, MyAnimeListStatus, MyMangaListStatus, Fields, UserFields, User, MangaObject, AnimeObject, PagedResult, ListStatusFields, AnimeRecord, MangaRecord, \
+    Columns, ANIME_LIST_COLUMNS, MANGA_LIST_COLUMNS
+from .Datamodels.records import from_entry
 from .exceptions import MainAuthRequiredError
+from .sync import ListStore, ListSync, SyncResult
+from .write_behind import WriteBehindQueue
 
 __all__ = ["MyList"]
 
@@ -51,8 +55,8 @@ class MyList:
                 raise ValueError("Score must be in range 1 - 10")
         data = {
             'status': status,
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'finish_date': finish_date.strftime('%Y-%m-%d'),
+            'start_date': start_date.strftime('%Y-%m-%d') if start_date else None,
+            'finish_date': finish_date.strftime('%Y-%m-%d') if finish_date else None,
             'is_rewatching': is_rewatching,
             'score': score,
             'num_watched_episodes': num_watched_episodes,
@@ -63,7 +67,17 @@ class MyList:
             'comments': comments
         }
         uri = f'anime/{anime_id}/my_list_status'
-        return MyAnimeListStatus(**self._api_handler.call(method="patch", uri=uri, data=data | kwargs))
+        return self._call(method="patch", uri=uri, data=data | kwargs, build=lambda status: MyAnimeListStatus(**status))
+
+    def write_behind(self, **options) -> WriteBehindQueue:
+        """
+        Creates write-behind queue of list status updates sent with this client, repeated updates of the same entry
+        are merged and sent in background, see WriteBehindQueue for options
+
+        :returns: Queue, close it (or use it as context manager) to flush remaining updates
+        :rtype: WriteBehindQueue
+        """
+        return WriteBehindQueue(self, **options)
 
     # need another function for adding manga to list
     def delete_my_anime_list_status(self, anime_id: int):
@@ -75,7 +89,7 @@ class MyList:
         if not self.authorized:
             raise MainAuthRequiredError()
         uri = f'anime/{anime_id}/my_list_status'
-        return self._api_handler.call(method="delete", uri=uri)
+        return self._call(method="delete", uri=uri)
 
     def get_user_anime_list(self, username: str ="@me", *,
                             sort: Union[MyAnimeListSorting, str, None] = None,
@@ -84,7 +98,7 @@ class MyList:
                             offset: int = 0,
                             list_status_fields: ListStatusFields = True,
                             fields: Fields = Fields.from_list(['id', 'title', 'main_picture', 'my_list_status']),
-                            nsfw: bool = None):
+                            nsfw: bool = None, validate: Optional[bool] = None, records: bool = False):
         """
         Fetches anime list for given user
 
@@ -95,12 +109,14 @@ class MyList:
         :params ListStatusFields list_status_fields: Fields returned inside my_list_status field in entry
         :params Fields fields: Fields returned alongside each entry
         :param bool nsfw: If set to True results with nsfw grade 'gray' and 'black' will also be fetched, if omitted it will be inherited from Client class
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool records: If set to True, entries are returned as compact immutable records (AnimeRecord) instead of models
 
         :returns: List of objects containing manga information for entries on users' manga list
         :rtype: PagedResult[AnimeObject]
         """
         uri = f'users/{username}/animelist'
-        fields.list_status = list_status_fields
+        fields = fields.replace(list_status=list_status_fields)
         if not sort:
             sort = MyAnimeListSorting.LIST_SCORE
         elif isinstance(sort, str):
@@ -114,8 +130,68 @@ class MyList:
             "offset": offset,
             "nsfw": nsfw if nsfw is not None else self.nsfw
         }
-        temp = self._api_handler.call(uri=uri, params=params)
-        return PagedResult([AnimeObject(**entry) for entry in temp['data']], temp['paging']) if len(temp['data']) != 0 else None
+        r_class = AnimeRecord if records else AnimeObject
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([from_entry(r_class, entry) for entry in temp['data']], temp['paging']) if len(temp['data']) != 0 else None)
+
+    def iter_user_anime_list(self, username: str = "@me", *, max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Iterator[AnimeObject]:
+        """
+        Iterates over whole anime list of given user, following pages are fetched as iteration goes
+
+        :params str username: Name of user whose list will be fetched
+        :param int max_items: [Optional] Maximum number of entries to yield, pages beyond it are not fetched
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_user_anime_list, `limit` sets page size
+        :returns: Lazy iterator over entries (async iterator for AsyncClient)
+        :rtype: Iterator[AnimeObject]
+        """
+        kwargs.setdefault('limit', 1000)
+        return self._iterate(lambda: self.get_user_anime_list(username, **kwargs), max_items=max_items, prefetch=prefetch)
+
+    def sync_user_anime_list(self, username: str = "@me", *, store: ListStore, full: bool = False,
+                           page_size: int = 1000, delta_page_size: int = 100, **kwargs) -> SyncResult:
+        """
+        Synchronises anime list of given user into local store, first run downloads whole list, following runs fetch
+        list sorted by update time only until entries older than previous run are reached and apply just them,
+        so refreshing list usually takes single request
+
+        Entries removed from list on MAL are dropped from store only by full synchronisation, run it with `full=True` from time to time
+
+        :params str username: Name of user whose list will be synchronised
+        :param ListStore store: Local copy of lists, f.e. MemoryListStore
+        :param bool full: If set to True, whole list is downloaded and replaces stored one
+        :param int page_size: Number of entries fetched per request during full synchronisation
+        :param int delta_page_size: Number of entries fetched per request during incremental synchronisation
+        :param kwargs: Any other parameters accepted by get_user_anime_list (f.e. fields, records), `sort` is always by update time
+            and list status (at least its update time) is always requested
+        :returns: Summary of synchronisation (awaitable for AsyncClient)
+        :rtype: SyncResult
+        """
+        sync = ListSync(store, username, 'anime', full=full)
+        _sync_fields(kwargs)
+        kwargs.update(sort=MyAnimeListSorting.LAST_UPDATE, limit=page_size if sync.full else delta_page_size)
+        return self._run_sync(lambda: self.get_user_anime_list(username, **kwargs), sync)
+
+    def get_user_anime_list_columns(self, username: str = "@me", *, columns: Iterable[str] = ANIME_LIST_COLUMNS, as_numpy: bool = False,
+                                    max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Columns:
+        """
+        Fetches whole anime list of given user as columns of values, entries are read as compact records
+        and discarded page by page, so no models are built for rows
+
+        :params str username: Name of user whose list will be fetched
+        :param columns: Names of columns, nested values are accessed with dots, f.e. 'list_status.score',
+            only fields of records (AnimeRecord/MangaRecord) are available, fields needed by columns are requested automatically
+        :param bool as_numpy: If set to True, columns are returned as typed numpy arrays (see malclient.to_numpy), requires numpy
+        :param int max_items: [Optional] Maximum number of entries to fetch
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_user_anime_list
+        :returns: Values of columns (awaitable for AsyncClient)
+        :rtype: Columns
+        """
+        kwargs.setdefault('fields', _columns_fields(columns))
+        kwargs.setdefault('limit', 1000)
+        entries = self._iterate(lambda: self.get_user_anime_list(username, records=True, **kwargs), max_items=max_items, prefetch=prefetch)
+        return self._collect_columns(entries, columns, as_numpy=as_numpy)
 
     def get_user_info(self, user_id: Union[str, int] = "@me", fields: UserFields = UserFields.basic()):
         """
@@ -130,7 +206,7 @@ class MyList:
             raise MainAuthRequiredError()
         uri = f'users/{user_id}'
         params = {"fields": fields.to_payload()}
-        return User(**self._api_handler.call(uri, params=params))
+        return self._call(uri=uri, params=params, build=lambda data: User(**data))
 
     def update_my_manga_list_status(self, manga_id, *,
                                     status: Optional[Literal["reading", "completed", "on_hold", "dropped", "plan_to_read"]] = None,
@@ -171,8 +247,8 @@ class MyList:
         uri = f'manga/{manga_id}/my_list_status'
         data = {
             'status': status,
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'finish_date': finish_date.strftime('%Y-%m-%d'),
+            'start_date': start_date.strftime('%Y-%m-%d') if start_date else None,
+            'finish_date': finish_date.strftime('%Y-%m-%d') if finish_date else None,
             'is_rereading': is_rereading,
             'score': score,
             'num_volumes_read': num_volumes_read,
@@ -183,7 +259,7 @@ class MyList:
             'tags': tags,
             'comments': comments
         }
-        return MyMangaListStatus(**self._api_handler.call(method="patch", uri=uri, data=data | kwargs))
+        return self._call(method="patch", uri=uri, data=data | kwargs, build=lambda status: MyMangaListStatus(**status))
 
     def delete_my_manga_list_status(self, manga_id: int):
         """
@@ -194,7 +270,7 @@ class MyList:
         if not self.authorized:
             raise MainAuthRequiredError()
         uri = f'manga/{manga_id}/my_list_status'
-        return self._api_handler.call(method="delete", uri=uri)
+        return self._call(method="delete", uri=uri)
 
     def get_user_manga_list(self, username: str ="@me", *,
                             sort: Union[MyMangaListSorting, str] = MyMangaListSorting.LIST_SCORE,
@@ -203,7 +279,7 @@ class MyList:
                             offset: int = 0,
                             list_status_fields: ListStatusFields = True,
                             fields: Fields = Fields.from_list(['id', 'title', 'main_picture']),
-                            nsfw: bool = None):
+                            nsfw: bool = None, validate: Optional[bool] = None, records: bool = False):
         """
         Fetches manga list for given user
 
@@ -214,12 +290,14 @@ class MyList:
         :params ListStatusFields list_status_fields: Fields returned inside my_list_status field in entry
         :params Fields fields: Fields returned alongside each entry
         :param bool nsfw: If set to True results with nsfw grade 'gray' and 'black' will also be fetched, if omitted it will be inherited from Client class
+        :param bool validate: [Optional] If set to False, response is converted to models without validation, client setting is used if omitted
+        :param bool records: If set to True, entries are returned as compact immutable records (MangaRecord) instead of models
 
         :returns: List of objects containing manga information for entries on users manga list
         :rtype: PagedResult[MangaObject]
         """
         uri = f'users/{username}/mangalist'
-        fields.my_list_status = list_status_fields
+        fields = fields.replace(my_list_status=list_status_fields)
         if isinstance(sort, str):
             sort = MyMangaListSorting(sort.lower())
         params = {
@@ -230,5 +308,63 @@ class MyList:
             "offset": offset,
             "nfsw": nsfw if nsfw is not None else self.nsfw
         }
-        temp = self._api_handler.call(uri=uri, params=params)
-        return PagedResult([MangaObject(**entry) for entry in temp['data']], temp['paging']) if len(temp['data']) != 0 else None
\ No newline at end of file
+        r_class = MangaRecord if records else MangaObject
+        return self._call(uri=uri, params=params, validate=validate,
+                          build=lambda temp: PagedResult([from_entry(r_class, entry) for entry in temp['data']], temp['paging']) if len(temp['data']) != 0 else None)
+
+    def get_user_manga_list_columns(self, username: str = "@me", *, columns: Iterable[str] = MANGA_LIST_COLUMNS, as_numpy: bool = False,
+                                    max_items: Optional[int] = None, prefetch: int = 1, **kwargs) -> Columns:
+        """
+        Fetches whole manga list of given user as columns of values, same as get_user_anime_list_columns
+
+        :params str username: Name of user whose list will be fetched
+        :param columns: Names of columns, nested values are accessed with dots, f.e. 'list_status.score',
+            only fields of records (AnimeRecord/MangaRecord) are available, fields needed by columns are requested automatically
+        :param bool as_numpy: If set to True, columns are returned as typed numpy arrays (see malclient.to_numpy), requires numpy
+        :param int max_items: [Optional] Maximum number of entries to fetch
+        :param int prefetch: Number of pages fetched ahead in background while entries are processed
+        :param kwargs: Any other parameters accepted by get_user_manga_list
+        :returns: Values of columns (awaitable for AsyncClient)
+        :rtype: Columns
+        """
+        kwargs.setdefault('fields', _columns_fields(columns))
+        kwargs.setdefault('limit', 1000)
+        entries = self._iterate(lambda: self.get_user_manga_list(username, records=True, **kwargs), max_items=max_items, prefetch=prefetch)
+        return self._collect_columns(entries, columns, as_numpy=as_numpy)
+
+    def sync_user_manga_list(self, username: str = "@me", *, store: ListStore, full: bool = False,
+                           page_size: int = 1000, delta_page_size: int = 100, **kwargs) -> SyncResult:
+        """
+        Synchronises manga list of given user into local store, first run downloads whole list, following runs fetch
+        list sorted by update time only until entries older than previous run are reached and apply just them,
+        so refreshing list usually takes single request
+
+        Entries removed from list on MAL are dropped from store only by full synchronisation, run it with `full=True` from time to time
+
+        :params str username: Name of user whose list will be synchronised
+        :param ListStore store: Local copy of lists, f.e. MemoryListStore
+        :param bool full: If set to True, whole list is downloaded and replaces stored one
+        :param int page_size: Number of entries fetched per request during full synchronisation
+        :param int delta_page_size: Number of entries fetched per request during incremental synchronisation
+        :param kwargs: Any other parameters accepted by get_user_manga_list (f.e. fields, records), `sort` is always by update time
+            and list status (at least its update time) is always requested
+        :returns: Summary of synchronisation (awaitable for AsyncClient)
+        :rtype: SyncResult
+        """
+        sync = ListSync(store, username, 'manga', full=full)
+        _sync_fields(kwargs)
+        kwargs.update(sort=MyMangaListSorting.LAST_UPDATE, limit=page_size if sync.full else delta_page_size)
+        return self._run_sync(lambda: self.get_user_manga_list(username, **kwargs), sync)
+
+
+def _sync_fields(kwargs: dict):
+    # update time of list status is needed to find entries changed since previous run, so list status is always requested
+    status = kwargs.get('list_status_fields', True)
+    status = (status if isinstance(status, ListStatusFields) else ListStatusFields()).replace(updated_at=True)
+    fields = kwargs.get('fields', Fields.node())
+    kwargs.update(list_status_fields=status, fields=fields.replace(list_status=status))
+
+
+def _columns_fields(columns: Iterable[str]) -> Fields:
+    # list status is requested separately with list_status_fields
+    return Fields.from_list([column.split('.')[0] for column in columns if not column.startswith('list_status.')])
@@ -0,0 +1,259 @@
+import asyncio
+import contextlib
+import contextvars
+import re
+import threading
+import time
+from typing import Iterable, Optional
+
+from .client import BaseClient, AsyncBaseClient, Client, AsyncClient
+from .request_handler import create_session
+from .rate_limit import RateLimiter, parse_retry_after
+from .exceptions import Forbidden, TooManyRequests, MainAuthRequiredError
+
+__all__ = ['ClientPool', 'AsyncClientPool']
+
+# endpoints returning or modifying data of token owner, they have to be sent with user token
+_USER_SCOPED = re.compile(r'(^|/)@me(/|\?|$)|/my_list_status(\?|$)|^(anime|manga)/suggestions(\?|$)')
+_pinned_user = contextvars.ContextVar('malclient_pool_user', default=None)
+
+
+def _limiter(rate: float, burst: int) -> RateLimiter:
+    # throttled requests aren't retried by member, pool cools member down and sends request through other one
+    return RateLimiter(rate, burst, retry_statuses=(500, 502, 503, 504))
+
+
+class _Member(object):
+    # client of pool together with its load and health
+    __slots__ = ('client', 'inflight', 'cooldown_until', 'last_used')
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.inflight = 0
+        self.cooldown_until = 0.0
+        self.last_used = 0
+
+    def load(self, now: float) -> tuple:
+        cooling = self.cooldown_until > now
+        limiter = self.client.rate_limiter
+        return (cooling, self.cooldown_until if cooling else 0.0,
+                limiter.wait_time() if limiter is not None else 0.0, self.inflight, self.last_used)
+
+
+class ClientPool(BaseClient):
+    """
+    Client spreading requests across multiple credentials (client ids and/or user tokens), every member is regular
+    Client with its own rate limiter, so budget of pool is sum of budgets of its members
+
+    Each request goes to healthy member which would wait least for its rate limiter and has least requests in flight.
+    Member receiving 429 is cooled down (for Retry-After or `cooldown` seconds) and request is sent again through next member,
+    request failing with 403 is sent once more through other member and failed member is cooled down only if it succeeds
+    (403 might be caused by entry itself). Rate limiters of members created with `from_credentials` don't retry 429
+    themselves, so throttled request is moved to other member at once. When every member which may send request is cooled down,
+    request waits for the first of them (at most `max_cooldown_wait` seconds) or TooManyRequests is raised without sending it. User-scoped requests (`@me`, `my_list_status`, `get_suggested_anime`, all writes)
+    are always sent with user token, see `as_user`. Pool has no credentials of its own, tokens are kept and refreshed by members.
+
+    .. code-block:: py
+
+        pool = malclient.ClientPool.from_credentials([{"client_id": id} for id in client_ids] +
+                                                     [{"client_id": client_ids[0], "access_token": token}], rate=1.0)
+        pool.get_anime_details_many(ids, concurrency=16)
+
+    :ivar list[Client] clients: Members of pool
+    :ivar Client user: Member whose token is used for user-scoped requests, first authorized member if omitted
+    :ivar float cooldown: Number of seconds for which throttled or forbidden member (without Retry-After) isn't used
+    :ivar float max_cooldown_wait: Maximum number of seconds request waits when all members are cooled down
+    :ivar nsfw: If set to True, nsfw entries are returned by default
+    :ivar validate: If set to False, models are built from responses without pydantic validation
+    :ivar lazy: If set to True, endpoints return lazy wrappers of raw data
+    """
+    def __init__(self, clients: Iterable[Client], *, user: Optional[Client] = None, cooldown: float = 60.0,
+                 max_cooldown_wait: float = 0.0, nsfw: bool = False, validate: bool = True, lazy: bool = False):
+        self.clients = list(clients)
+        if not self.clients:
+            raise ValueError("ClientPool requires at least one client")
+        self._members = {id(client): _Member(client) for client in self.clients}
+        self.user = user if user is not None else next((client for client in self.clients if client.authorized), None)
+        if self.user is not None and id(self.user) not in self._members:
+            raise ValueError("User client has to be member of pool")
+        if self.user is not None and not self.user.authorized:
+            raise ValueError("User client has to be authorized with user token")
+        super().__init__(nsfw=nsfw, validate=validate, lazy=lazy)
+        self.cooldown = cooldown
+        self.max_cooldown_wait = max_cooldown_wait
+        self.authorized = self.user is not None
+        self._lock = threading.Lock()
+        self._uses = 0
+
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[dict], *, rate: float = 1.0, burst: int = 1, pool_maxsize: int = 10,
+                         user: Optional[int] = None, cooldown: float = 60.0, max_cooldown_wait: float = 0.0, **options) -> 'ClientPool':
+        """
+        Creates pool of clients sharing single connection pool, each with its own RateLimiter
+
+        :param credentials: Keyword arguments of every client, f.e. [{"client_id": "..."}, {"access_token": "...", "refresh_token": "..."}]
+        :param float rate: Requests per second allowed for single credential
+        :param int burst: Burst of single credential
+        :param int pool_maxsize: Maximum number of keep-alive connections of shared session
+        :param int user: [Optional] Index of credentials used for user-scoped requests
+        :param float cooldown: Number of seconds for which throttled member isn't used, see ClientPool
+        :param float max_cooldown_wait: Maximum number of seconds request waits when all members are cooled down
+        :param options: Other options of every client, f.e. cache or validate
+        """
+        session = create_session(pool_maxsize=pool_maxsize)
+        clients = [Client(**credential, session=session, rate_limiter=_limiter(rate, burst), **options) for credential in credentials]
+        return cls(clients, user=clients[user] if user is not None else None, cooldown=cooldown, max_cooldown_wait=max_cooldown_wait,
+                   **{key: options[key] for key in ('nsfw', 'validate', 'lazy') if key in options})
+
+    def close(self):
+        """
+        Closes pooled connections of all members
+        """
+        for client in self.clients:
+            client.close()
+
+    @contextlib.contextmanager
+    def as_user(self, client: Client):
+        """
+        Sends user-scoped requests made in this context (thread or task) with token of given member,
+        f.e. to update lists of multiple users through one pool
+
+        :param Client client: Member of pool authorized with user token
+        """
+        if id(client) not in self._members:
+            raise ValueError("Client has to be member of pool")
+        if not client.authorized:
+            raise ValueError("Client has to be authorized with user token")
+        token = _pinned_user.set(client)
+        try:
+            yield self
+        finally:
+            _pinned_user.reset(token)
+
+    def _user_client(self) -> Client:
+        client = _pinned_user.get()
+        client = client if client is not None and id(client) in self._members else self.user
+        if client is None:
+            raise MainAuthRequiredError()
+        return client
+
+    @staticmethod
+    def _user_scoped(uri: str, method: str) -> bool:
+        return method.lower() != 'get' or _USER_SCOPED.search(uri) is not None
+
+    def _acquire(self, uri: str, method: str, tried: set) -> tuple[Optional[_Member], float]:
+        """
+        Picks member for request and registers it as in flight, members which already failed this request are skipped
+
+        :returns: Picked member, or None and number of seconds to wait if every candidate is cooled down
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._user_scoped(uri, method):
+                member = self._members[id(self._user_client())]
+            else:
+                candidates = [member for member in self._members.values() if id(member) not in tried]
+                member = min(candidates, key=lambda candidate: candidate.load(now))
+            # cooled down members are sorted last, so all candidates are cooled down
+            delay = member.cooldown_until - now
+            if delay > 0:
+                if delay > self.max_cooldown_wait:
+                    raise TooManyRequests(None, f"All credentials are throttled for next {delay:.0f}s")
+                return None, delay
+            self._uses += 1
+            member.inflight += 1
+            member.last_used = self._uses
+            return member, 0.0
+
+    def _failed(self, member: _Member, error: BaseException, uri: str, method: str, tried: set, forbidden: list) -> bool:
+        """
+        Unregisters failed request, member which received 429 is cooled down
+
+        :returns: True if request may be sent again through other member
+        """
+        with self._lock:
+            tried.add(id(member))
+            member.inflight -= 1
+            if isinstance(error, TooManyRequests):
+                headers = getattr(error.response, 'headers', None) or {}
+                self._cool_down(member, parse_retry_after(headers.get('Retry-After')))
+            elif isinstance(error, Forbidden):
+                # 403 might be caused by entry itself, so member is cooled down only when other one succeeds
+                # and request is sent again just once
+                forbidden.append(member)
+                if len(forbidden) > 1:
+                    return False
+            else:
+                return False
+            return not self._user_scoped(uri, method) and any(id(other) not in tried for other in self._members.values())
+
+    def _succeeded(self, member: _Member, forbidden: list):
+        with self._lock:
+            member.inflight -= 1
+            for failed in forbidden:
+                self._cool_down(failed)
+
+    def _cool_down(self, member: _Member, delay: Optional[float] = None):
+        member.cooldown_until = max(member.cooldown_until, time.monotonic() + (delay if delay is not None else self.cooldown))
+
+    def _call(self, uri: str, *, build=None, validate: Optional[bool] = None, **kwargs):
+        method, tried, forbidden = kwargs.get('method', 'get'), set(), []
+        while True:
+            member, delay = self._acquire(uri, method, tried)
+            if member is None:
+                time.sleep(delay)
+                continue
+            try:
+                data = member.client._call(uri=uri, **kwargs)
+            except BaseException as e:
+                if not self._failed(member, e, uri, method, tried, forbidden):
+                    raise
+                continue
+            self._succeeded(member, forbidden)
+            return data if build is None else self._build(build, data, validate)
+
+    def stats(self) -> list[dict]:
+        """
+        Current load and health of members
+
+        :returns: Load and health of every member, f.e. [{'client': Client, 'inflight': 2, 'cooldown': 0.0, 'wait': 0.5}]
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{'client': member.client, 'inflight': member.inflight, 'cooldown': max(0.0, member.cooldown_until - now),
+                     'wait': member.client.rate_limiter.wait_time() if member.client.rate_limiter is not None else 0.0}
+                    for member in self._members.values()]
+
+
+class AsyncClientPool(ClientPool, AsyncBaseClient):
+    """
+    Same as ClientPool for AsyncClient members, members should share one event loop
+    """
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[dict], *, rate: float = 1.0, burst: int = 1, limit: int = 100,
+                         user: Optional[int] = None, cooldown: float = 60.0, max_cooldown_wait: float = 0.0, **options) -> 'AsyncClientPool':
+        """
+        Creates pool of async clients, each with its own RateLimiter, see ClientPool.from_credentials
+        """
+        clients = [AsyncClient(**credential, limit=limit, rate_limiter=_limiter(rate, burst), **options) for credential in credentials]
+        return cls(clients, user=clients[user] if user is not None else None, cooldown=cooldown, max_cooldown_wait=max_cooldown_wait,
+                   **{key: options[key] for key in ('nsfw', 'validate', 'lazy') if key in options})
+
+    async def close(self):
+        await asyncio.gather(*[client.close() for client in self.clients])
+
+    async def _call(self, uri: str, *, build=None, validate: Optional[bool] = None, **kwargs):
+        method, tried, forbidden = kwargs.get('method', 'get'), set(), []
+        while True:
+            member, delay = self._acquire(uri, method, tried)
+            if member is None:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                data = await member.client._call(uri=uri, **kwargs)
+            except BaseException as e:
+                if not self._failed(member, e, uri, method, tried, forbidden):
+                    raise
+                continue
+            self._succeeded(member, forbidden)
+            return data if build is None else self._build(build, data, validate)
@@ -0,0 +1,190 @@
+import datetime
+import email.utils
+import random
+import threading
+import time
+from typing import Optional, Iterable
+
+__all__ = ['TokenBucket', 'RateLimiter', 'parse_retry_after']
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses value of Retry-After header, it might be either number of seconds or HTTP date
+
+    :param str value: Raw header value
+    :returns: Number of seconds to wait or None if header is missing or malformed
+    :rtype: Optional[float]
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket, allows `burst` requests at once and refills with `rate` tokens per second
+
+    :ivar float rate: Number of tokens added per second
+    :ivar int burst: Maximum number of tokens stored in bucket
+    """
+    def __init__(self, rate: float, burst: int = 1, *, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self._rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: float):
+        with self._lock:
+            self._refill()
+            self._rate = float(value)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """
+        Number of seconds until `tokens` are available, without taking them
+        """
+        with self._lock:
+            self._refill()
+            return 0.0 if self._tokens >= tokens else (tokens - self._tokens) / self._rate
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Takes tokens from bucket, going into debt if there is not enough of them
+
+        :param float tokens: Number of tokens to take
+        :returns: Number of seconds caller has to wait before its reservation is valid
+        :rtype: float
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+
+class RateLimiter(object):
+    """
+    Client-side rate limit and retry policy, single instance may be shared by multiple clients
+    (also from different threads) so all of them respect one global budget
+
+    :ivar float rate: Target number of requests per second
+    :ivar int burst: Number of requests that may be sent at once
+    :ivar int max_retries: Maximum number of retries of throttled or failed request
+    :ivar float backoff_base: Delay before first retry, every next one is doubled
+    :ivar float backoff_max: Upper bound for single retry delay
+    :ivar bool jitter: If set to True, retry delays are randomized ("full jitter") to avoid synchronized retries
+    :ivar bool adaptive: If set to True, rate is lowered when API throttles requests and slowly restored afterwards
+    :ivar float min_rate: Lowest rate adaptive mode may fall to
+    :ivar Iterable[int] retry_statuses: HTTP status codes which are retried
+    """
+    def __init__(self, rate: float = 1.0, burst: int = 1, *,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 60.0,
+                 jitter: bool = True,
+                 adaptive: bool = False,
+                 min_rate: float = 0.1,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 clock=time.monotonic):
+        self.target_rate = float(rate)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.min_rate = min(min_rate, self.target_rate)
+        self.retry_statuses = frozenset(retry_statuses)
+        self._bucket = TokenBucket(rate, burst, clock=clock)
+        self._clock = clock
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current number of requests per second, lower than target rate when adaptive mode backs off"""
+        return self._bucket.rate
+
+    def acquire(self) -> float:
+        """
+        Reserves slot for one request
+
+        :returns: Number of seconds caller has to wait before sending request
+        :rtype: float
+        """
+        delay = self._bucket.reserve()
+        with self._lock:
+            return max(delay, self._blocked_until - self._clock())
+
+    def wait_time(self) -> float:
+        """
+        Number of seconds next request would have to wait, without reserving slot (f.e. to pick least throttled limiter)
+        """
+        delay = self._bucket.wait_time()
+        with self._lock:
+            return max(delay, self._blocked_until - self._clock())
+
+    def wait(self):
+        """Blocks current thread until request may be sent"""
+        delay = self.acquire()
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_retry(self, status_code: Optional[int]) -> bool:
+        """
+        Checks if response status (or connection error if status_code is None) qualifies for retry
+        """
+        return status_code is None or status_code in self.retry_statuses
+
+    def retry_delay(self, attempt: int, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Registers failed attempt and computes delay before next one
+
+        :param int attempt: Number of retries already made for this request
+        :param int status_code: Status code of response, None for connection errors
+        :param float retry_after: Value of Retry-After header in seconds, if present
+        :returns: Number of seconds to wait before retry or None if request should not be retried
+        :rtype: Optional[float]
+        """
+        if not self.should_retry(status_code) or attempt >= self.max_retries:
+            return None
+        if status_code == 429 or retry_after is not None:
+            self._throttled(retry_after)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return max(delay, retry_after or 0.0)
+
+    def record_success(self):
+        """Registers successful request, in adaptive mode rate is restored step by step"""
+        if self.adaptive and self._bucket.rate < self.target_rate:
+            self._bucket.rate = min(self.target_rate, self._bucket.rate + self.target_rate * 0.05)
+
+    def _throttled(self, retry_after: Optional[float]):
+        if retry_after:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, self._clock() + retry_after)
+        if self.adaptive:
+            self._bucket.rate = max(self.min_rate, self._bucket.rate / 2)
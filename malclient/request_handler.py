@@ -1,37 +1,303 @@
+import asyncio
 import datetime
+import time
+from typing import Optional, NamedTuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from .exceptions import *
+from .rate_limit import RateLimiter, parse_retry_after
+from .cache import CacheBackend, CacheEntry, CachePolicy, make_cache_key, identity_from_headers, project_response
+from .single_flight import SingleFlight, AsyncSingleFlight
+from . import json_backend
+from .Datamodels.fields import FieldsTree, parse_fields_payload, format_fields_payload, fields_cover, merge_fields
 import logging
 
-__all__ = ['APICaller']
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optional, only AsyncClient depends on it
+    aiohttp = None
+
+__all__ = ['APICaller', 'AsyncAPICaller', 'create_session']
+
+
+def create_session(*, pool_connections: int = 10,
+                   pool_maxsize: int = 10,
+                   pool_block: bool = False,
+                   keep_alive: bool = True) -> requests.Session:
+    """
+    Creates pooled HTTP session used by APICaller, connections are reused between requests
+    so only first request to each host pays for TCP and TLS handshake
+
+    :param int pool_connections: Number of per-host connection pools to keep (MAL client uses two hosts)
+    :param int pool_maxsize: Maximum number of connections kept alive for a single host
+    :param bool pool_block: If set to True, requests will wait for free connection instead of opening extra one when pool is exhausted
+    :param bool keep_alive: If set to False, connections are closed after every request
+    :returns: Configured session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+# Keys describing entry in listing endpoints, placed next to node and taking precedence over its fields
+_ENTRY_KEYS = ('list_status', 'ranking', 'role')
+
+
+def flatten_response(json_obj):
+    """
+    Flattens decoded response into shape expected by models in single pass, input is never modified
+    and at most one new dict is created per object. Objects which don't need any changes are returned as they are.
+
+    :param json_obj: Decoded json response
+    :returns: Flattened response
+    """
+    # If json_obj is list, then we need to parse every element of it
+    if type(json_obj) is list:
+        return [flatten_response(element) if type(element) in (dict, list) else element for element in json_obj]
+    if type(json_obj) is not dict:
+        return json_obj
+
+    # Case #5 (pagination): response is paginated and object and is split into data and paging objects
+    # Example: https://api.myanimelist.net/v2/anime/ranking?ranking_type=bypopularity&limit=5
+    # Solution: parse data object individually (to cover cases such as data being list of elements)
+    # and return data and paging objects as one dictionary to be converted into PagedResult object
+    if "data" in json_obj:
+        if "paging" in json_obj:  # Make sure that paging object is present in response
+            return {"data": flatten_response(json_obj["data"]), "paging": json_obj["paging"]}
+        return json_obj
+
+    # Case #6: animeography is additional field representing anime objects present in character/staff endpoints
+    # with node field and additional role field at the top level.
+    # Example: https://api.myanimelist.net/v2/characters/161357?fields=first_name,last_name,alternative_name,main_picture,biography,pictures,animeography,num_favorites
+    # Solution: parse each entry of animeography list to cover both node and role fields
+    if "animeography" in json_obj:
+        return {**json_obj, "animeography": flatten_response(json_obj["animeography"])}
+
+    # Case #1: nodes are representants of anime/manga/character/staff/etc. in nested objects,
+    # in fields like: animeography, anime search, anime ranking, etc.
+    # Example: https://api.myanimelist.net/v2/characters/161357?fields=animeography
+    # Solution: merge node with parent, nested objects consisting only of node are replaced with it
+    node = json_obj.get("node")
+    if node is None:
+        return json_obj
+    new_dict = {**json_obj, **node}
+    # wrapped nodes are rare, so cheap scan of values goes first and keys are looked up only if one was found
+    for value in new_dict.values():
+        if type(value) is dict and "node" in value:
+            for key, value in new_dict.items():
+                if type(value) is dict and len(value) == 1 and "node" in value:
+                    new_dict[key] = value["node"]
+            break
+
+    # Cases #2-#4: list_status (anime/manga lists), ranking (rankings) and role (characters/staff)
+    # are additional fields present besides node, they are kept at top level of merged object
+    # Example: https://api.myanimelist.net/v2/users/ModerNews/animelist?fields=list_status&limit=5
+    for key in _ENTRY_KEYS:
+        if key in json_obj:
+            new_dict[key] = json_obj[key]
+    return new_dict
+
+
+class CacheLookup(NamedTuple):
+    """
+    Describes how response of cacheable request is stored
+
+    :ivar str key: Cache key
+    :ivar str tag: Endpoint path
+    :ivar float ttl: Number of seconds response stays fresh
+    :ivar FieldsTree want: Fields requested by caller, None if endpoint is not served by projection
+    :ivar FieldsTree fetch: Fields actually requested from API, wider than `want` when cached entry is upgraded
+    """
+    key: str
+    tag: str
+    ttl: float
+    want: Optional[FieldsTree] = None
+    fetch: Optional[FieldsTree] = None
 
 
 class APICaller(object):
-    def __init__(self, base_url, headers):
+    def __init__(self, base_url, headers, *, session: requests.Session = None, rate_limiter: RateLimiter = None,
+                 cache: CacheBackend = None, cache_policy: CachePolicy = None, coalesce_requests: bool = True,
+                 identity: Optional[str] = None):
         self._base_url = base_url
         self._headers = headers
+        self._identity = identity
+        self._session = session if session is not None else self._create_session()
+        self._rate_limiter = rate_limiter
+        self._cache = cache
+        self._cache_policy = cache_policy if cache_policy is not None or cache is None else CachePolicy()
+        self._single_flight = SingleFlight() if coalesce_requests else None
+
+    @staticmethod
+    def _create_session():
+        return create_session()
+
+    @property
+    def cache(self) -> Optional[CacheBackend]:
+        """Response cache used by this caller, None if caching is disabled"""
+        return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled HTTP session shared by all requests sent by this caller"""
+        return self._session
+
+    def update_headers(self, headers: dict):
+        """
+        Replaces headers sent with every request, without dropping pooled connections,
+        if caller was created with `identity` cached responses are still shared (f.e. after token refresh)
+
+        :param dict headers: New headers
+        """
+        self._headers = headers
+
+    @property
+    def identity(self) -> str:
+        """Identifier of credentials in cache keys, derived from headers unless it was passed to caller"""
+        return self._identity if self._identity is not None else identity_from_headers(self._headers)
+
+    def close(self):
+        """Closes all pooled connections"""
+        self._session.close()
 
     def call(self, uri, method="get", params=None, *args, **kwargs):
-        requester = getattr(requests, method.lower())
         url = self._base_url + uri
+        lookup, cached = self._cache_lookup(uri, method, params)
+        if cached is not None:
+            logging.info(f"{method.upper()} {url} Query Parameters: {params} (cached)")
+            return self._parse_json(cached)
+        if self._widened(lookup):
+            params = params | {'fields': format_fields_payload(lookup.fetch)}
         logging.info(f"{method.upper()} {url} Query Parameters: {params}")
-        response = requester(url=url,
-                             headers=self._headers,
-                             params=params,
-                             *args,
-                             **kwargs)
+
+        def fetch():
+            response = self._send(method, url, params, *args, **kwargs)
+            if response.status_code < 400:
+                self._cache_store(uri, method, lookup, response)
+            return response
+
+        # only raw response is shared, coalesced callers might want different projections of it
+        flight_key = self._flight_key(uri, method, params)
+        response = self._single_flight.do(flight_key, fetch) if flight_key is not None else fetch()
         now = datetime.datetime.now()
         if response.status_code < 400:
-            response = self._parse_response(response, method)
+            response = self._parse_response(response, method) if not self._widened(lookup) \
+                else self._parse_json(self._project(lookup, response))
         elif 400 <= response.status_code:
             self._parse_error(response, method, url)
         end = datetime.datetime.now()
         return response
 
+    def _flight_key(self, uri, method, params):
+        """
+        Returns key identifying identical concurrent requests, None if request should not be coalesced
+        """
+        if self._single_flight is None or method.lower() != 'get':
+            return None
+        return make_cache_key(uri, params, self.identity)
+
+    def _cache_lookup(self, uri, method, params):
+        """
+        Looks request up in cache, for endpoints served by projection entry holding superset of requested fields is also a hit
+
+        :returns: Pair of CacheLookup (None if response is not cacheable) and decoded raw response (None on cache miss)
+        """
+        if self._cache is None or method.lower() != 'get':
+            return None, None
+        path = uri.split('?', 1)[0]
+        ttl = self._cache_policy.ttl(path)
+        if ttl <= 0:
+            return None, None
+        if params and params.get('fields') is not None and self._cache_policy.projectable(path):
+            want = parse_fields_payload(params['fields'])
+            key = make_cache_key(uri, params, self.identity, ignore=('fields',))
+        else:
+            want = None
+            key = make_cache_key(uri, params, self.identity)
+        lookup = CacheLookup(key, path, ttl, want, want)
+        entry = self._cache.get(key)
+        if entry is None:
+            return lookup, None
+        if want is None:
+            return lookup, json_backend.loads(entry.body)
+        have = parse_fields_payload(entry.fields or '')
+        if fields_cover(have, want):
+            return lookup, project_response(json_backend.loads(entry.body), have, want)
+        # entry is narrower than request, fetch union of both once so upgraded entry serves both of them
+        return lookup._replace(fetch=merge_fields(have, want)), None
+
+    def _cache_store(self, uri, method, lookup, response):
+        """
+        Stores response in cache or invalidates entries made stale by write request
+        """
+        if self._cache is None:
+            return
+        if lookup is not None:
+            now = time.time()
+            fields = format_fields_payload(lookup.fetch) if lookup.fetch is not None else None
+            self._cache.set(lookup.key, CacheEntry(response.content, lookup.tag, now, now + lookup.ttl, fields))
+        elif method.lower() != 'get':
+            for tag in self._cache_policy.invalidated_by(uri.split('?', 1)[0]):
+                self._cache.invalidate(tag)
+
+    @staticmethod
+    def _widened(lookup) -> bool:
+        """Checks if request was sent with wider fields than caller asked for"""
+        return lookup is not None and lookup.fetch is not lookup.want
+
+    @staticmethod
+    def _project(lookup, response):
+        """
+        Decodes response fetched with widened fields and projects it to fields requested by caller
+        """
+        return project_response(json_backend.loads(response.content), lookup.fetch, lookup.want)
+
+    def _send(self, method, url, params=None, *args, **kwargs):
+        """
+        Sends request, if rate limiter is set it waits for free slot and retries throttled or failed requests
+        """
+        limiter = self._rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.wait()
+            try:
+                response = self._session.request(method.upper(),
+                                                 url=url,
+                                                 headers=self._headers,
+                                                 params=params,
+                                                 *args,
+                                                 **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = limiter.retry_delay(attempt) if limiter is not None else None
+                if delay is None:
+                    raise
+                logging.warning(f"{method.upper()} {url} {e.__class__.__name__}, retrying in {delay:.2f}s")
+            else:
+                if limiter is None:
+                    return response
+                if not limiter.should_retry(response.status_code):
+                    limiter.record_success()
+                    return response
+                delay = limiter.retry_delay(attempt, response.status_code,
+                                            parse_retry_after(response.headers.get('Retry-After')))
+                if delay is None:
+                    return response
+                logging.warning(f"{method.upper()} {url} {response.status_code}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
     def _parse_response(self, response, method):
         if method in ["get", "post", "patch", "put"]:
-            response_json = response.json()
+            response_json = json_backend.loads(response.content)
             response_json = self._parse_json(response_json)
             return response_json
 
@@ -40,83 +306,149 @@ class APICaller(object):
 
     def _parse_json(self, json_obj):
         """
-        This is main function that handles whole logic of parsing json response from MAL API.
-        It is a little bit messy, so it is heavily commented for better understanding.
+        This is main function that handles whole logic of parsing json response from MAL API,
+        see `flatten_response` for description of handled cases.
 
         :param json_obj: json object to parse
         """
-        # If json_obj is list, then we need to recursively parse every element of it
-        if isinstance(json_obj, list):
-            list_response = []
-            for json_obj in json_obj:
-                new_dict = self._parse_json(json_obj)
-                list_response.append(new_dict if new_dict != {} else json_obj)
-            return list_response
-
-        # Logic for parsing dictionary response
-        elif isinstance(json_obj, dict):
-            new_dict = json_obj.copy()  # Create copy of json_obj to avoid messing original object
-
-            # Case #1: nodes are representants of anime/manga/character/staff/etc. in nested objects,
-            # in fields like: animeography, anime search, anime ranking, etc.
-            # Example: https://api.myanimelist.net/v2/characters/161357?fields=animeography
-            # Solution: recursively parse node as top level object and merge it with parent
-            if "node" in json_obj:
-                new_dict = new_dict | json_obj['node']
-                for k, v in new_dict.items():
-                    if isinstance(v, dict) and "node" in v and len(v) == 1:
-                        new_dict[k] = new_dict[k]['node']
-
-            # Case #2: list_status is additional field present in anime/manga lists besides node
-            # Example: https://api.myanimelist.net/v2/users/ModerNews/animelist?fields=list_status&limit=5
-            # Solution: merge list_status with node and make it a part of AnimeObject object
-            if "list_status" in json_obj:
-                new_dict = new_dict | {'list_status': json_obj['list_status']}
-
-            # Case #3: ranking is additional field present in anime/manga rankings besides node
-            # Example: https://api.myanimelist.net/v2/anime/ranking?ranking_type=bypopularity&limit=5
-            # Solution: merge ranking with node and make it a part of AnimeObject object
-            if "ranking" in json_obj:
-                new_dict = new_dict | {'ranking': json_obj['ranking']}
-
-            # Case #4: role is additional field present in anime/manga characters/staff besides node
-            # Example: https://api.myanimelist.net/v2/characters/161357?fields=animeography
-            # Solution: merge role with node and make it a part of AnimeObject object
-            if "role" in json_obj:
-                new_dict = new_dict | {'role': json_obj['role']}
-
-            # Case #5 (pagination): response is paginated and object and is split into data and paging objects
-            # Example: https://api.myanimelist.net/v2/anime/ranking?ranking_type=bypopularity&limit=5
-            # Solution: parse data object individually (to cover cases such as data being list of elements)
-            # and return data and paging objects as one dictionary to be converted into PagedResult object
-            if json_obj and "data" in json_obj:
-                list_response = self._parse_json(json_obj["data"])
-                if "paging" in json_obj:  # Make sure that paging object is present in response
-                    json_obj = {"data": list_response, "paging": json_obj["paging"]}
-                return json_obj
-
-            # Case #6: animeography is additional field representing anime objects present in character/staff endpoints
-            # with node field and additional role field at the top level.
-            # Example: https://api.myanimelist.net/v2/characters/161357?fields=first_name,last_name,alternative_name,main_picture,biography,pictures,animeography,num_favorites
-            # Solution: recursively parse each entry of animeography list to cover both node and role fields
-            if "animeography" in json_obj:
-                response_json = json_obj | {'animeography': self._parse_json(json_obj['animeography'])}
-                return response_json
-            return new_dict
+        return flatten_response(json_obj)
 
     @staticmethod
     def _parse_error(response, method, url):
-        logging.error(f"{method.upper()} {url} {response.status_code} {json.loads(response.text)['error']}: {json.loads(response.text)['message'] if 'message' in json.loads(response.text) or len(json.loads(response.text)) != 0 else ''}")
+        # body is decoded once, error pages of proxies might not be json at all
+        try:
+            error = json_backend.loads(response.content)
+        except ValueError:
+            error = {}
+        if not isinstance(error, dict):
+            error = {}
+        message = error.get('message')
+        logging.error(f"{method.upper()} {url} {response.status_code} {error.get('error')}: {message or ''}")
         if str(response.status_code) == "400" or str(response.status_code).lower() == "400 bad request":
-            raise BadRequest(response)
+            raise BadRequest(response, message)
         elif str(response.status_code) == "401" or str(response.status_code).lower() == "401 unauthorized":
-            raise Unauthorized(response)
+            raise Unauthorized(response, message)
         elif str(response.status_code) == "403" or str(response.status_code).lower() == "403 forbidden":
-            raise Forbidden(response)
+            raise Forbidden(response, message)
         elif str(response.status_code) == "404" or str(response.status_code).lower() == "404 not found":
-            raise NotFound(response)
+            raise NotFound(response, message)
+        elif str(response.status_code) == "429" or str(response.status_code).lower() == "429 too many requests":
+            raise TooManyRequests(response, message)
         else:
-            raise APIException(response.status_code, json.loads(response.text)['message'], response)
+            raise APIException(response.status_code, message, response)
+
+
+class BufferedResponse(object):
+    """
+    Fully read HTTP response, exposes the subset of requests.Response interface used by APICaller parsers and exceptions
+    """
+    def __init__(self, status_code: int, content: bytes, headers, encoding: str = 'utf-8'):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
 
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
 
+    def json(self):
+        return json_backend.loads(self.content)
 
+
+class AsyncAPICaller(APICaller):
+    """
+    Asyncio counterpart of APICaller backed by aiohttp, parsing of responses is shared with APICaller
+    """
+    def __init__(self, base_url, headers, *, session=None, rate_limiter: RateLimiter = None,
+                 cache: CacheBackend = None, cache_policy: CachePolicy = None, coalesce_requests: bool = True,
+                 identity: Optional[str] = None, limit: int = 100, limit_per_host: int = 0, keep_alive: bool = True):
+        if aiohttp is None:
+            raise ImportError("AsyncAPICaller requires aiohttp, install it with `pip install aiohttp`")
+        super().__init__(base_url, headers, session=session, rate_limiter=rate_limiter, cache=cache, cache_policy=cache_policy,
+                         coalesce_requests=coalesce_requests, identity=identity)
+        self._single_flight = AsyncSingleFlight() if coalesce_requests else None
+        self._connector_options = {'limit': limit, 'limit_per_host': limit_per_host, 'force_close': not keep_alive}
+
+    @staticmethod
+    def _create_session():
+        # aiohttp session has to be bound to running event loop, see session
+        return None
+
+    @property
+    def session(self):
+        """Pooled aiohttp session, it is created lazily inside running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(**self._connector_options))
+        return self._session
+
+    async def close(self):
+        """Closes all pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+
+    @staticmethod
+    def _prepare_payload(payload):
+        # requests silently skips None values and stringifies the rest, aiohttp rejects both
+        if payload is None:
+            return None
+        return {key: str(value) for key, value in payload.items() if value is not None}
+
+    async def _send(self, method, url, params=None, **kwargs):
+        limiter = self._rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                delay = limiter.acquire()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                async with self.session.request(method.upper(),
+                                                url,
+                                                headers=self._headers,
+                                                params=params,
+                                                **kwargs) as raw_response:
+                    response = BufferedResponse(raw_response.status, await raw_response.read(), raw_response.headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = limiter.retry_delay(attempt) if limiter is not None else None
+                if delay is None:
+                    raise
+                logging.warning(f"{method.upper()} {url} {e.__class__.__name__}, retrying in {delay:.2f}s")
+            else:
+                if limiter is None:
+                    return response
+                if not limiter.should_retry(response.status_code):
+                    limiter.record_success()
+                    return response
+                delay = limiter.retry_delay(attempt, response.status_code,
+                                            parse_retry_after(response.headers.get('Retry-After')))
+                if delay is None:
+                    return response
+                logging.warning(f"{method.upper()} {url} {response.status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def call(self, uri, method="get", params=None, data=None, **kwargs):
+        url = self._base_url + uri
+        lookup, cached = self._cache_lookup(uri, method, params)
+        if cached is not None:
+            logging.info(f"{method.upper()} {url} Query Parameters: {params} (cached)")
+            return self._parse_json(cached)
+        if self._widened(lookup):
+            params = params | {'fields': format_fields_payload(lookup.fetch)}
+        logging.info(f"{method.upper()} {url} Query Parameters: {params}")
+
+        async def fetch():
+            response = await self._send(method, url, self._prepare_payload(params), data=self._prepare_payload(data), **kwargs)
+            if response.status_code < 400:
+                self._cache_store(uri, method, lookup, response)
+            return response
+
+        flight_key = self._flight_key(uri, method, params)
+        response = await self._single_flight.do(flight_key, fetch) if flight_key is not None else await fetch()
+        if response.status_code < 400:
+            response = self._parse_response(response, method) if not self._widened(lookup) \
+                else self._parse_json(self._project(lookup, response))
+        else:
+            self._parse_error(response, method, url)
+        return response
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from typing import Callable, Awaitable, Any
+
+__all__ = ['SingleFlight', 'AsyncSingleFlight']
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    De-duplicates concurrent calls, while call for a key is in flight every other caller with the same key
+    waits for its result instead of executing function again
+
+    :ivar int coalesced: Number of calls served by result of another call
+    """
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, function: Callable[[], Any]):
+        """
+        Executes function, unless call with the same key is already in flight
+
+        :param str key: Identifier of call
+        :param function: Function without arguments
+        :returns: Result of function (shared between coalesced callers), exceptions are re-raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """
+    Asyncio counterpart of SingleFlight, coalesced coroutines await result of the first one
+
+    :ivar int coalesced: Number of calls served by result of another call
+    """
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, function: Callable[[], Awaitable[Any]]):
+        """
+        Awaits coroutine created by function, unless call with the same key is already in flight
+
+        :param str key: Identifier of call
+        :param function: Function without arguments returning awaitable
+        :returns: Result of awaitable (shared between coalesced callers), exceptions are re-raised in every caller
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark as retrieved, leader re-raises it anyway
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -0,0 +1,34 @@
+import sqlite3
+import threading
+
+__all__ = []
+
+
+class ThreadLocalConnections(object):
+    """
+    Connections to single SQLite database (WAL mode, autocommit), used by SQLiteCache and SQLiteMirror.
+    sqlite3 connections can't be shared between threads, so each thread opens its own on first use
+
+    :ivar str path: Path of database file
+    """
+    def __init__(self, path: str, *, timeout: float = 30.0):
+        self.path = path
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Connection of current thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """Closes connection opened by current thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
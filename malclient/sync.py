@@ -0,0 +1,152 @@
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, NamedTuple, Iterable
+
+__all__ = ['ListStore', 'MemoryListStore', 'ListSync', 'SyncResult']
+
+
+class SyncResult(NamedTuple):
+    """
+    Summary of single synchronisation of user list
+
+    :ivar str username: Name of user whose list was synchronised
+    :ivar str media: Either 'anime' or 'manga'
+    :ivar bool full: If whole list was downloaded (first run or forced), otherwise only entries updated since last run
+    :ivar int updated: Number of entries written to store
+    :ivar int requests: Number of pages fetched
+    :ivar datetime.datetime watermark: Newest update time of list entries after synchronisation
+    """
+    username: str
+    media: str
+    full: bool
+    updated: int
+    requests: int
+    watermark: Optional[datetime.datetime]
+
+
+class ListStore(ABC):
+    """
+    Interface of local copy of user lists kept up to date by `sync_user_anime_list`/`sync_user_manga_list`,
+    entries are models (or records) of list entries with `list_status` set
+    """
+    @abstractmethod
+    def watermark(self, username: str, media: str) -> Optional[datetime.datetime]:
+        """Newest update time of entries stored for list, None if list wasn't synchronised yet"""
+
+    @abstractmethod
+    def set_watermark(self, username: str, media: str, watermark: Optional[datetime.datetime]):
+        """Stores newest update time of entries of list"""
+
+    @abstractmethod
+    def upsert(self, username: str, media: str, entries: list):
+        """Adds entries to list or replaces stored ones with the same id"""
+
+    @abstractmethod
+    def replace(self, username: str, media: str, entries: list):
+        """Replaces whole list, entries missing from `entries` (removed by user) are dropped"""
+
+    @abstractmethod
+    def entries(self, username: str, media: str) -> list:
+        """All stored entries of list"""
+
+
+class MemoryListStore(ListStore):
+    """
+    Thread-safe in-memory list store
+    """
+    def __init__(self):
+        self._lists: dict[tuple[str, str], dict[int, object]] = {}
+        self._watermarks: dict[tuple[str, str], Optional[datetime.datetime]] = {}
+        self._lock = threading.Lock()
+
+    def watermark(self, username: str, media: str) -> Optional[datetime.datetime]:
+        return self._watermarks.get((username, media))
+
+    def set_watermark(self, username: str, media: str, watermark: Optional[datetime.datetime]):
+        with self._lock:
+            self._watermarks[(username, media)] = watermark
+
+    def upsert(self, username: str, media: str, entries: list):
+        with self._lock:
+            stored = self._lists.setdefault((username, media), {})
+            for entry in entries:
+                stored[entry.id] = entry
+
+    def replace(self, username: str, media: str, entries: list):
+        with self._lock:
+            self._lists[(username, media)] = {entry.id: entry for entry in entries}
+
+    def entries(self, username: str, media: str) -> list:
+        return list(self._lists.get((username, media), {}).values())
+
+
+def updated_at(entry) -> Optional[datetime.datetime]:
+    """Update time of list entry as timezone aware datetime, None if it's missing"""
+    status = getattr(entry, 'list_status', None)
+    value = getattr(status, 'updated_at', None)
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value if isinstance(value, datetime.datetime) else None
+
+
+class ListSync(object):
+    """
+    State of single synchronisation run, pages of list sorted by update time (newest first) are consumed
+    until entry older than watermark of previous run is reached, only those entries are applied to store.
+    Fetching pages is left to client (see `Client._run_sync`), so the same state works for Client and AsyncClient
+
+    Entries removed from list on MAL can't be detected by incremental run, they are dropped on full one.
+
+    :ivar ListStore store: Store to which entries are written
+    :ivar datetime.datetime watermark: Watermark of previous run, None for full synchronisation
+    """
+    def __init__(self, store: ListStore, username: str, media: str, *, full: bool = False):
+        self.store = store
+        self.username = username
+        self.media = media
+        self.watermark: Optional[datetime.datetime] = None if full else store.watermark(username, media)
+        self.entries: list = []
+        self.requests = 0
+
+    @property
+    def full(self) -> bool:
+        return self.watermark is None
+
+    def consume(self, page) -> bool:
+        """
+        Collects entries of fetched page
+
+        :param PagedResult page: Page of list sorted by update time, None for empty list
+        :returns: True if next page has to be fetched
+        """
+        self.requests += 1
+        if page is None:
+            return False
+        for entry in page:
+            # entries updated in the same second as watermark are applied again, so none is missed
+            if not self.full and (updated_at(entry) or self.watermark) < self.watermark:
+                return False
+            self.entries.append(entry)
+        return page.has_next_page
+
+    def commit(self) -> SyncResult:
+        """
+        Writes collected entries and new watermark to store
+        """
+        if self.full:
+            self.store.replace(self.username, self.media, self.entries)
+        elif self.entries:
+            self.store.upsert(self.username, self.media, self.entries)
+        watermark = max(_present(updated_at(entry) for entry in self.entries), default=self.watermark)
+        self.store.set_watermark(self.username, self.media, watermark)
+        return SyncResult(self.username, self.media, self.full, len(self.entries), self.requests, watermark)
+
+
+def _present(values: Iterable) -> Iterable:
+    return (value for value in values if value is not None)
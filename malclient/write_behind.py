@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional
+
+import requests
+
+from .exceptions import APIException, TooManyRequests
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optional, only AsyncClient depends on it
+    aiohttp = None
+
+__all__ = ['WriteBehindQueue', 'AsyncWriteBehindQueue']
+
+_CONNECTION_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError, asyncio.TimeoutError) + \
+                     ((aiohttp.ClientConnectionError,) if aiohttp is not None else ())
+
+
+def is_transient(error: BaseException) -> bool:
+    """Checks if failed update may succeed when sent again (throttling, server and connection errors)"""
+    if isinstance(error, TooManyRequests) or isinstance(error, _CONNECTION_ERRORS):
+        return True
+    return type(error) is APIException and isinstance(error.status_code, int) and error.status_code >= 500
+
+
+class _Update(object):
+    # pending update of single list entry, all updates coalesced into it share one future
+    __slots__ = ('client', 'media', 'entry_id', 'data', 'future')
+
+    def __init__(self, client, media: str, entry_id: int, future):
+        self.client = client
+        self.media = media
+        self.entry_id = entry_id
+        self.data = {}
+        self.future = future
+
+    @property
+    def key(self) -> tuple:
+        return id(self.client), self.media, self.entry_id
+
+    def method(self):
+        if self.media == 'anime':
+            return self.client.update_my_anime_list_status
+        return self.client.update_my_manga_list_status
+
+
+class _WriteBehind(ABC):
+    """
+    Coalescing logic shared by WriteBehindQueue and AsyncWriteBehindQueue
+    """
+    def __init__(self, client=None, *, flush_interval: float = 5.0, max_pending: int = 50, concurrency: int = 4,
+                 max_retries: int = 3, retry_backoff: float = 1.0):
+        self.client = client
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._pending: dict[tuple, _Update] = {}
+        self._inflight: dict[tuple, _Update] = {}
+        self._flushing = 0
+        self._closed = False
+
+    def update_anime_status(self, anime_id: int, *, client=None, **fields):
+        """
+        Queues update of anime list status, fields are the same as in `update_my_anime_list_status`
+        and are merged with update of the same entry which wasn't sent yet (last write wins)
+
+        :param int anime_id: Id of anime
+        :param client: [Optional] Client of user whose list is updated, client of queue is used if omitted
+        :returns: Future resolved with MyAnimeListStatus returned by request which wrote this update
+        """
+        return self._enqueue(client, 'anime', anime_id, fields)
+
+    def update_manga_status(self, manga_id: int, *, client=None, **fields):
+        """
+        Same as update_anime_status for manga, fields are the same as in `update_my_manga_list_status`
+        """
+        return self._enqueue(client, 'manga', manga_id, fields)
+
+    @property
+    def pending(self) -> int:
+        """Number of entries waiting for flush"""
+        return len(self._pending)
+
+    def _enqueue(self, client, media: str, entry_id: int, fields: dict):
+        client = client if client is not None else self.client
+        if client is None:
+            raise ValueError("Client has to be passed to queue or to update")
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        update = _Update(client, media, entry_id, None)
+        existing = self._pending.get(update.key)
+        if existing is None:
+            update.future = self._new_future()
+            existing = self._pending[update.key] = update
+        # None means "don't update" in update methods, so it doesn't override queued value
+        existing.data.update((name, value) for name, value in fields.items() if value is not None)
+        return existing.future
+
+    def _sendable(self) -> list[_Update]:
+        # updates of entry which is being written wait for that request, so they are applied in order
+        return [update for key, update in self._pending.items() if key not in self._inflight]
+
+    def _due(self) -> bool:
+        sendable = self._sendable()
+        return bool(sendable) and (self._closed or self._flushing > 0 or len(sendable) >= self.max_pending)
+
+    def _finished(self) -> bool:
+        return self._closed and not self._pending and not self._inflight
+
+    def _take(self) -> list[_Update]:
+        batch = self._sendable()
+        for update in batch:
+            del self._pending[update.key]
+            self._inflight[update.key] = update
+        return batch
+
+    def _futures(self) -> list:
+        return [update.future for update in (*self._pending.values(), *self._inflight.values())]
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        if attempt >= self.max_retries or not is_transient(error):
+            return None
+        return self.retry_backoff * 2 ** attempt
+
+    @abstractmethod
+    def _new_future(self):
+        """Creates future resolved when update is sent, concurrent.futures or asyncio one"""
+
+
+class WriteBehindQueue(_WriteBehind):
+    """
+    Write-behind queue of list status updates, updates of the same entry (per client and anime/manga id) queued
+    before they are sent are merged into single PATCH request. Queue is flushed in background every `flush_interval`
+    seconds or as soon as `max_pending` entries are waiting, with at most `concurrency` requests in flight,
+    throttled, server and connection errors are retried.
+
+    Each update returns future resolved with updated status once it's written, `flush()` waits for all queued updates.
+
+    .. code-block:: py
+
+        with client.write_behind(flush_interval=10) as queue:
+            queue.update_anime_status(anime_id, num_watched_episodes=3)
+            queue.update_anime_status(anime_id, num_watched_episodes=4, status="watching")  # merged with previous one
+
+    :ivar Client client: Default client used for updates
+    :ivar float flush_interval: Maximum time in seconds for which update waits before it's sent
+    :ivar int max_pending: Number of waiting entries which triggers flush
+    :ivar int concurrency: Maximum number of requests in flight
+    :ivar int max_retries: Maximum number of retries of single request
+    :ivar float retry_backoff: Delay before first retry, every next one is doubled
+    """
+    def __init__(self, client=None, **options):
+        super().__init__(client, **options)
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='malclient-write-behind')
+        self._thread = threading.Thread(target=self._run, name='malclient-write-behind', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _new_future(self):
+        return Future()
+
+    def _enqueue(self, client, media: str, entry_id: int, fields: dict) -> Future:
+        with self._condition:
+            future = super()._enqueue(client, media, entry_id, fields)
+            if self._due():
+                self._condition.notify_all()
+            return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sends all queued updates immediately and waits until they are written (or failed, errors are set on futures)
+
+        :param float timeout: [Optional] Maximum time in seconds to wait
+        :returns: False if timeout expired before all updates were written
+        """
+        with self._condition:
+            futures = self._futures()
+            self._flushing += 1
+            self._condition.notify_all()
+        try:
+            return not wait(futures, timeout).not_done
+        finally:
+            with self._condition:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Flushes queued updates and stops background thread, queue can't be used afterwards
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    def _run(self):
+        with self._condition:
+            while True:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._due() and not self._finished():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._finished():
+                    return
+                for update in self._take():
+                    self._executor.submit(self._send, update)
+
+    def _send(self, update: _Update):
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = update.method()(update.entry_id, **update.data)
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    logging.warning(f"Update of {update.media} {update.entry_id} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                    attempt += 1
+                    time.sleep(delay)
+        except BaseException as e:
+            _resolve(update.future, exception=e)
+        else:
+            _resolve(update.future, result)
+        finally:
+            with self._condition:
+                del self._inflight[update.key]
+                self._condition.notify_all()
+
+
+class AsyncWriteBehindQueue(_WriteBehind):
+    """
+    Same as WriteBehindQueue for AsyncClient, it has to be created inside running event loop,
+    updates return asyncio futures and `flush()`/`close()` are coroutines
+
+    .. code-block:: py
+
+        async with client.write_behind() as queue:
+            queue.update_anime_status(anime_id, num_watched_episodes=3)
+            status = await queue.update_anime_status(anime_id, num_watched_episodes=4)
+    """
+    def __init__(self, client=None, **options):
+        super().__init__(client, **options)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._runner = self._loop.create_task(self._run())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _new_future(self):
+        return self._loop.create_future()
+
+    def _enqueue(self, client, media: str, entry_id: int, fields: dict) -> asyncio.Future:
+        future = super()._enqueue(client, media, entry_id, fields)
+        if self._due():
+            self._wakeup.set()
+        return future
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sends all queued updates immediately and waits until they are written (or failed, errors are set on futures)
+
+        :param float timeout: [Optional] Maximum time in seconds to wait
+        :returns: False if timeout expired before all updates were written
+        """
+        futures = self._futures()
+        if not futures:
+            return True
+        self._flushing += 1
+        self._wakeup.set()
+        try:
+            _, not_done = await asyncio.wait(futures, timeout=timeout)
+            return not not_done
+        finally:
+            self._flushing -= 1
+
+    async def close(self):
+        """
+        Flushes queued updates and stops background task, queue can't be used afterwards
+        """
+        self._closed = True
+        self._wakeup.set()
+        await self._runner
+
+    async def _run(self):
+        while True:
+            deadline = self._loop.time() + self.flush_interval
+            while not self._due() and not self._finished():
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            if self._finished():
+                return
+            for update in self._take():
+                task = self._loop.create_task(self._send(update))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, update: _Update):
+        attempt = 0
+        try:
+            async with self._semaphore:
+                while True:
+                    try:
+                        result = await update.method()(update.entry_id, **update.data)
+                        break
+                    except Exception as e:
+                        delay = self._retry_delay(attempt, e)
+                        if delay is None:
+                            raise
+                        logging.warning(f"Update of {update.media} {update.entry_id} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                        attempt += 1
+                        await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            update.future.cancel()
+            raise
+        except BaseException as e:
+            _resolve(update.future, exception=e)
+        else:
+            _resolve(update.future, result)
+        finally:
+            del self._inflight[update.key]
+            self._wakeup.set()
+
+
+def _resolve(future, result=None, exception: Optional[BaseException] = None):
+    # future may be already cancelled by caller which stopped waiting for it
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
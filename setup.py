@@ -15,6 +15,7 @@ setuptools.setup(
     url="https://github.com/ModerNews/MAL-API-Client-Upgraded",
     project_urls={"Documentation": "https://mal-api-client-upgraded.readthedocs.io"},
     install_requires=['requests', 'pydantic'],
+    extras_require={'async': ['aiohttp'], 'fast': ['orjson'], 'numpy': ['numpy']},
     packages=setuptools.find_packages(),
     include_package_data=True,
     classifiers=[
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of per-request overhead of fields handling, i.e. what search_anime/get_anime_ranking do on every call:
+preset is generated, compared with Fields.node() and converted to query string.
+Compares current bitset implementation with the previous attribute-walking one
+
+Usage (from repository root): PYTHONPATH=. python tests/bench_fields.py
+"""
+import timeit
+from types import MethodType, MethodWrapperType, BuiltinFunctionType
+
+from malclient import Fields
+
+
+class LegacyFields(object):
+    # Implementation used before bitset rewrite (FieldsBase.__eq__/to_payload), kept only for comparison
+    def __init__(self, **kwargs):
+        for name, spec in Fields._declared:
+            if isinstance(spec, str):
+                # nested fields of other types requested by presets measured here are empty, so they are skipped
+                value = kwargs.get(name, False) if spec == 'Fields' else False
+                setattr(self, '_' + name, LegacyFields() if value is True else value if isinstance(value, LegacyFields) else False)
+            else:
+                setattr(self, name, kwargs.get(name, spec))
+
+    def __eq__(self, other):
+        if type(self) != type(other):
+            return False
+        else:
+            for field in dir(self):
+                if type(self.__getattribute__(field)) not in (MethodType, MethodWrapperType, BuiltinFunctionType):
+                    if self.__getattribute__(field) != other.__getattribute__(field):
+                        return False
+                else:
+                    continue
+        return True
+
+    def to_payload(self):
+        fields = []
+        for field, value in self.__dict__.items():
+            if isinstance(value, LegacyFields):
+                if value == value.empty():
+                    continue
+                else:
+                    fields.append(field[1:] + '{' + str(",".join([key for key, state in value.__dict__.items() if state])) + '}')
+            elif value is True:
+                fields.append(field)
+        return ','.join(fields)
+
+    @classmethod
+    def from_list(cls, field_list):
+        return cls(**{field: True for field in field_list})
+
+    @classmethod
+    def empty(cls):
+        return cls(id=False, title=False, main_picture=False)
+
+    @classmethod
+    def node(cls):
+        return cls.from_list(['id', 'title', 'main_picture'])
+
+    @classmethod
+    def anime(cls):
+        return cls.from_list([name for name, value in Fields.anime().to_dict().items() if value is not False])
+
+
+def request(fields_class, preset):
+    fields = getattr(fields_class, preset)()
+    payload = fields.to_payload()
+    r_class = 'Node' if fields == fields_class.node() else 'AnimeObject'
+    return payload, r_class
+
+
+def main(repeat: int = 5, number: int = 2000):
+    for preset in ('node', 'anime'):
+        assert request(Fields, preset) == request(LegacyFields, preset), preset
+        legacy = min(timeit.repeat(lambda: request(LegacyFields, preset), repeat=repeat, number=number)) / number
+        current = min(timeit.repeat(lambda: request(Fields, preset), repeat=repeat, number=number)) / number
+        print(f"Fields.{preset + '()':<8} legacy {legacy * 1e6:8.2f} us, current {current * 1e6:8.2f} us, speedup {legacy / current:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
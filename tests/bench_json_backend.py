@@ -0,0 +1,34 @@
+"""
+Benchmark of json backends on large animelist and ranking response bodies
+
+Usage (from repository root): PYTHONPATH=. python tests/bench_json_backend.py [entries]
+"""
+import json
+import sys
+import timeit
+
+from malclient import json_backend
+
+from bench_parse_json import payloads
+
+
+def main(entries: int = 1000, repeat: int = 5, number: int = 10):
+    for name, payload in payloads(entries).items():
+        body = json.dumps(payload).encode()
+        timings = {}
+        for backend in json_backend.BACKENDS:
+            try:
+                json_backend.use_backend(backend)
+            except ImportError:
+                continue
+            timings[backend] = min(timeit.repeat(lambda: json_backend.loads(body), repeat=repeat, number=number)) / number
+        # previous path: requests.Response.json() decoding text with stdlib
+        timings['stdlib str'] = min(timeit.repeat(lambda: json.loads(body.decode()), repeat=repeat, number=number)) / number
+        baseline = timings['stdlib str']
+        print(f"{name:<10} {len(body) / 2 ** 20:.1f} MiB: " +
+              ", ".join(f"{backend} {timing * 1000:.2f} ms ({baseline / timing:.1f}x)" for backend, timing in timings.items()))
+    json_backend.use_backend()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
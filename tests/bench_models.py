@@ -0,0 +1,74 @@
+"""
+Benchmark of model construction, compares validated, trusted (validate=False) and lazy mode
+on lists of AnimeObject and MangaObject, both time and memory held by built page are measured
+(memory is counted on top of decoded response, which lazy wrappers keep referenced),
+validated and trusted modes are also measured without interning of nested objects
+and models projected to three fields (as returned by get_anime_fields(..., project=True)) are built in validated mode
+
+Usage (from repository root): PYTHONPATH=. python tests/bench_models.py [entries]
+"""
+import sys
+import timeit
+import tracemalloc
+
+from malclient import AnimeObject, MangaObject, PagedResult, trusted_construction, lazy_construction, intern_registry, interning_stats, \
+    Fields, project_model
+from malclient.request_handler import flatten_response
+
+from bench_parse_json import payloads
+
+
+def manga(manga_id):
+    return {
+        "id": manga_id, "title": f"manga {manga_id}",
+        "main_picture": {"medium": "https://cdn.myanimelist.net/m.jpg", "large": "https://cdn.myanimelist.net/l.jpg"},
+        "alternative_titles": {"synonyms": [], "en": "manga", "ja": "manga"}, "start_date": "1999-07", "synopsis": "text " * 200,
+        "mean": 8.1, "rank": manga_id, "popularity": manga_id, "num_list_users": 1000, "nsfw": "white",
+        "genres": [{"id": i, "name": f"genre {i}"} for i in range(5)], "created_at": "2001-01-01T00:00:00+00:00",
+        "media_type": "manga", "status": "finished", "num_volumes": 10, "num_chapters": 100,
+        "authors": [{"node": {"id": 1, "first_name": "a", "last_name": "b"}, "role": "Story & Art"}],
+        "my_list_status": {"status": "reading", "score": 7, "num_volumes_read": 1, "num_chapters_read": 5,
+                           "is_rereading": False, "updated_at": "2020-01-01T00:00:00+00:00"},
+    }
+
+
+def build(model, data):
+    return PagedResult([model(**entry) for entry in data], {})
+
+
+def measure(model, data, repeat, number):
+    elapsed = min(timeit.repeat(lambda: build(model, data), repeat=repeat, number=number)) / number
+    tracemalloc.start()
+    page = build(model, data)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, page
+
+
+def main(entries: int = 1000, repeat: int = 5, number: int = 3):
+    cases = {
+        "AnimeObject": (AnimeObject, flatten_response(payloads(entries)["ranking"])["data"]),
+        "MangaObject": (MangaObject, [manga(i) for i in range(entries)]),
+    }
+    for name, (model, data) in cases.items():
+        intern_registry.enabled = False
+        results = {"validated, no interning": measure(model, data, repeat, number)}
+        with trusted_construction():
+            results["trusted, no interning"] = measure(model, data, repeat, number)
+        intern_registry.enabled = True
+        results["validated"] = measure(model, data, repeat, number)
+        with trusted_construction():
+            results["trusted"] = measure(model, data, repeat, number)
+        with lazy_construction():
+            results["lazy"] = measure(model, data, repeat, number)
+        results["projected"] = measure(project_model(model, Fields.from_list(['id', 'title', 'mean'])), data, repeat, number)
+        baseline = results["validated, no interning"][0]
+        print(f"{name} ({entries} entries)")
+        for mode, (elapsed, size, _) in results.items():
+            print(f"    {mode:<23} {elapsed * 1000:8.2f} ms ({baseline / elapsed:5.1f}x), {size / 2 ** 20:6.2f} MiB")
+    for name, stats in interning_stats().items():
+        print(f"{name:<12} deduplicated {stats.ratio:6.1%} of nested objects")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
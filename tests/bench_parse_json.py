@@ -0,0 +1,79 @@
+"""
+Benchmark of response flattening, compares current implementation with the previous copying one
+on large list and ranking payloads
+
+Usage (from repository root): PYTHONPATH=. python tests/bench_parse_json.py [entries]
+"""
+import sys
+import timeit
+
+from malclient.request_handler import flatten_response
+
+
+def legacy_parse_json(json_obj):
+    # Implementation used before single-pass rewrite, kept only for comparison
+    if isinstance(json_obj, list):
+        list_response = []
+        for json_obj in json_obj:
+            new_dict = legacy_parse_json(json_obj)
+            list_response.append(new_dict if new_dict != {} else json_obj)
+        return list_response
+    elif isinstance(json_obj, dict):
+        new_dict = json_obj.copy()
+        if "node" in json_obj:
+            new_dict = new_dict | json_obj['node']
+            for k, v in new_dict.items():
+                if isinstance(v, dict) and "node" in v and len(v) == 1:
+                    new_dict[k] = new_dict[k]['node']
+        if "list_status" in json_obj:
+            new_dict = new_dict | {'list_status': json_obj['list_status']}
+        if "ranking" in json_obj:
+            new_dict = new_dict | {'ranking': json_obj['ranking']}
+        if "role" in json_obj:
+            new_dict = new_dict | {'role': json_obj['role']}
+        if json_obj and "data" in json_obj:
+            list_response = legacy_parse_json(json_obj["data"])
+            if "paging" in json_obj:
+                json_obj = {"data": list_response, "paging": json_obj["paging"]}
+            return json_obj
+        if "animeography" in json_obj:
+            return json_obj | {'animeography': legacy_parse_json(json_obj['animeography'])}
+        return new_dict
+
+
+def anime(anime_id):
+    # roughly what Fields.anime() returns for single entry
+    return {
+        "id": anime_id, "title": f"anime {anime_id}",
+        "main_picture": {"medium": "https://cdn.myanimelist.net/m.jpg", "large": "https://cdn.myanimelist.net/l.jpg"},
+        "alternative_titles": {"synonyms": ["a", "b"], "en": "anime", "ja": "anime"},
+        "start_date": "2001-01-01", "end_date": "2001-06-01", "synopsis": "text " * 200, "mean": 8.5, "rank": anime_id,
+        "popularity": anime_id, "num_list_users": 100000, "num_scoring_users": 50000, "nsfw": "white",
+        "genres": [{"id": i, "name": f"genre {i}"} for i in range(5)], "created_at": "2001-01-01T00:00:00+00:00",
+        "updated_at": "2020-01-01T00:00:00+00:00", "media_type": "tv", "status": "finished_airing",
+        "num_episodes": 24, "start_season": {"year": 2001, "season": "winter"},
+        "broadcast": {"day_of_the_week": "monday", "start_time": "20:00"}, "source": "manga",
+        "average_episode_duration": 1440, "rating": "pg_13", "studios": [{"id": 1, "name": "studio"}],
+        "related_anime": [{"node": {"id": anime_id + 1, "title": "sequel"}, "relation_type": "sequel", "relation_type_formatted": "Sequel"}],
+    }
+
+
+def payloads(entries: int):
+    paging = {"next": "https://api.myanimelist.net/v2/anime/ranking?offset=500"}
+    return {
+        "animelist": {"data": [{"node": anime(i), "list_status": {"status": "completed", "score": 8}} for i in range(entries)], "paging": paging},
+        "ranking": {"data": [{"node": anime(i), "ranking": {"rank": i + 1}} for i in range(entries)], "paging": paging},
+    }
+
+
+def main(entries: int = 1000, repeat: int = 5, number: int = 20):
+    for name, payload in payloads(entries).items():
+        assert flatten_response(payload) == legacy_parse_json(payload), name
+        legacy = min(timeit.repeat(lambda: legacy_parse_json(payload), repeat=repeat, number=number)) / number
+        current = min(timeit.repeat(lambda: flatten_response(payload), repeat=repeat, number=number)) / number
+        print(f"{name:<10} {entries} entries: legacy {legacy * 1000:8.3f} ms, current {current * 1000:8.3f} ms, "
+              f"speedup {legacy / current:.2f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
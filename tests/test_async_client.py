@@ -0,0 +1,95 @@
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+
+import malclient
+
+pytest.importorskip("aiohttp")
+
+ANIME = {"id": 1, "title": "anime title", "main_picture": {"medium": "https://cdn.myanimelist.net/1.jpg"}}
+RANKING = {"data": [{"node": ANIME, "ranking": {"rank": 1}}], "paging": {"next": "https://api.myanimelist.net/v2/anime/ranking?offset=1"}}
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200):
+        self.status = status
+        self.headers = {}
+        self._body = json.dumps(payload).encode()
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return FakeResponse(self.payload, self.status)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_async_client_returns_same_models_as_client():
+    session = FakeSession(RANKING)
+
+    async def run():
+        async with malclient.AsyncClient(client_id="id", session=session) as client:
+            return await client.get_anime_ranking(limit=1)
+
+    result = asyncio.run(run())
+    assert isinstance(result, malclient.PagedResult)
+    assert result[0].id == 1 and result[0].title == "anime title"
+    method, url, kwargs = session.requests[0]
+    assert (method, url) == ("GET", "https://api.myanimelist.net/v2/anime/ranking")
+    assert kwargs["params"]["limit"] == "1"
+    assert kwargs["headers"]["X-MAL-CLIENT-ID"] == "id"
+    assert session.closed
+
+
+def test_async_client_drops_empty_params():
+    session = FakeSession(RANKING)
+    client = malclient.AsyncClient(client_id="id", session=session)
+    asyncio.run(client.search_anime("cowboy"))
+    assert session.requests[0][2]["params"]["nsfw"] == "False"
+    asyncio.run(client.get_user_anime_list("username"))
+    assert "status" not in session.requests[1][2]["params"]
+
+
+def test_async_client_raises_api_errors():
+    session = FakeSession({"error": "not_found", "message": ""}, status=404)
+    client = malclient.AsyncClient(client_id="id", session=session)
+    with pytest.raises(malclient.NotFound):
+        asyncio.run(client.get_anime_details(1))
+
+
+def test_async_client_fetches_next_page():
+    session = FakeSession(RANKING)
+    client = malclient.AsyncClient(client_id="id", session=session)
+    page = asyncio.run(client.get_anime_ranking(limit=1))
+    next_page = asyncio.run(page.fetch_next_page(client))
+    assert session.requests[1][1] == "https://api.myanimelist.net/v2/anime/ranking?offset=1"
+    assert next_page[0].id == 1
+
+
+def test_async_client_populates_paged_result():
+    session = FakeSession(ANIME)
+    client = malclient.AsyncClient(client_id="id", session=session)
+    page = malclient.PagedResult([malclient.Node(**ANIME)], RANKING["paging"])
+    populated = asyncio.run(page.populate_all(client))
+    assert isinstance(populated[0], malclient.AnimeObject)
+    assert session.requests[0][1] == "https://api.myanimelist.net/v2/anime/1"
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import TokenSet
+
+from test_request_handler import MockResponse
+
+
+class FakeAuthServer(object):
+    # accepts only the newest token, token endpoint issues "token-1", "token-2", ...
+    def __init__(self, valid: str = "token-0"):
+        self.valid = valid
+        self.issued = 0
+        self.used = []
+        self.token_endpoint_open = threading.Event()
+        self.token_endpoint_open.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, headers=None, data=None, **kwargs):
+        if url.endswith("oauth2/token"):
+            self.token_endpoint_open.wait(5)
+        with self._lock:
+            if url.endswith("oauth2/token"):
+                assert data["grant_type"] == "refresh_token" and data["client_id"] == "id"
+                assert "Authorization" not in headers
+                self.issued += 1
+                self.valid = f"token-{self.issued}"
+                return MockResponse({"access_token": self.valid, "refresh_token": f"refresh-{self.issued}", "expires_in": 3600})
+            self.used.append(headers["Authorization"])
+            if headers["Authorization"] != f"Bearer {self.valid}":
+                return MockResponse({"error": "invalid_token"}, 401)
+        return MockResponse({}, 200)
+
+
+def make_client(**options):
+    return malclient.Client(**{"client_id": "id", "client_secret": "secret", "access_token": "token-0",
+                               "refresh_token": "refresh-0"} | options)
+
+
+def test_token_set_tracks_expiry():
+    tokens = TokenSet.from_response({"access_token": "a", "refresh_token": "r", "expires_in": 3600}, now=1000.0)
+    assert tokens.expires_at == 4600.0 and tokens.expires_in(now=4000.0) == 600.0
+    assert tokens.refresh_due(900, now=4000.0) and not tokens.expired(now=4000.0) and tokens.expired(now=4600.0)
+    assert not TokenSet("a").refresh_due(300)
+
+
+def test_unauthorized_request_is_refreshed_once_and_replayed():
+    persisted = []
+    client, server = make_client(on_token_refresh=persisted.append), FakeAuthServer(valid="revoked")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(client.delete_my_anime_list_status, range(16)))
+    assert results == [200] * 16 and server.issued == 1
+    assert client.tokens.access_token == "token-1" and client.refresh_token == "refresh-1"
+    assert persisted == [client.tokens] and client.headers["Authorization"] == "Bearer token-1"
+    assert "X-MAL-Client-ID" not in client.headers
+
+
+def test_token_is_refreshed_in_background_before_expiry():
+    client, server = make_client(expires_in=60, token_refresh_margin=300), FakeAuthServer()
+    server.token_endpoint_open.clear()
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        # request doesn't wait for refresh, token is still valid
+        assert client.delete_my_anime_list_status(1) == 200
+        assert client.delete_my_anime_list_status(2) == 200
+        server.token_endpoint_open.set()
+        deadline = time.monotonic() + 5
+        while client.tokens.access_token == "token-0" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.delete_my_anime_list_status(1) == 200
+    assert server.used == ["Bearer token-0", "Bearer token-0", "Bearer token-1"] and server.issued == 1
+    assert client.tokens.refresh_due(300) is False
+
+
+def test_expired_token_is_refreshed_before_request():
+    client, server = make_client(expires_in=0), FakeAuthServer(valid="expired")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        assert client.delete_my_anime_list_status(1) == 200
+    assert server.used == ["Bearer token-1"]
+
+
+def test_unauthorized_without_refresh_token_is_raised():
+    client, server = malclient.Client(access_token="token-0"), FakeAuthServer(valid="other")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        with pytest.raises(malclient.Unauthorized):
+            client.delete_my_anime_list_status(1)
+    assert server.issued == 0
+
+
+def test_manual_refresh_uses_stored_credentials(capsys):
+    client, server = make_client(), FakeAuthServer()
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        tokens = client.refresh_bearer_token()
+    assert tokens.access_token == "token-1" and tokens.expires_in() > 3500
+    assert capsys.readouterr().out == ""
+
+
+def test_async_unauthorized_request_is_replayed():
+    pytest.importorskip("aiohttp")
+    server = FakeAuthServer(valid="revoked")
+
+    async def fake_call(handler, uri, method="get", data=None, **kwargs):
+        response = server(method, handler._base_url + uri, headers=handler._headers, data=data)
+        if response.status_code >= 400:
+            handler._parse_error(response, method, uri)
+        return response.json()
+
+    async def main():
+        client = malclient.AsyncClient(client_id="id", access_token="token-0", refresh_token="refresh-0")
+        for handler in (client._api_handler, client._token_refresh_request("id", None, "refresh-0")[0]):
+            handler.call = lambda *args, handler=handler, **kwargs: fake_call(handler, *args, **kwargs)
+        results = await asyncio.gather(*[client._call(uri=f"anime/{anime_id}") for anime_id in range(8)])
+        await client.close()
+        return client, results
+
+    client, results = asyncio.run(main())
+    assert results == [{}] * 8 and server.issued == 1 and client.tokens.access_token == "token-1"
@@ -0,0 +1,204 @@
+import asyncio
+import re
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient.batch import fetch_many, iter_fetch_many, async_fetch_many
+
+from test_request_handler import MockResponse
+
+
+def anime(anime_id):
+    return {"id": anime_id, "title": f"anime {anime_id}", "main_picture": {"medium": "https://cdn.myanimelist.net/1.jpg"}}
+
+
+def respond(method, url, **kwargs):
+    anime_id = int(re.search(r"/(\d+)$", url).group(1))
+    if anime_id == 404:
+        return MockResponse({"error": "not_found", "message": ""}, status_code=404)
+    return MockResponse(anime(anime_id))
+
+
+def test_fetch_many_keeps_input_order_and_collects_errors():
+    def function(key):
+        time.sleep(0.01 * (5 - key))
+        if key == 3:
+            raise malclient.NotFound(MockResponse({"error": "not_found"}, 404))
+        return key * 10
+
+    result = fetch_many(function, range(5), concurrency=5)
+    assert result == [0, 10, 20, None, 40]
+    assert result.failed == [3] and isinstance(result.errors[3], malclient.NotFound)
+
+
+def test_fetch_many_bounds_concurrency():
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def function(key):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return key
+
+    assert fetch_many(function, range(12), concurrency=3) == list(range(12))
+    assert peak[0] <= 3
+
+
+def test_fetch_many_aborts_on_unexpected_error():
+    def function(key):
+        if key == 0:
+            raise malclient.BadRequest(MockResponse({"error": "invalid_parameters"}, 400))
+        return key
+
+    with pytest.raises(malclient.BadRequest):
+        fetch_many(function, range(4), concurrency=1)
+
+
+def test_iter_fetch_many_yields_pairs_as_completed():
+    def function(key):
+        time.sleep(0.02 * key)
+        return key
+
+    assert [key for key, _ in iter_fetch_many(function, [3, 1, 2], concurrency=3)] == [1, 2, 3]
+
+
+def test_async_fetch_many_keeps_input_order():
+    async def function(key):
+        await asyncio.sleep(0.01 * (3 - key))
+        if key == 1:
+            raise malclient.Forbidden(MockResponse({"error": "forbidden"}, 403))
+        return key
+
+    result = asyncio.run(async_fetch_many(function, range(3)))
+    assert result == [0, None, 2] and result.failed == [1]
+
+
+def test_client_get_anime_details_many():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond) as request:
+        result = client.get_anime_details_many([5, 404, 7], concurrency=2)
+    assert request.call_count == 3
+    assert [anime.id if anime else None for anime in result] == [5, None, 7]
+    assert result.failed == [404]
+
+
+def test_client_get_anime_details_many_streams_results():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond):
+        pairs = dict(client.get_anime_details_many([1, 2, 404], fields=malclient.Fields(title=True), as_completed=True))
+    assert pairs[1].title == "anime 1" and isinstance(pairs[404], malclient.NotFound)
+
+
+def respond_ranking_or_details(method, url, **kwargs):
+    if url.endswith("anime/ranking"):
+        data = [{"node": anime(anime_id), "ranking": {"rank": rank}} for rank, anime_id in enumerate([3, 404, 1], 1)]
+        return MockResponse({"data": data, "paging": {"next": "https://api.myanimelist.net/v2/anime/ranking?offset=3"}})
+    return respond(method, url, **kwargs)
+
+
+def test_paged_result_populate_all():
+    client = malclient.Client(client_id="id", cache=malclient.MemoryCache())
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond_ranking_or_details) as request:
+        client.get_anime_details(1)
+        ranking = client.get_anime_ranking(limit=3)
+        populated = ranking.populate_all(client, concurrency=2)
+    # anime 1 was already cached, so only 3 and 404 are requested
+    assert request.call_count == 4
+    assert [entry.id for entry in populated] == [3, 404, 1]
+    assert isinstance(populated[0], malclient.AnimeObject) and populated[0].title == "anime 3"
+    assert type(populated[1]) is malclient.Node
+    assert populated._next == ranking._next
+
+
+def test_paged_result_populate_all_keeps_listing_fields():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond_ranking_or_details):
+        ranking = client.get_anime_ranking(limit=3, fields=malclient.Fields(mean=True))
+        populated = ranking.populate_all(client, fields=malclient.Fields(synopsis=True))
+    assert [entry.ranking.rank for entry in populated] == [1, 2, 3]
+
+
+def test_paged_result_populate_all_keeps_listing_fields_of_records():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond_ranking_or_details):
+        ranking = client.get_anime_ranking(limit=3, fields=malclient.Fields(mean=True), records=True)
+        populated = ranking.populate_all(client)
+    assert type(populated[0]) is malclient.AnimeObject and populated[0].title == "anime 3"
+    assert [entry.ranking.rank for entry in populated] == [1, 2, 3]
+    # nested records are converted, so populated entries are regular models
+    assert not isinstance(populated[0].ranking, tuple) and populated[0].dict()["ranking"] == {"rank": 1, "previous_rank": None}
+
+
+def test_paged_result_populate_all_on_lazy_client():
+    client = malclient.Client(client_id="id", lazy=True)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=respond_ranking_or_details):
+        ranking = client.get_anime_ranking(limit=3, fields=malclient.Fields(mean=True))
+        populated = ranking.populate_all(client)
+    assert type(populated[0]) is malclient.LazyAnimeObject and populated[0].title == "anime 3"
+    assert [entry.ranking.rank for entry in populated] == [1, 2, 3]
+    assert populated[0].materialize().ranking.rank == 1
+
+
+def test_paged_result_populate_all_requires_media_type():
+    page = malclient.PagedResult([malclient.Node(**anime(1))], {})
+    with pytest.raises(ValueError):
+        page.populate_all(malclient.Client(client_id="id"))
+
+
+def test_offset_windows():
+    assert malclient.offset_windows(1200, 500) == [(0, 500), (500, 500), (1000, 200)]
+    assert malclient.offset_windows(0, 500) == []
+
+
+def ranking_window(ids):
+    def request(method, url, params=None, **kwargs):
+        offset, limit = int(params["offset"]), int(params["limit"])
+        data = [{"node": anime(anime_id), "ranking": {"rank": offset + rank}} for rank, anime_id in enumerate(ids[offset:offset + limit], 1)]
+        paging = {"next": f"https://api.myanimelist.net/v2/anime/ranking?offset={offset + limit}"} if offset + limit < len(ids) else {}
+        return MockResponse({"data": data, "paging": paging})
+    return request
+
+
+def test_crawl_anime_ranking_stitches_windows_in_order():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=ranking_window(list(range(1, 11)))) as request:
+        ranking = client.crawl_anime_ranking(8, page_size=3)
+    assert request.call_count == 3
+    assert [entry.id for entry in ranking] == list(range(1, 9))
+    assert ranking._next == "https://api.myanimelist.net/v2/anime/ranking?offset=8"
+
+
+def test_crawl_anime_ranking_stops_at_end_of_ranking():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=ranking_window([1, 2, 3, 4])):
+        ranking = client.crawl_anime_ranking(9, page_size=3)
+    assert [entry.id for entry in ranking] == [1, 2, 3, 4] and not ranking.has_next_page
+
+
+def nodes(*ids, **paging):
+    return malclient.PagedResult([malclient.Node(**anime(i)) for i in ids], paging)
+
+
+def test_stitch_pages_drops_entries_shifted_between_windows():
+    # entry 4 climbed above entry 3 before second window was fetched
+    stitched = malclient.stitch_pages([nodes(1, 2, 3, next="next"), nodes(3, 5, 6)], [(0, 3), (3, 3)])
+    assert [entry.id for entry in stitched] == [1, 2, 3, 5, 6]
+    assert (stitched.duplicates, stitched.missing, stitched.shifted) == (1, 0, True)
+
+
+def test_stitch_pages_counts_entries_missing_mid_crawl():
+    # second window shrank and third one failed while crawl was running, fourth one still returned entries
+    pages = [nodes(1, 2, next="n"), nodes(3, next="n"), None, nodes(7, 8, next="n")]
+    stitched = malclient.stitch_pages(pages, malclient.offset_windows(8, 2))
+    assert [entry.id for entry in stitched] == [1, 2, 3, 7, 8] and stitched._next == "n"
+    assert (stitched.duplicates, stitched.missing) == (0, 3)
+
+    unchanged = malclient.stitch_pages([nodes(1, 2, next="n"), nodes(3)], malclient.offset_windows(4, 2))
+    assert not unchanged.shifted and not unchanged.has_next_page
@@ -0,0 +1,188 @@
+import time
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import MemoryCache, SQLiteCache, CacheEntry, CachePolicy, Fields, make_cache_key, project_response
+from malclient.Datamodels.fields import parse_fields_payload, format_fields_payload, fields_cover, merge_fields
+
+from test_request_handler import MockResponse
+
+ANIME = {"id": 1, "title": "anime title", "main_picture": {"medium": "https://cdn.myanimelist.net/1.jpg"}}
+
+
+def entry(body=b"{}", tag="anime/1", ttl=60):
+    now = time.time()
+    return CacheEntry(body, tag, now, now + ttl)
+
+
+@pytest.fixture
+def client():
+    return malclient.Client(access_token="a_random_token", cache=MemoryCache())
+
+
+def test_cache_key_normalizes_params():
+    assert make_cache_key("anime", {"q": "fate", "limit": 5, "nsfw": True, "offset": None}) == \
+           make_cache_key("anime", {"nsfw": "true", "limit": "5", "q": "fate"})
+
+
+def test_incomplete_backend_can_not_be_created():
+    class GetOnly(malclient.CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", entry())
+    cache.set("b", entry())
+    cache.get("a")
+    cache.set("c", entry())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_memory_cache_respects_max_bytes():
+    cache = MemoryCache(max_bytes=10)
+    cache.set("a", entry(b"12345678"))
+    cache.set("b", entry(b"12345678"))
+    assert cache.get("a") is None
+    assert cache.stats.size == 8
+    cache.set("c", entry(b"x" * 11))
+    assert cache.get("c") is None
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache()
+    cache.set("a", entry(ttl=-1))
+    assert cache.get("a") is None
+    assert cache.stats.misses == 1
+
+
+def test_cache_policy_ttls():
+    policy = CachePolicy()
+    assert policy.ttl("anime/1") > policy.ttl("anime/ranking") > 0
+    assert policy.ttl("anime/1/my_list_status") == 0
+    assert policy.ttl("users/@me/animelist") == 0
+    assert policy.invalidated_by("anime/1/my_list_status") == ["anime/1"]
+
+
+def test_client_serves_repeated_details_from_cache(client):
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(ANIME)) as request:
+        first = client.get_anime_details(1)
+        second = client.get_anime_details(1)
+    assert request.call_count == 1
+    assert first.title == second.title == "anime title"
+    assert client.cache.stats.hits == 1 and client.cache.stats.misses == 1
+
+
+def test_list_status_write_invalidates_details(client):
+    status = {"status": "watching", "score": 1, "num_episodes_watched": 1, "is_rewatching": False,
+              "updated_at": "2022-04-03T22:48:25+00:00"}
+    with mock.patch.object(client._api_handler.session, "request",
+                           side_effect=[MockResponse(ANIME), MockResponse(status), MockResponse(ANIME)]) as request:
+        client.get_anime_details(1)
+        client._call(method="patch", uri="anime/1/my_list_status", data={"status": "watching"})
+        client.get_anime_details(1)
+    assert request.call_count == 3
+
+
+def test_cache_survives_token_refresh():
+    client = malclient.Client(client_id="id", access_token="token-0", refresh_token="refresh-0", cache=MemoryCache())
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(ANIME)) as request:
+        client.get_anime_details(1)
+        client._apply_refreshed_token({"access_token": "token-1", "refresh_token": "refresh-1", "expires_in": 3600})
+        assert client.get_anime_details(1).title == "anime title"
+    assert request.call_count == 1 and client.headers["Authorization"] == "Bearer token-1"
+
+    # other user doesn't get responses cached for the first one, unless it is the same user
+    other = malclient.Client(access_token="token-1", cache=client.cache)
+    same = malclient.Client(access_token="token-1", cache=client.cache, cache_identity=client._api_handler.identity)
+    with mock.patch.object(other._api_handler.session, "request", return_value=MockResponse(ANIME)) as request:
+        other.get_anime_details(1)
+    with mock.patch.object(same._api_handler.session, "request", return_value=MockResponse(ANIME)) as same_request:
+        same.get_anime_details(1)
+    assert request.call_count == 1 and same_request.call_count == 0
+
+
+def test_sqlite_cache_persists_between_instances(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    SQLiteCache(path).set("key", entry(b'{"id": 1}'))
+    restarted = SQLiteCache(path)
+    assert restarted.get("key").body == b'{"id": 1}'
+    assert restarted.stats.entries == 1
+
+
+def test_sqlite_cache_compaction_evicts_expired_and_least_recently_used(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_bytes=10)
+    cache.set("expired", entry(b"1", ttl=-1))
+    cache.set("old", entry(b"12345"))
+    cache.set("new", entry(b"12345"))
+    cache.set("newest", entry(b"12345"))
+    assert cache.compact() == 2
+    assert cache.get("old") is None and cache.get("newest") is not None
+    assert cache.stats.size == 10
+
+
+def test_sqlite_cache_invalidate_by_tag(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite")
+    cache.set("a", entry(tag="anime/1"))
+    cache.set("b", entry(tag="anime/2"))
+    cache.invalidate("anime/1")
+    assert cache.get("a") is None and cache.get("b") is not None
+
+
+def test_client_cold_start_from_sqlite_cache(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    warm = malclient.Client(client_id="id", cache=SQLiteCache(path))
+    with mock.patch.object(warm._api_handler.session, "request", return_value=MockResponse(ANIME)):
+        warm.get_anime_details(1)
+    cold = malclient.Client(client_id="id", cache=SQLiteCache(path))
+    with mock.patch.object(cold._api_handler.session, "request") as request:
+        assert cold.get_anime_details(1).title == "anime title"
+    request.assert_not_called()
+
+
+FULL_ANIME = ANIME | {"mean": 8.5, "rank": 10, "my_list_status": {"status": "watching", "score": 8, "num_episodes_watched": 3,
+                                                                  "is_rewatching": False, "updated_at": "2022-04-03T22:48:25+00:00",
+                                                                  "tags": ["tag"], "priority": 1}}
+
+
+def test_fields_helpers():
+    tree = parse_fields_payload("id,title,my_list_status{priority,tags},authors{first_name}")
+    assert format_fields_payload(tree) == "id,title,my_list_status{priority,tags},authors{first_name}"
+    assert fields_cover(tree, parse_fields_payload("id,my_list_status{tags}"))
+    assert not fields_cover(parse_fields_payload("id,my_list_status"), parse_fields_payload("my_list_status{tags}"))
+    assert merge_fields(parse_fields_payload("id"), parse_fields_payload("mean")) == {"id": None, "mean": None}
+
+
+def test_project_response_drops_unrequested_fields():
+    have = parse_fields_payload("id,title,mean,rank,my_list_status{tags,priority}")
+    projected = project_response(FULL_ANIME, have, parse_fields_payload("id,mean,my_list_status{tags}"))
+    assert set(projected) == {"id", "title", "main_picture", "mean", "my_list_status"}
+    assert "priority" not in projected["my_list_status"] and projected["my_list_status"]["score"] == 8
+
+
+def test_narrow_request_served_from_wider_entry(client):
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(FULL_ANIME)) as request:
+        client.get_anime_fields(1, Fields(mean=True, rank=True, my_list_status={"tags": True, "priority": True}))
+        narrow = client.get_anime_fields(1, Fields.from_list(["id", "mean"]))
+    assert request.call_count == 1
+    assert narrow.mean == 8.5 and narrow.rank is None and narrow.my_list_status is None
+
+
+def test_wider_request_upgrades_entry_once(client):
+    responses = [MockResponse({k: FULL_ANIME[k] for k in ("id", "title", "main_picture", "mean")}), MockResponse(FULL_ANIME)]
+    with mock.patch.object(client._api_handler.session, "request", side_effect=responses) as request:
+        client.get_anime_fields(1, Fields.from_list(["id", "title", "mean"]))
+        wide = client.get_anime_fields(1, Fields.from_list(["id", "title", "rank"]))
+        narrow = client.get_anime_fields(1, Fields.from_list(["id", "title", "mean"]))
+    assert request.call_count == 2
+    assert set(request.call_args.kwargs["params"]["fields"].split(",")) == {"id", "title", "main_picture", "mean", "rank"}
+    assert wide.rank == 10 and wide.mean is None
+    assert narrow.mean == 8.5 and narrow.rank is None
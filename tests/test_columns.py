@@ -0,0 +1,87 @@
+import asyncio
+import datetime
+import re
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import AnimeObject, AnimeRecord, PagedResult
+
+from test_request_handler import MockResponse
+
+TOTAL = 5
+PAGE = 2
+
+
+def anime(anime_id):
+    return {"id": anime_id, "title": f"anime {anime_id}", "mean": 8.5 if anime_id % 2 else None, "rank": anime_id + 1,
+            "media_type": "tv" if anime_id < 3 else "movie", "start_date": "2001-04-03",
+            "list_status": {"status": "completed" if anime_id % 2 else "watching", "score": anime_id, "num_episodes_watched": 12,
+                            "is_rewatching": False, "updated_at": "2020-01-01T10:00:00+02:00"}}
+
+
+def list_page(method, url, params=None, **kwargs):
+    offset = int(re.search(r"offset=(\d+)", url).group(1)) if "offset=" in url else int((params or {}).get("offset", 0))
+    data = []
+    for i in range(offset, min(offset + PAGE, TOTAL)):
+        entry = anime(i)
+        data.append({"node": entry, "list_status": entry.pop("list_status")})
+    paging = {}
+    if offset + PAGE < TOTAL:
+        paging["next"] = f"https://api.myanimelist.net/v2/users/@me/animelist?offset={offset + PAGE}&limit={PAGE}"
+    return MockResponse({"data": data, "paging": paging})
+
+
+COLUMNS = ("id", "mean", "media_type", "list_status.score", "list_status.status")
+
+
+def test_page_to_columns_reads_models_and_records():
+    data = [anime(i) for i in range(3)]
+    for r_class in (AnimeObject, AnimeRecord):
+        page = PagedResult([malclient.Datamodels.records.from_entry(r_class, entry) for entry in data], {})
+        columns = page.to_columns(COLUMNS)
+        assert columns["id"] == [0, 1, 2] and columns["mean"] == [None, 8.5, None]
+        assert columns["list_status.score"] == [0, 1, 2] and columns.rows == 3
+    assert page.to_columns()["list_status.num_episodes_watched"] == [12, 12, 12]
+
+
+def test_user_list_columns_are_collected_from_all_pages():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=list_page) as request:
+        columns = client.get_user_anime_list_columns(columns=COLUMNS, limit=PAGE)
+    assert columns["id"] == list(range(TOTAL))
+    assert columns["list_status.status"] == ["watching", "completed"] * 2 + ["watching"]
+    assert request.call_count == 3
+    # fields needed by columns are requested
+    assert "mean" in request.call_args_list[0].kwargs["params"]["fields"]
+
+
+def test_async_user_list_columns():
+    pytest.importorskip("aiohttp")
+
+    async def fake_call(uri, *, build=None, **kwargs):
+        response = list_page("GET", "https://api.myanimelist.net/v2/" + uri, params=kwargs.get("params"))
+        return build(client._api_handler._parse_json(response.json()))
+
+    client = malclient.AsyncClient(client_id="id")
+    client._call = fake_call
+    columns = asyncio.run(client.get_user_anime_list_columns(columns=COLUMNS, limit=PAGE, max_items=3))
+    assert columns["id"] == [0, 1, 2]
+
+
+def test_to_numpy_types():
+    np = pytest.importorskip("numpy")
+    page = PagedResult([AnimeRecord.from_data(anime(i)) for i in range(4)], {})
+    columns = page.to_numpy(COLUMNS + ("rank", "start_date", "list_status.updated_at"))
+    assert columns["id"].dtype == np.int64 and columns["rank"].tolist() == [1, 2, 3, 4]
+    assert columns["mean"].dtype == np.float64 and np.isnan(columns["mean"][0])
+    assert columns["media_type"].dtype == np.int16
+    assert columns.decode("media_type") == ["tv", "tv", "tv", "movie"]
+    assert columns.categories["list_status.status"] == ("completed", "watching")
+    assert columns["start_date"][0] == np.datetime64("2001-04-03")
+    assert columns["list_status.updated_at"][0] == np.datetime64(datetime.datetime(2020, 1, 1, 8, 0))
+
+
+def test_columns_of_empty_page():
+    assert PagedResult([], {}).to_columns(COLUMNS).rows == 0
@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+from malclient import Fields, ListStatusFields, CharacterFields, UserFields
+
+
+def test_payload_keeps_declaration_order_and_nested_fields():
+    fields = Fields(mean=True, rank=True, my_list_status={"tags": True, "priority": True}, related_anime={"mean": True})
+    assert fields.to_payload() == "id,title,main_picture,mean,rank,my_list_status{priority,tags},related_anime{id,title,main_picture,mean}"
+    assert CharacterFields(animeography=True).to_payload() == "id,role,animeography{id,title,main_picture}"
+    assert UserFields.basic().to_payload() == "id,name,picture,gender,location,joined_at,anime_statistics"
+    # empty nested fields aren't requested
+    assert Fields(my_list_status=True).to_payload() == "id,title,main_picture"
+
+
+def test_fields_are_immutable():
+    fields = Fields.node()
+    with pytest.raises(AttributeError):
+        fields.mean = True
+    changed = fields.replace(mean=True, list_status=ListStatusFields(tags=True))
+    assert fields.to_payload() == "id,title,main_picture"
+    assert changed.to_payload() == "id,title,main_picture,mean,list_status{tags}"
+    assert changed.mean and changed.list_status == ListStatusFields(tags=True) and not changed.rank
+
+
+def test_equality_and_hash():
+    assert Fields.from_list(["id", "title", "main_picture"]) == Fields.node() == Fields()
+    assert Fields(my_list_status=True) != Fields() and Fields(mean=True) != Fields()
+    assert Fields() != ListStatusFields()
+    assert len({Fields(), Fields.node(), Fields(mean=True), Fields(mean=True)}) == 2
+    assert pickle.loads(pickle.dumps(Fields.anime())) == Fields.anime()
+
+
+def test_presets_are_shared():
+    assert Fields.node() is Fields.node() and Fields.anime() is Fields.anime()
+    assert ListStatusFields.all() is ListStatusFields.all() and ListStatusFields.all() is not Fields.all()
+    assert ListStatusFields.all().to_payload() == "priority,tags,comments,num_times_reread,reread_value,num_times_rewatched,rewatch_value"
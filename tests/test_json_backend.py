@@ -0,0 +1,61 @@
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import json_backend
+from malclient.request_handler import APICaller
+
+from test_request_handler import MockResponse
+
+
+@pytest.fixture
+def restore_backend():
+    selected = json_backend.backend
+    yield
+    json_backend.use_backend(selected)
+
+
+def _installed(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def test_first_installed_backend_is_selected(restore_backend):
+    assert json_backend.use_backend() == next(name for name in json_backend.BACKENDS if _installed(name))
+
+
+@pytest.mark.parametrize("name", json_backend.BACKENDS)
+def test_backends_decode_bytes(name, restore_backend):
+    if not _installed(name):
+        pytest.skip(f"{name} is not installed")
+    json_backend.use_backend(name)
+    assert json_backend.loads('{"title": "Sōsō no Frieren"}'.encode()) == {"title": "Sōsō no Frieren"}
+    assert json_backend.loads(json_backend.dumps({"id": 1})) == {"id": 1}
+
+
+def test_unknown_backend_raises(restore_backend):
+    with pytest.raises(ValueError):
+        json_backend.use_backend("simdjson")
+
+
+def test_error_body_is_decoded_once():
+    caller = APICaller(base_url="https://api.myanimelist.net/v2/", headers={})
+    response = MockResponse({"error": "not_found", "message": "missing"}, status_code=404)
+    with mock.patch.object(json_backend, "_loads", wraps=json_backend._loads) as loads:
+        with pytest.raises(malclient.NotFound) as error:
+            caller._parse_error(response, "get", "url")
+    assert loads.call_count == 1
+    assert error.value.message == "missing"
+
+
+def test_error_without_json_body():
+    caller = APICaller(base_url="https://api.myanimelist.net/v2/", headers={})
+    response = MockResponse(None, status_code=502)
+    response.content = b"<html>Bad Gateway</html>"
+    with pytest.raises(malclient.APIException) as error:
+        caller._parse_error(response, "get", "url")
+    assert error.value.status_code == 502 and error.value.message is None
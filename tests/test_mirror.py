@@ -0,0 +1,98 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import AnimeObject, AnimeRecord, Character, SQLiteMirror
+
+from test_sync import FakeList
+
+
+def details(anime_id, **extra):
+    return AnimeObject(**{"id": anime_id, "title": f"anime {anime_id}", "mean": 9 - anime_id / 10, "rank": anime_id + 1,
+                          "media_type": "tv", "status": "finished_airing", "start_date": "2020-04-01",
+                          "genres": [{"id": 1, "name": "Action"}] + ([{"id": 2, "name": "Drama"}] if anime_id % 2 else []),
+                          "studios": [{"id": 10, "name": "Studio"}], "synopsis": "long text",
+                          "related_anime": [{"node": {"id": anime_id + 1, "title": "sequel"}, "relation_type": "sequel",
+                                             "relation_type_formatted": "Sequel"}],
+                          "recommendations": [{"node": {"id": 0, "title": "anime 0"}, "num_recommendations": 5}]} | extra)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = SQLiteMirror(tmp_path / "mirror.sqlite")
+    yield mirror
+    mirror.close()
+
+
+def test_upsert_and_query_return_models(mirror):
+    assert mirror.upsert_anime([details(anime_id) for anime_id in range(4)]) == 4
+    anime = mirror.get_anime(1)
+    assert isinstance(anime, AnimeObject) and anime == details(1)
+    assert anime.start_date == datetime.date(2020, 4, 1) and anime.media_type is malclient.AnimeType.TV
+    assert mirror.get_anime(100) is None and mirror.get_manga(1) is None
+
+    assert [entry.id for entry in mirror.query(genre=2)] == [1, 3]
+    assert [entry.id for entry in mirror.query(studio=10, order_by="mean", descending=True, limit=2)] == [0, 1]
+    assert [entry.id for entry in mirror.query(media_type=malclient.AnimeType.TV, status="finished_airing")] == [0, 1, 2, 3]
+    assert mirror.query(media_type="movie") == []
+    with pytest.raises(ValueError):
+        mirror.query(order_by="data")
+
+    assert [(relation, entry.id) for relation, entry in mirror.related("anime", 1)] == [("sequel", 2)]
+    assert mirror.related("anime", 3) == []  # sequel isn't mirrored
+    assert [(count, entry.id) for count, entry in mirror.recommendations("anime", 2)] == [(5, 0)]
+
+
+def test_narrow_entries_do_not_erase_stored_details(mirror):
+    mirror.upsert_anime([details(1)])
+    mirror.upsert_anime([AnimeRecord.from_data({"id": 1, "title": "renamed", "num_episodes": 12})])
+    anime = mirror.get_anime(1)
+    assert anime.title == "renamed" and anime.num_episodes == 12 and anime.synopsis == "long text"
+    assert [genre.id for genre in anime.genres] == [1, 2]
+    # updated genres replace stored ones
+    mirror.upsert_anime([details(1, genres=[{"id": 3, "name": "Comedy"}])])
+    assert [entry.id for entry in mirror.query(genre=2)] == [] and [entry.id for entry in mirror.query(genre=3)] == [1]
+
+
+def test_narrow_pages_are_mirrored(mirror):
+    page = malclient.PagedResult([malclient.Node(id=1, title="a")], {})
+    assert mirror.upsert_anime(page) == 1
+    assert mirror.upsert_anime([malclient.NodeRecord(id=2, title="b")]) == 1
+    projected = malclient.project_model(AnimeObject, malclient.Fields.from_list(["mean"]))(id=3, title="c", mean=7.5)
+    assert mirror.upsert_anime([projected]) == 1
+    assert [(entry.id, entry.title, entry.mean) for entry in mirror.query(order_by="id")] == \
+        [(1, "a", None), (2, "b", None), (3, "c", 7.5)]
+    # details stored later extend mirrored node
+    mirror.upsert_anime([details(1)])
+    assert mirror.get_anime(1).title == "anime 1" and [genre.id for genre in mirror.get_anime(1).genres] == [1, 2]
+
+
+def test_characters_and_people(mirror):
+    mirror.upsert_characters([Character(id=5, first_name="Edward", last_name="Elric", num_favorites=10)])
+    mirror.upsert_people([malclient.Person(id=6, first_name="Hiromu", last_name="Arakawa", birthday="1973-05-08")])
+    assert mirror.get_character(5).last_name == "Elric"
+    assert mirror.get_person(6).birthday == datetime.date(1973, 5, 8)
+    assert mirror.get_character(6) is None
+
+
+def test_mirror_as_sync_store(tmp_path):
+    client, mirror, server = malclient.Client(client_id="id"), SQLiteMirror(tmp_path / "mirror.sqlite"), FakeList(5)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        client.sync_user_anime_list(store=mirror, page_size=2)
+        server.touch(3, day=4)
+        result = client.sync_user_anime_list(store=mirror)
+    assert not result.full and mirror.watermark("@me", "anime") == result.watermark
+    entries = mirror.entries("@me", "anime")
+    assert [entry.id for entry in entries][:1] == [3] and len(entries) == 5
+    assert entries[0].list_status.updated_at.month == 2
+    assert mirror.get_list_status("@me", "anime", 3).num_episodes_watched == 1
+    # list entries are mirrored as well
+    assert mirror.get_anime(4).title == "anime 4"
+
+    # reopened mirror keeps data
+    mirror.close()
+    reopened = SQLiteMirror(tmp_path / "mirror.sqlite")
+    assert len(reopened.entries("@me", "anime")) == 5
+    reopened.close()
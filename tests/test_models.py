@@ -0,0 +1,186 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import AnimeObject, MangaObject, trusted_construction
+
+from test_request_handler import MockResponse
+
+ANIME = {
+    "id": 1, "title": "anime", "main_picture": {"medium": "https://cdn.myanimelist.net/m.jpg", "large": "https://cdn.myanimelist.net/l.jpg"},
+    "start_date": "2001-04-03", "end_date": "2001-04", "mean": 8.5, "nsfw": "white", "media_type": "tv", "status": "finished_airing",
+    "genres": [{"id": 1, "name": "Action"}], "created_at": "2001-01-01T00:00:00+00:00", "source": "web_manga",
+    "start_season": {"year": 2001, "season": "spring"}, "broadcast": {"day_of_the_week": "monday", "start_time": "20:00"},
+    "statistics": {"status": {"watching": 1, "completed": 2, "on_hold": 3, "dropped": 4, "plan_to_watch": 5}, "num_list_users": 15},
+    "related_anime": [{"node": {"id": 2, "title": "sequel"}, "relation_type": "sequel", "relation_type_formatted": "Sequel"}],
+    "my_list_status": {"score": 9, "status": "completed", "is_rewatching": False, "updated_at": "2020-01-01T00:00:00+00:00",
+                       "num_episodes_watched": 12},
+    "unknown_field": "ignored",
+}
+MANGA = {"id": 2, "title": "manga", "media_type": "manhwa", "status": "publishing", "num_volumes": 3,
+         "authors": [{"node": {"id": 1, "first_name": "a", "last_name": "b"}, "role": "Story"}],
+         "serialization": [{"node": {"id": 3, "name": "magazine"}}]}
+
+
+def test_trusted_construction_matches_validated_models():
+    for model, data in ((AnimeObject, ANIME), (MangaObject, MANGA)):
+        validated = model(**data)
+        with trusted_construction():
+            trusted = model(**data)
+        assert trusted.dict() == validated.dict()
+        assert trusted.__fields_set__ == validated.__fields_set__
+
+
+def test_trusted_construction_converts_enums_dates_and_nested_models():
+    with trusted_construction():
+        anime = AnimeObject(**ANIME)
+    assert anime.nsfw is malclient.Nsfw.WHITE and anime.status is malclient.AnimeStatus.FINISHED
+    assert anime.start_date == datetime.date(2001, 4, 3) and anime.end_date == "2001-04"
+    assert anime.broadcast.start_time == datetime.time(20, 0)
+    assert anime.statistics.completed == 2 and anime.related_anime[0].node.title == "sequel"
+    assert not hasattr(anime, "unknown_field")
+    # urls are not parsed
+    assert type(anime.main_picture.medium) is str
+
+
+def test_trusted_construction_is_scoped():
+    with trusted_construction():
+        with trusted_construction(False):
+            assert not malclient.is_trusted()
+        assert malclient.is_trusted()
+    assert not malclient.is_trusted()
+
+
+def test_client_validation_modes():
+    client = malclient.Client(client_id="id", validate=False)
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(ANIME)):
+        trusted = client.get_anime_details(1)
+        validated = client.get_anime_details(1, validate=True)
+    assert type(trusted.main_picture.medium) is str
+    assert isinstance(validated.main_picture.medium, malclient.Datamodels.models.HttpUrl)
+    assert not malclient.is_trusted()
+
+
+def test_lazy_construction_wraps_raw_data():
+    with malclient.lazy_construction():
+        anime = AnimeObject(**ANIME)
+    assert isinstance(anime, malclient.LazyAnimeObject)
+    assert (anime.id, anime.title, str(anime)) == (1, "anime", "anime")
+    assert anime._values is None  # nothing was converted yet
+    assert anime.genres[0].name == "Action" and anime.genres is anime.genres
+    assert anime.status is malclient.AnimeStatus.FINISHED and anime.num_episodes is None
+    assert anime.statistics.completed == 2
+    assert anime.materialize().dict() == AnimeObject(**ANIME).dict()
+    assert anime == AnimeObject(**ANIME)
+
+
+def test_lazy_model_exposes_model_methods():
+    anime = malclient.LazyAnimeObject(**ANIME)
+    client = mock.Mock()
+    anime.populate(client)
+    client.get_anime_details.assert_called_once_with(1)
+    anime.title = "changed"
+    assert anime.title == "changed" and anime.materialize().title == "changed"
+    with pytest.raises(AttributeError):
+        anime.unknown_field
+
+
+def test_lazy_client_pages_stay_lazy():
+    ranking = {"data": [{"node": ANIME, "ranking": {"rank": 1}}], "paging": {"next": "https://api.myanimelist.net/v2/anime/ranking?offset=1"}}
+    client = malclient.Client(client_id="id", lazy=True)
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(ranking)):
+        page = client.get_anime_ranking(fields=malclient.Fields(mean=True))
+        next_page = page.fetch_next_page(client)
+    assert type(page[0]) is malclient.LazyAnimeObject and type(next_page[0]) is malclient.LazyAnimeObject
+    assert page[0].ranking.rank == 1
+    assert not malclient.is_lazy()
+
+
+def with_genres(anime_id):
+    return {"id": anime_id, "title": "anime", "genres": [{"id": 1, "name": "Action"}, {"id": 2, "name": "Comedy"}],
+            "studios": [{"id": 3, "name": "studio"}]}
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_nested_objects_are_interned(trusted):
+    malclient.intern_registry.clear()
+    with trusted_construction(trusted):
+        first, second = AnimeObject(**with_genres(1)), AnimeObject(**with_genres(2))
+    assert first.genres[0] is second.genres[0] and first.studios[0] is second.studios[0]
+    stats = malclient.interning_stats()
+    assert stats["Genre"] == (2, 2, 2) and stats["Genre"].ratio == 0.5
+    with pytest.raises(TypeError):
+        first.genres[0].name = "changed"
+
+
+def test_interning_statistics_are_exact_across_threads():
+    registry, barrier = malclient.InternRegistry(), threading.Barrier(8)
+
+    def build(data):
+        time.sleep(0.001)
+        return malclient.Genre(**data)
+
+    def intern(_):
+        barrier.wait()
+        return [registry.intern(malclient.Genre, {"id": 1, "name": "Action"}, build) for _ in range(100)]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = [genre for genres in executor.map(intern, range(8)) for genre in genres]
+    stats = registry.stats()["Genre"]
+    assert stats.hits + stats.misses == 800 and stats.misses == 1
+    assert all(genre is results[0] for genre in results)
+
+
+def test_authors_are_interned_but_people_stay_mutable():
+    author = {"node": {"id": 1, "first_name": "Hiromu", "last_name": "Arakawa"}, "role": "Story & Art"}
+    first, second = (malclient.MangaObject(id=manga_id, title="manga", authors=[author]) for manga_id in (1, 2))
+    assert first.authors[0].node is second.authors[0].node
+    assert isinstance(first.authors[0].node, malclient.Datamodels.models.PersonBase)
+    person = malclient.Person(id=1, first_name="Hiromu", last_name="Arakawa")
+    person.num_favorites = 10
+    assert person.num_favorites == 10
+
+
+def test_trusted_and_validated_instances_are_not_mixed():
+    validated = AnimeObject(**with_genres(1))
+    with trusted_construction():
+        trusted = AnimeObject(**with_genres(1))
+    assert validated.genres[0] is not trusted.genres[0] and validated.genres[0] == trusted.genres[0]
+
+
+def test_interning_can_be_disabled_and_drops_unused_instances():
+    registry = malclient.intern_registry
+    registry.clear()
+    registry.enabled = False
+    try:
+        assert AnimeObject(**with_genres(1)).genres[0] is not AnimeObject(**with_genres(2)).genres[0]
+    finally:
+        registry.enabled = True
+    anime = AnimeObject(**with_genres(1))
+    assert malclient.interning_stats()["Genre"].live == 2
+    del anime
+    assert malclient.interning_stats()["Genre"].live == 0
+
+
+def test_projected_model_contains_only_requested_fields():
+    fields = malclient.Fields.from_list(["mean", "genres"])
+    projected = malclient.project_model(AnimeObject, fields)
+    assert projected is malclient.project_model(AnimeObject, malclient.Fields.from_list(["mean", "genres"]))
+    assert list(projected.__fields__) == ["id", "title", "main_picture", "mean", "genres"]
+    for trusted in (False, True):
+        with trusted_construction(trusted):
+            anime = projected(**ANIME)
+        assert anime.mean == 8.5 and anime.genres[0].name == "Action" and not hasattr(anime, "synopsis")
+
+
+def test_client_projection():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(MANGA)):
+        manga = client.get_manga_fields(2, malclient.Fields.from_list(["num_volumes"]), project=True)
+    assert type(manga).__name__ == "ProjectedMangaObject" and manga.num_volumes == 3
+    assert set(manga.__fields__) == {"id", "title", "main_picture", "num_volumes"}
@@ -0,0 +1,89 @@
+import asyncio
+import re
+import threading
+from unittest import mock
+
+import pytest
+
+import malclient
+
+from test_request_handler import MockResponse
+
+TOTAL = 7
+PAGE = 3
+
+
+def ranking_page(method, url, params=None, **kwargs):
+    offset = int(re.search(r"offset=(\d+)", url).group(1)) if "offset=" in url else int((params or {}).get("offset", 0))
+    data = [{"node": {"id": i, "title": f"anime {i}"}, "ranking": {"rank": i + 1}} for i in range(offset, min(offset + PAGE, TOTAL))]
+    paging = {}
+    if offset + PAGE < TOTAL:
+        paging["next"] = f"https://api.myanimelist.net/v2/anime/ranking?offset={offset + PAGE}&limit={PAGE}"
+    return MockResponse({"data": data, "paging": paging})
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iter_anime_ranking_walks_all_pages(prefetch):
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=ranking_page) as request:
+        ids = [anime.id for anime in client.iter_anime_ranking(limit=PAGE, prefetch=prefetch)]
+    assert ids == list(range(TOTAL))
+    assert request.call_count == 3
+
+
+def test_iter_all_stops_fetching_after_max_items():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=ranking_page) as request:
+        page = client.get_anime_ranking(limit=PAGE)
+        ids = [anime.id for anime in page.iter_all(client, max_items=4, prefetch=0)]
+    assert ids == [0, 1, 2, 3]
+    assert request.call_count == 2
+
+
+def test_iter_all_raises_errors_of_background_fetch():
+    client = malclient.Client(client_id="id")
+    responses = iter([ranking_page("GET", "https://api.myanimelist.net/v2/anime/ranking"),
+                      MockResponse({"error": "invalid_parameters", "message": ""}, status_code=400)])
+    with mock.patch.object(client._api_handler.session, "request", side_effect=lambda *args, **kwargs: next(responses)):
+        entries = client.iter_anime_ranking(limit=PAGE)
+        with pytest.raises(malclient.BadRequest):
+            for _ in entries:
+                pass
+
+
+def test_iter_all_stops_background_thread_when_closed():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", side_effect=ranking_page):
+        entries = client.iter_anime_ranking(limit=PAGE, prefetch=1)
+        next(entries)
+        producers = [thread for thread in threading.enumerate() if "produce" in thread.name]
+        entries.close()
+    for thread in producers:
+        thread.join(timeout=1)
+    assert producers and not any(thread.is_alive() for thread in producers)
+
+
+def test_fetch_next_page_on_last_page_raises_not_found():
+    page = malclient.PagedResult([malclient.Node(id=1, title="anime")], {})
+    assert not page.has_next_page
+    with pytest.raises(malclient.NotFound):
+        page.fetch_next_page(malclient.Client(client_id="id"))
+
+
+def test_aiter_all():
+    pytest.importorskip("aiohttp")
+    calls = []
+
+    async def fake_call(uri, *, build=None, **kwargs):
+        calls.append(uri)
+        response = ranking_page("GET", "https://api.myanimelist.net/v2/" + uri, params=kwargs.get("params"))
+        return build(client._api_handler._parse_json(response.json()))
+
+    client = malclient.AsyncClient(client_id="id")
+    client._call = fake_call
+
+    async def run():
+        return [anime.id async for anime in client.iter_anime_ranking(limit=PAGE, max_items=5)]
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert len(calls) == 2
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import ClientPool, Client
+
+from test_request_handler import MockResponse
+
+PAGE = {"data": [], "paging": {}}
+
+
+class FakeServer(object):
+    # responds with status assigned to credential (client id or bearer token), 200 by default
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        credential = headers.get("X-MAL-CLIENT-ID") or headers["Authorization"].split()[-1]
+        with self._lock:
+            self.calls.append((credential, url.split("/v2/", 1)[1].split("?", 1)[0]))
+        status = self.statuses.get(credential, 200)
+        if status != 200:
+            return MockResponse({"error": "error"}, status, headers={"Retry-After": "120"} if status == 429 else None)
+        return MockResponse(PAGE)
+
+
+def make_pool(*credentials, **options):
+    credentials = credentials or ({"client_id": "a"}, {"client_id": "b"}, {"client_id": "c"})
+    return ClientPool.from_credentials(credentials, rate=1000, burst=1000, **options)
+
+
+def serve(pool, server):
+    return mock.patch.object(pool.clients[0]._api_handler.session, "request", side_effect=server)
+
+
+def test_requests_are_spread_across_credentials():
+    pool, server = make_pool(), FakeServer()
+    with serve(pool, server):
+        for _ in range(6):
+            pool.search_anime("naruto")
+    assert Counter(credential for credential, _ in server.calls) == {"a": 2, "b": 2, "c": 2}
+    assert all(client.rate_limiter is not pool.clients[0].rate_limiter for client in pool.clients[1:])
+
+
+def test_least_throttled_credential_is_preferred():
+    pool, server = make_pool(), FakeServer()
+    for client in pool.clients[:2]:
+        for _ in range(2000):
+            client.rate_limiter.acquire()
+    with serve(pool, server):
+        for _ in range(3):
+            pool.search_anime("naruto")
+    assert [credential for credential, _ in server.calls] == ["c"] * 3
+
+
+def test_throttled_credential_is_cooled_down_and_request_retried():
+    pool, server = make_pool(), FakeServer({"a": 429})
+    with serve(pool, server):
+        for _ in range(4):
+            pool.search_anime("naruto")
+    assert [credential for credential, _ in server.calls].count("a") == 1 and len(server.calls) == 5
+    assert pool.stats()[0]["cooldown"] > 100
+
+
+def test_requests_are_not_sent_while_all_credentials_are_cooled_down():
+    pool, server = make_pool({"client_id": "a"}, {"client_id": "b"}), FakeServer({"a": 429, "b": 429})
+    with serve(pool, server):
+        for _ in range(3):
+            with pytest.raises(malclient.TooManyRequests):
+                pool.search_anime("naruto")
+    assert sorted(credential for credential, _ in server.calls) == ["a", "b"]
+
+    # short cooldown is waited out
+    pool, server = make_pool({"client_id": "a"}, max_cooldown_wait=1.0), FakeServer()
+    pool._cool_down(pool._members[id(pool.clients[0])], 0.05)
+    with serve(pool, server):
+        start = time.monotonic()
+        pool.search_anime("naruto")
+    assert time.monotonic() - start >= 0.05 and len(server.calls) == 1
+
+
+def test_forbidden_credential_is_cooled_down_only_if_other_succeeds():
+    pool, server = make_pool(), FakeServer({"a": 403})
+    with serve(pool, server):
+        pool.search_anime("naruto")
+    assert [credential for credential, _ in server.calls] == ["a", "b"] and pool.stats()[0]["cooldown"] > 0
+
+    # entry forbidden for everyone is tried twice and nobody is cooled down
+    pool, server = make_pool(), FakeServer({"a": 403, "b": 403, "c": 403})
+    with serve(pool, server):
+        with pytest.raises(malclient.Forbidden):
+            pool.search_anime("naruto")
+    assert len(server.calls) == 2 and all(stats["cooldown"] == 0 for stats in pool.stats())
+
+
+def test_user_scoped_requests_are_pinned_to_user_token():
+    pool, server = make_pool({"client_id": "a"}, {"client_id": "b"}, {"access_token": "user"}, {"access_token": "other"}), FakeServer()
+    assert pool.user is pool.clients[2] and pool.authorized
+    with serve(pool, server):
+        pool.get_user_anime_list()
+        pool.get_suggested_anime()
+        pool.delete_my_manga_list_status(1)
+        pool.get_user_anime_list("someone")
+        with pool.as_user(pool.clients[3]):
+            pool.get_user_manga_list()
+    assert server.calls[:3] == [("user", "users/@me/animelist"), ("user", "anime/suggestions"), ("user", "manga/1/my_list_status")]
+    assert server.calls[3][0] != "user" and server.calls[4] == ("other", "users/@me/mangalist")
+
+
+def test_user_scoped_request_is_not_moved_to_other_credential():
+    pool, server = make_pool({"client_id": "a"}, {"access_token": "user"}), FakeServer({"user": 429})
+    with serve(pool, server):
+        with pytest.raises(malclient.TooManyRequests):
+            pool.get_user_anime_list()
+    assert server.calls == [("user", "users/@me/animelist")]
+
+    pool = make_pool()
+    with pytest.raises(malclient.MainAuthRequiredError):
+        pool.get_user_anime_list()
+    with pytest.raises(ValueError):
+        with pool.as_user(pool.clients[0]):
+            pass
+    with pytest.raises(ValueError):
+        ClientPool(pool.clients, user=pool.clients[0])
+
+
+def test_pool_has_no_credentials_of_its_own():
+    pool = make_pool({"client_id": "a"}, {"client_id": "a", "access_token": "user", "refresh_token": "refresh"})
+    assert isinstance(pool, malclient.BaseClient) and not isinstance(pool, Client)
+    assert not hasattr(pool, "refresh_bearer_token") and pool.clients[1].tokens.refresh_token == "refresh"
+    with pool:
+        pass
+
+
+def test_async_pool():
+    pytest.importorskip("aiohttp")
+    calls = []
+
+    def member_call(client, name):
+        async def call(uri, **kwargs):
+            calls.append(name)
+            if name == "a":
+                raise malclient.TooManyRequests(MockResponse({}, 429), "throttled")
+            await asyncio.sleep(0)
+            return PAGE
+        return call
+
+    async def main():
+        pool = malclient.AsyncClientPool([malclient.AsyncClient(client_id=name) for name in "ab"])
+        for client, name in zip(pool.clients, "ab"):
+            client._call = member_call(client, name)
+        results = await asyncio.gather(*[pool.search_anime("naruto") for _ in range(4)])
+        await pool.close()
+        return results
+
+    assert len(asyncio.run(main())) == 4 and calls.count("a") == 1 and calls.count("b") == 4
@@ -0,0 +1,103 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from malclient import RateLimiter, TokenBucket, TooManyRequests, parse_retry_after
+from malclient.request_handler import APICaller
+
+from test_request_handler import MockResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    clock.now = 10
+    assert bucket.reserve() == 0
+
+
+def test_wait_time_does_not_reserve():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=1, clock=clock)
+    assert limiter.wait_time() == 0 and limiter.wait_time() == 0
+    limiter.acquire()
+    assert limiter.wait_time() == pytest.approx(0.5)
+    limiter.retry_delay(0, 429, retry_after=3)
+    assert limiter.wait_time() == pytest.approx(3)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_retry_delay_honours_retry_after_and_blocks_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=100, burst=100, jitter=False, clock=clock)
+    assert limiter.retry_delay(0, 429, retry_after=5) == 5
+    assert limiter.acquire() == pytest.approx(5)
+    assert limiter.retry_delay(0, 404) is None
+    assert limiter.retry_delay(limiter.max_retries, 503) is None
+
+
+def test_exponential_backoff_is_capped():
+    limiter = RateLimiter(jitter=False, backoff_base=1, backoff_max=10)
+    assert [limiter.retry_delay(attempt, 503) for attempt in range(5)] == [1, 2, 4, 8, 10]
+
+
+def test_adaptive_mode_backs_off_and_recovers():
+    limiter = RateLimiter(rate=4, adaptive=True, min_rate=1)
+    limiter.retry_delay(0, 429)
+    limiter.retry_delay(0, 429)
+    limiter.retry_delay(0, 429)
+    assert limiter.rate == 1
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.rate == 4
+
+
+def test_caller_retries_throttled_requests():
+    session = requests.Session()
+    limiter = RateLimiter(rate=1000, burst=10, jitter=False)
+    caller = APICaller("https://api.myanimelist.net/v2/", {}, session=session, rate_limiter=limiter)
+    responses = [MockResponse({"error": "", "message": ""}, 429, {"Retry-After": "1"}),
+                 MockResponse({"error": "", "message": ""}, 502),
+                 MockResponse({"id": 1})]
+    with mock.patch.object(session, "request", side_effect=responses) as request, \
+            mock.patch("malclient.request_handler.time.sleep") as sleep:
+        assert caller.call(uri="anime/1") == {"id": 1}
+    assert request.call_count == 3
+    assert sleep.call_args_list[0].args[0] >= 1
+
+
+def test_caller_raises_after_retries_are_exhausted():
+    session = requests.Session()
+    caller = APICaller("https://api.myanimelist.net/v2/", {}, session=session,
+                       rate_limiter=RateLimiter(rate=1000, max_retries=1))
+    response = MockResponse({"error": "too_many_requests", "message": "slow down"}, 429)
+    with mock.patch.object(session, "request", return_value=response), \
+            mock.patch("malclient.request_handler.time.sleep"):
+        with pytest.raises(TooManyRequests):
+            caller.call(uri="anime/1")
+
+
+def test_caller_retries_connection_errors():
+    session = requests.Session()
+    caller = APICaller("https://api.myanimelist.net/v2/", {}, session=session,
+                       rate_limiter=RateLimiter(rate=1000))
+    with mock.patch.object(session, "request", side_effect=[requests.ConnectionError(), MockResponse({"id": 1})]), \
+            mock.patch("malclient.request_handler.time.sleep"):
+        assert caller.call(uri="anime/1") == {"id": 1}
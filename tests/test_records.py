@@ -0,0 +1,80 @@
+import gc
+import tracemalloc
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import AnimeObject, AnimeRecord, MangaRecord, NodeRecord, MyAnimeListStatus
+
+from test_request_handler import MockResponse
+
+
+def anime(anime_id):
+    return {"id": anime_id, "title": f"anime {anime_id}",
+            "main_picture": {"medium": "https://cdn.myanimelist.net/m.jpg", "large": "https://cdn.myanimelist.net/l.jpg"},
+            "mean": 8.5, "rank": anime_id, "nsfw": "white", "media_type": "tv", "status": "finished_airing", "num_episodes": 24,
+            "synopsis": "skipped by records",
+            "list_status": {"status": "completed", "score": 8, "num_episodes_watched": 24, "is_rewatching": False,
+                            "updated_at": "2020-01-01T00:00:00+00:00", "tags": ["a"]}}
+
+
+def anime_list(entries):
+    return {"data": [{"node": anime(i), "list_status": anime(i)["list_status"]} for i in range(entries)],
+            "paging": {"next": "https://api.myanimelist.net/v2/users/@me/animelist?offset=100"}}
+
+
+def test_record_from_data_skips_unknown_fields_and_is_immutable():
+    record = AnimeRecord.from_data(anime(1))
+    assert record.media_type is malclient.AnimeType.TV and record.status is malclient.AnimeStatus.FINISHED
+    assert record.main_picture.large == "https://cdn.myanimelist.net/l.jpg"
+    assert record.list_status.score == 8 and record.list_status.tags == ("a",)
+    assert not hasattr(record, "synopsis") and not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.title = "changed"
+
+
+def test_record_conversion_round_trip():
+    record = AnimeRecord.from_data(anime(1))
+    model = record.to_model()
+    assert isinstance(model, AnimeObject) and isinstance(model.list_status, MyAnimeListStatus)
+    assert model.title == "anime 1" and model.main_picture.medium == "https://cdn.myanimelist.net/m.jpg"
+    assert AnimeRecord.from_model(model) == record
+    assert NodeRecord.from_model(model) == NodeRecord.from_data(anime(1))
+
+
+def test_unknown_enum_values_are_kept():
+    record = MangaRecord.from_data({"id": 1, "title": "manga", "media_type": "new_type"})
+    assert record.media_type == "new_type"
+
+
+def test_client_returns_records():
+    client = malclient.Client(client_id="id")
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(anime_list(3))):
+        page = client.get_user_anime_list(records=True)
+    assert isinstance(page, malclient.PagedResult) and all(type(entry) is AnimeRecord for entry in page)
+    assert page[2].list_status.status == "completed" and page.has_next_page
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse({"data": [{"node": {"id": 1, "title": "a"}}], "paging": {}})):
+        page = client.search_anime("a", records=True)
+    assert page == [NodeRecord(id=1, title="a")]
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def test_records_memory_benchmark():
+    # response data is shared, only memory held by built entries is measured
+    entries = malclient.request_handler.flatten_response(anime_list(2000))["data"]
+    models = allocated(lambda: [AnimeObject(**entry) for entry in entries])
+    records = allocated(lambda: [AnimeRecord.from_data(entry) for entry in entries])
+    print(f"2000 entries: models {models / 1024:.0f} KiB, records {records / 1024:.0f} KiB")
+    assert records * 3 < models
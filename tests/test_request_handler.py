@@ -0,0 +1,92 @@
+import json
+from unittest import mock
+
+import pytest
+import requests
+
+import malclient
+from malclient.request_handler import APICaller, create_session, flatten_response
+
+
+class MockResponse:
+    def __init__(self, json_data, status_code=200, headers=None):
+        self.json_data = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(json_data).encode()
+        self.text = self.content.decode()
+
+    def json(self):
+        return self.json_data
+
+
+@pytest.fixture
+def client():
+    return malclient.Client(access_token="a_random_token")
+
+
+def test_create_session_mounts_pooled_adapter():
+    session = create_session(pool_connections=3, pool_maxsize=7)
+    adapter = session.get_adapter("https://api.myanimelist.net/v2/")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+
+
+def test_create_session_without_keep_alive():
+    assert create_session(keep_alive=False).headers['Connection'] == 'close'
+
+
+def test_call_goes_through_session():
+    session = requests.Session()
+    caller = APICaller("https://api.myanimelist.net/v2/", {"X-MAL-CLIENT-ID": "id"}, session=session)
+    with mock.patch.object(session, "request", return_value=MockResponse({"id": 1})) as request:
+        assert caller.call(uri="anime/1") == {"id": 1}
+        assert caller.call(uri="anime/1") == {"id": 1}
+    assert request.call_count == 2
+    assert request.call_args.kwargs["url"] == "https://api.myanimelist.net/v2/anime/1"
+    assert request.call_args.kwargs["headers"] == {"X-MAL-CLIENT-ID": "id"}
+
+
+def test_refresh_bearer_token_keeps_session(client):
+    handler, session = client._api_handler, client._api_handler.session
+    token = {"access_token": "new_token", "refresh_token": "new_refresh"}
+    with mock.patch.object(session, "request", return_value=MockResponse(token)):
+        client.refresh_bearer_token("id", "secret", "a_refresh_token", print_response=False)
+    assert client._api_handler is handler
+    assert client._api_handler.session is session
+    assert handler._headers["Authorization"] == "Bearer new_token"
+
+
+NODE = {"id": 1, "title": "anime title", "main_picture": {"medium": "https://cdn.myanimelist.net/1.jpg"}}
+
+
+def test_flatten_response_merges_node_and_entry_fields():
+    entry = {"node": NODE | {"list_status": {"score": 1}}, "list_status": {"score": 9}, "ranking": {"rank": 3}}
+    assert flatten_response(entry) == entry | NODE | {"list_status": {"score": 9}}
+
+
+def test_flatten_response_unwraps_nested_nodes():
+    entry = {"node": {"id": 2, "title": "sequel"}, "relation": {"node": NODE}, "role": "Main"}
+    flattened = flatten_response(entry)
+    assert flattened["relation"] == NODE
+    assert (flattened["id"], flattened["role"]) == (2, "Main")
+
+
+def test_flatten_response_parses_pages():
+    page = {"data": [{"node": NODE, "ranking": {"rank": 1}}, {}], "paging": {"next": "next"}}
+    assert flatten_response(page) == {"data": [NODE | {"node": NODE, "ranking": {"rank": 1}}, {}], "paging": {"next": "next"}}
+    assert flatten_response({"data": {"node": NODE}}) == {"data": {"node": NODE}}
+
+
+def test_flatten_response_parses_animeography():
+    character = {"id": 5, "animeography": [{"node": NODE, "role": "Supporting"}]}
+    assert flatten_response(character)["animeography"] == [NODE | {"node": NODE, "role": "Supporting"}]
+
+
+def test_flatten_response_does_not_modify_input():
+    page = {"data": [{"node": NODE, "relation": {"node": NODE}}], "paging": {}}
+    snapshot = json.loads(json.dumps(page))
+    flatten_response(page)
+    assert page == snapshot
+    plain = {"id": 1}
+    assert flatten_response(plain) is plain
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient.single_flight import SingleFlight, AsyncSingleFlight
+
+from test_request_handler import MockResponse
+
+ANIME = {"id": 1, "title": "anime title", "main_picture": {"medium": "https://cdn.myanimelist.net/1.jpg"}}
+
+
+def test_single_flight_shares_result_between_concurrent_callers():
+    flight, calls = SingleFlight(), []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "result"
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: flight.do("key", slow), range(8)))
+    assert results == ["result"] * 8
+    assert len(calls) == 1 and flight.coalesced == 7
+
+
+def test_single_flight_propagates_errors_to_every_caller():
+    flight, barrier = SingleFlight(), threading.Barrier(2)
+
+    def failing():
+        barrier.wait()
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    def waiting():
+        barrier.wait()
+        return flight.do("key", failing)
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, "key", failing)
+        follower = executor.submit(waiting)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_single_flight_shares_result():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", slow) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1 and flight.coalesced == 4
+
+
+def test_client_coalesces_identical_requests():
+    client = malclient.Client(client_id="id")
+
+    def slow_request(*args, **kwargs):
+        time.sleep(0.1)
+        return MockResponse(ANIME)
+
+    with mock.patch.object(client._api_handler.session, "request", side_effect=slow_request) as request:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda _: client.get_anime_details(1), range(4)))
+    assert request.call_count == 1
+    assert all(result.title == "anime title" for result in results)
+    assert len({id(result) for result in results}) == 4
+
+
+def test_coalesced_callers_get_their_own_projection():
+    client = malclient.Client(client_id="id", cache=malclient.MemoryCache())
+    full = ANIME | {"mean": 8.5, "rank": 10}
+    narrow = {key: full[key] for key in ("id", "title", "main_picture", "mean")}
+
+    def slow_request(*args, **kwargs):
+        time.sleep(0.1)
+        return MockResponse(full)
+
+    with mock.patch.object(client._api_handler.session, "request", return_value=MockResponse(narrow)):
+        client.get_anime_fields(1, malclient.Fields.from_list(["id", "title", "mean"]))
+    # both requests widen cached entry to the same fields, but each of them asked for different ones
+    wants = [["id", "title", "rank"], ["id", "title", "mean", "rank"]]
+    with mock.patch.object(client._api_handler.session, "request", side_effect=slow_request) as request:
+        with ThreadPoolExecutor(2) as executor:
+            rank_only, both = executor.map(lambda want: client.get_anime_fields(1, malclient.Fields.from_list(want)), wants)
+    assert request.call_count == 1
+    assert rank_only.rank == 10 and rank_only.mean is None
+    assert both.rank == 10 and both.mean == 8.5
@@ -0,0 +1,110 @@
+import asyncio
+import re
+from unittest import mock
+from urllib.parse import urlencode, unquote
+
+import pytest
+
+import malclient
+from malclient import MemoryListStore
+
+from test_request_handler import MockResponse
+
+
+class FakeList(object):
+    # user list served sorted by update time, like users/{name}/animelist?sort=list_updated_at
+    def __init__(self, entries: int):
+        self.updated = {anime_id: f"2020-01-{anime_id + 1:02d}T00:00:00+00:00" for anime_id in range(entries)}
+
+    def touch(self, anime_id: int, day: int):
+        self.updated[anime_id] = f"2020-02-{day:02d}T00:00:00+00:00"
+
+    def __call__(self, method, url, params=None, **kwargs):
+        query = {key: unquote(value) for key, value in re.findall(r"(\w+)=([^&]+)", url.split("?", 1)[1])} if "?" in url else dict(params or {})
+        assert query["sort"] == "list_updated_at"
+        offset, limit = int(query.get("offset", 0)), int(query["limit"])
+        ordered = sorted(self.updated, key=self.updated.get, reverse=True)
+        # list status is returned only if it was requested
+        with_status = "list_status" in query.get("fields", "")
+        data = [{"node": {"id": anime_id, "title": f"anime {anime_id}"}} |
+                ({"list_status": {"status": "watching", "score": 0, "num_episodes_watched": 1, "is_rewatching": False,
+                                  "updated_at": self.updated[anime_id]}} if with_status else {})
+                for anime_id in ordered[offset:offset + limit]]
+        paging = {}
+        if offset + limit < len(ordered):
+            paging["next"] = "https://api.myanimelist.net/v2/users/@me/animelist?" + urlencode(query | {"offset": offset + limit})
+        return MockResponse({"data": data, "paging": paging})
+
+
+def test_incomplete_store_can_not_be_created():
+    class ReadOnly(malclient.ListStore):
+        def entries(self, username, media):
+            return []
+
+    with pytest.raises(TypeError):
+        ReadOnly()
+
+
+def test_first_sync_downloads_whole_list_then_only_delta():
+    client, store, server = malclient.Client(client_id="id"), MemoryListStore(), FakeList(7)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server) as request:
+        result = client.sync_user_anime_list(store=store, page_size=3)
+        assert result.full and result.updated == 7 and result.requests == 3
+        assert sorted(entry.id for entry in store.entries("@me", "anime")) == list(range(7))
+
+        server.touch(2, day=1)
+        request.reset_mock()
+        result = client.sync_user_anime_list(store=store, delta_page_size=5)
+    assert not result.full and request.call_count == 1
+    stored = {entry.id: entry for entry in store.entries("@me", "anime")}
+    assert stored[2].list_status.updated_at.month == 2
+    # entry updated in the same second as previous watermark is applied again
+    assert result.updated == 2 and result.watermark.month == 2
+    assert len(store.entries("@me", "anime")) == 7
+
+
+def test_delta_spanning_pages_and_unchanged_list():
+    client, store, server = malclient.Client(client_id="id"), MemoryListStore(), FakeList(7)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server) as request:
+        client.sync_user_anime_list(store=store)
+        for anime_id, day in ((0, 1), (1, 2), (3, 3)):
+            server.touch(anime_id, day)
+        request.reset_mock()
+        result = client.sync_user_anime_list(store=store, delta_page_size=2)
+        assert result.updated == 4 and request.call_count == 3
+        request.reset_mock()
+        result = client.sync_user_anime_list(store=store, delta_page_size=2)
+        assert result.updated == 1 and request.call_count == 1
+
+
+def test_full_sync_drops_removed_entries():
+    client, store, server = malclient.Client(client_id="id"), MemoryListStore(), FakeList(4)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        client.sync_user_anime_list(store=store)
+        del server.updated[1]
+        client.sync_user_anime_list(store=store)
+        assert len(store.entries("@me", "anime")) == 4
+        result = client.sync_user_anime_list(store=store, full=True)
+    assert result.full and sorted(entry.id for entry in store.entries("@me", "anime")) == [0, 2, 3]
+
+
+def test_list_status_is_always_requested():
+    client, store, server = malclient.Client(client_id="id"), MemoryListStore(), FakeList(2)
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server) as request:
+        result = client.sync_user_anime_list(store=store, fields=malclient.Fields.from_list(["id", "title"]), list_status_fields=False)
+    assert request.call_args.kwargs["params"]["fields"] == "id,title,main_picture,list_status{updated_at}"
+    assert result.updated == 2 and result.watermark is not None
+
+
+def test_async_sync():
+    pytest.importorskip("aiohttp")
+    server = FakeList(5)
+
+    async def fake_call(uri, *, build=None, params=None, **kwargs):
+        response = server("GET", "https://api.myanimelist.net/v2/" + uri, params=params)
+        return build(client._api_handler._parse_json(response.json()))
+
+    client, store = malclient.AsyncClient(client_id="id"), MemoryListStore()
+    client._call = fake_call
+    result = asyncio.run(client.sync_user_anime_list(store=store, page_size=2))
+    assert result.updated == 5 and result.requests == 3
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+
+import malclient
+from malclient import MyAnimeListStatus
+
+from test_request_handler import MockResponse
+
+
+def status(**data):
+    return {"status": "watching", "score": 0, "num_episodes_watched": 1, "is_rewatching": False,
+            "updated_at": "2020-01-01T00:00:00+00:00"} | data
+
+
+class FakeServer(object):
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.writes = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, data=None, **kwargs):
+        with self._lock:
+            # requests skips None values of form data
+            self.writes.append((url.rsplit("/", 2)[-2], {key: value for key, value in data.items() if value is not None}))
+            if self.failures:
+                return MockResponse({"message": "error"}, self.failures.pop(0))
+        return MockResponse(status(num_episodes_watched=int(data.get("num_watched_episodes", 0))))
+
+
+@pytest.fixture
+def client():
+    return malclient.Client(access_token="a_random_token")
+
+
+def test_updates_of_same_entry_are_coalesced(client):
+    server = FakeServer()
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        with client.write_behind(flush_interval=60) as queue:
+            first = queue.update_anime_status(1, num_watched_episodes=3, status="watching", start_date=None)
+            second = queue.update_anime_status(1, num_watched_episodes=5)
+            other = queue.update_anime_status(2, num_watched_episodes=1)
+            assert first is second and queue.pending == 2 and server.writes == []
+            assert queue.flush(timeout=5)
+    assert sorted(server.writes, key=lambda write: write[0]) == \
+        [("1", {"status": "watching", "num_watched_episodes": 5}), ("2", {"num_watched_episodes": 1})]
+    assert isinstance(first.result(), MyAnimeListStatus) and first.result().num_episodes_watched == 5
+    assert other.result().num_episodes_watched == 1
+
+
+def test_size_threshold_flushes_without_waiting_for_timer(client):
+    server = FakeServer()
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        queue = client.write_behind(flush_interval=60, max_pending=2)
+        futures = [queue.update_anime_status(anime_id, num_watched_episodes=1) for anime_id in range(2)]
+        assert all(future.result(timeout=5) for future in futures)
+        queue.close()
+    with pytest.raises(RuntimeError):
+        queue.update_anime_status(1, score=1)
+
+
+def test_transient_errors_are_retried(client):
+    server = FakeServer(failures=[503, 429])
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        with client.write_behind(flush_interval=60, retry_backoff=0) as queue:
+            future = queue.update_manga_status(7, num_chapters_read=10)
+            queue.flush(timeout=5)
+    assert len(server.writes) == 3 and server.writes[0][0] == "7"
+    assert isinstance(future.result(), malclient.MyMangaListStatus)
+
+
+def test_permanent_errors_are_set_on_future(client):
+    server = FakeServer(failures=[404])
+    with mock.patch.object(client._api_handler.session, "request", side_effect=server):
+        with client.write_behind(flush_interval=60, retry_backoff=0) as queue:
+            future = queue.update_anime_status(1, score=8)
+            assert queue.flush(timeout=5)
+    assert len(server.writes) == 1 and isinstance(future.exception(), malclient.NotFound)
+
+
+def test_async_queue():
+    pytest.importorskip("aiohttp")
+    writes = []
+
+    async def fake_call(uri, *, method="get", data=None, build=None, **kwargs):
+        writes.append((uri, dict(data)))
+        await asyncio.sleep(0)
+        return build(status(num_episodes_watched=data["num_watched_episodes"]))
+
+    async def main():
+        client = malclient.AsyncClient(access_token="a_random_token")
+        client._call = fake_call
+        async with client.write_behind(flush_interval=60) as queue:
+            queue.update_anime_status(1, num_watched_episodes=2)
+            future = queue.update_anime_status(1, num_watched_episodes=4, score=7)
+            assert await queue.flush(timeout=5)
+            assert (await future).num_episodes_watched == 4
+            late = queue.update_anime_status(2, num_watched_episodes=1)
+        return late.result()
+
+    assert asyncio.run(main()).num_episodes_watched == 1
+    assert [(uri, {key: value for key, value in data.items() if value is not None}) for uri, data in writes] == \
+        [("anime/1/my_list_status", {"num_watched_episodes": 4, "score": 7}), ("anime/2/my_list_status", {"num_watched_episodes": 1})]